@@ -7,7 +7,7 @@ from .calibrator import Calibrator
 from .data_collector import DataCollector
 from .data_loader import DataFrameInfo, DataLoader, MatrixInfo
 from .model import Model
-from .network import Edge, Network, NetworkAgent
+from .network import Edge, Network, NetworkAgent, SparseNetwork
 from .scenario_manager import Scenario
 from .simulator import Simulator, SimulatorMeta
 from .table_generator import DataFrameGenerator
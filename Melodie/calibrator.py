@@ -20,6 +20,7 @@ from typing import (
 import pandas as pd
 
 from MelodieInfra import Config, MelodieExceptions
+from MelodieInfra.core import AgentPool
 from MelodieInfra.parallel.parallel_manager import ParallelManager, ThreadParallelManager
 from MelodieInfra.utils import underline_to_camel
 
@@ -169,6 +170,8 @@ class GACalibratorAlgorithm:
         self._current_generation = 0
         self.processors = processors
         self.parallel_mode = parallel_mode
+        # Agent pools of thread workers, by core id.
+        self._agent_pools: Dict[int, AgentPool] = {}
 
         if self.parallel_mode == "process":
             d = {
@@ -228,6 +231,7 @@ class GACalibratorAlgorithm:
         scenario.set_params(env_params, asserts_key_exist=False)
 
         model = calibrator.model_cls(calibrator.config, scenario)
+        model._use_agent_pool(self._agent_pools.setdefault(core_id, AgentPool()))
         model.create()
         model._setup()
         model.run()
@@ -246,6 +250,7 @@ class GACalibratorAlgorithm:
         env_data["target_function_value"] = env_data["distance"] = calibrator.distance(
             model
         )
+        model._release_agents()
 
         t1 = time.time()
         thread_logger.info(
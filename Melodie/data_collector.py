@@ -263,14 +263,14 @@ class DataCollector:
         if container_name not in self.agent_properties_dict:
             if len(container) == 0:
                 raise ValueError(f"No property collected for container {container}!")
-            agent_attrs_dict = container.random_sample(1)[0].__dict__
+            sample_agent = container.random_sample(1)[0]
             props = {
                 "id_scenario": 0,
                 "id_run": 0,
                 "period": 0,
                 "id": 0,
             }
-            props.update({k: agent_attrs_dict[k] for k in prop_names})
+            props.update({k: getattr(sample_agent, k) for k in prop_names})
 
             row_cls = TableRow.subcls_from_dict(props)
             self.agent_properties_dict[container_name] = Table(
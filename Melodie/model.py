@@ -1,5 +1,7 @@
 import logging
-from typing import List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, List, Optional, Type, TypeVar, Union
+
+import numpy as np
 
 from MelodieInfra import (
     DBConn,
@@ -16,11 +18,17 @@ from MelodieInfra.config.config import Config
 from MelodieInfra.core import (
     Agent,
     AgentList,
+    AgentPool,
     BaseAgentContainer,
+    ContinuousSpace,
     Environment,
+    EventCalendar,
     Grid,
+    RandomStream,
+    Scheduler,
     Spot,
 )
+from MelodieInfra.core import api
 
 from .data_collector import DataCollector
 from .network import Edge, Network
@@ -35,6 +43,8 @@ AgentType = TypeVar("AgentType", bound=Agent)
 GridType = TypeVar("GridType", bound=Grid)
 SpotType = TypeVar("SpotType", bound=Spot)
 NetworkType = TypeVar("NetworkType", bound=Network)
+SpaceType = TypeVar("SpaceType", bound=ContinuousSpace)
+SchedulerType = TypeVar("SchedulerType", bound=Scheduler)
 DataCollectorType = TypeVar("DataCollectorType", bound=DataCollector)
 
 
@@ -45,6 +55,9 @@ class ModelRunRoutine:
     When ``Model.iterator()`` is called, a ``ModelRunRoutine`` object is
     created. It yields an integer representing the current step, ranging from
     0 to ``max_step - 1``.
+
+    At the end of each step, agent additions and removals staged with
+    ``AgentList.defer_add`` and ``AgentList.defer_remove`` are committed.
     """
 
     def __init__(self, max_step: int, model: "Model"):
@@ -56,6 +69,7 @@ class ModelRunRoutine:
         return self
 
     def __next__(self):
+        self.model._commit_staged_agents()
         if self._current_step >= self._max_step - 1:
             raise StopIteration
         self.model._visualizer_step(self._current_step)
@@ -69,6 +83,51 @@ class ModelRunRoutine:
         self.model = None
 
 
+class EventRunRoutine:
+    """
+    An iterator for a model's main run loop in discrete-event mode.
+
+    When ``Model.event_iterator()`` is called, an ``EventRunRoutine`` object is
+    created. It yields the sampling instants ``0, sampling_interval,
+    2 * sampling_interval, ...`` before ``max_time``. Before yielding an instant,
+    the events of ``Model.calendar`` scheduled until this instant are run, so the
+    loop jumps from event to event without stepping through the periods between.
+
+    As in ``ModelRunRoutine``, staged agent additions and removals are committed
+    after each loop iteration, and after the events are run.
+    """
+
+    def __init__(self, max_time: float, sampling_interval: float, model: "Model"):
+        if sampling_interval <= 0:
+            raise MelodieExceptions.Program.Variable.VariableInvalid(
+                "sampling_interval", sampling_interval, "a positive number"
+            )
+        self._current_sample = -1
+        self._max_time = max_time
+        self._sampling_interval = sampling_interval
+        self.model: "Model" = model
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self.model._commit_staged_agents()
+        sample_time = (self._current_sample + 1) * self._sampling_interval
+        if sample_time >= self._max_time:
+            raise StopIteration
+        self.model._visualizer_step(self._current_sample)
+        self._current_sample += 1
+        self.model.calendar.run_until(sample_time)
+        self.model._commit_staged_agents()
+        return sample_time
+
+    def __del__(self):
+        """
+        Clean up resources to avoid circular references.
+        """
+        self.model = None
+
+
 class Model:
     """
     The base class for a Melodie model.
@@ -83,6 +142,14 @@ class Model:
     override these three methods.
     """
 
+    # Whether Calibrator and Trainer workers may reuse the agent objects of a run
+    # in the next run, reinitializing them with ``Agent.reset()``. Off by default:
+    # the default ``reset()`` runs ``__init__`` and ``setup()`` again, which saves
+    # little more than the allocations. Turn it on for models running many short
+    # runs whose agents override ``reset()`` to restore only what a run changes.
+    # Models keeping references to agents across runs should not turn it on.
+    agent_pooling: bool = False
+
     def __init__(
         self,
         config: "Config",
@@ -111,6 +178,17 @@ class Model:
         self.initialization_queue: List[
             Union["AgentList", "Grid", "Environment", DataCollector, Network]
         ] = []
+        # Agent lists holding staged additions or removals to be committed at the
+        # end of the current step.
+        self._staged_agent_lists: List[AgentList] = []
+        # Agent lists created by this model, and the pool their agents are taken
+        # from and returned to, if pooling is used.
+        self._agent_lists: List[AgentList] = []
+        self.agent_pool: Optional[AgentPool] = None
+        self._rng: Optional[RandomStream] = None
+        self._rng_seed_epoch = -1
+        # The calendar of events run by ``event_iterator()``.
+        self.calendar = EventCalendar()
 
     def __del__(self):
         """
@@ -140,6 +218,41 @@ class Model:
         """
         pass
 
+    @property
+    def rng(self) -> RandomStream:
+        """
+        The random stream of this model run.
+
+        Each run has its own stream, derived from the seed set with
+        :func:`~Melodie.set_seed`, the scenario id and ``run_id_in_scenario``. So
+        runs are reproducible whether they run one after another or in parallel,
+        and do not share a random state. It is used by the framework, e.g. by
+        :meth:`~Melodie.AgentList.random_sample` and
+        :meth:`~Melodie.Grid.rand_move_agent`, and models can draw from it as well,
+        including batched draws:
+
+        .. code-block:: python
+
+            if self.model.rng.random() < self.scenario.infection_prob:
+                ...
+            recovered = self.model.rng.random(len(agents)) < recovery_prob
+
+        The stream is derived again if ``set_seed`` is called afterwards.
+        """
+        if self._rng is None or self._rng_seed_epoch != api.seed_epoch():
+            self._rng = RandomStream(
+                api.run_seed_sequence(self.scenario.id, self.run_id_in_scenario)
+            )
+            self._rng_seed_epoch = api.seed_epoch()
+        return self._rng
+
+    @rng.setter
+    def rng(self, rng: Union[RandomStream, np.random.Generator]):
+        if not isinstance(rng, RandomStream):
+            rng = RandomStream(generator=rng)
+        self._rng = rng
+        self._rng_seed_epoch = api.seed_epoch()
+
     def create_db_conn(self) -> "DBConn":
         """
         Create a database connection using the project configuration.
@@ -151,6 +264,8 @@ class Model:
     def create_agent_list(
         self,
         agent_class: Type[AgentType],
+        columns: Optional[Dict[str, Any]] = None,
+        compact: bool = False,
     ) -> AgentList[AgentType]:
         """
         Create an :class:`~Melodie.AgentList` object.
@@ -158,9 +273,41 @@ class Model:
         A model can contain multiple agent lists for different types of agents.
 
         :param agent_class: The class of the agent to be contained in the list.
+        :param columns: Optional. A dict mapping numeric agent properties to
+            dtypes, e.g. ``{"health_state": int}``. If provided, these properties
+            are stored in NumPy arrays and can be processed in a vectorized way
+            with :meth:`~Melodie.AgentList.column`.
+        :param compact: Optional. If True, agents store the attributes declared in
+            ``setup()`` in ``__slots__``, which reduces memory usage for large
+            populations.
         :return: An :class:`~Melodie.AgentList` object.
         """
-        return AgentList(agent_class, model=self)
+        agent_list = AgentList(
+            agent_class, model=self, columns=columns, compact=compact
+        )
+        self._agent_lists.append(agent_list)
+        return agent_list
+
+    def create_scheduler(
+        self,
+        scheduler_cls: Type[SchedulerType],
+        agent_list: AgentList,
+        **kwargs,
+    ) -> SchedulerType:
+        """
+        Create an activation scheduler, which calls a method of the agents in
+        ``agent_list`` each time its ``step()`` is called, e.g. once per period of
+        :meth:`iterator`.
+
+        :param scheduler_cls: The scheduler class, such as
+            :class:`~Melodie.RandomActivation`, :class:`~Melodie.StagedActivation`
+            or :class:`~Melodie.SparseActivation`.
+        :param agent_list: The agents to activate.
+        :param kwargs: Other arguments of the scheduler class, e.g.
+            ``method="step"``.
+        :return: The scheduler.
+        """
+        return scheduler_cls(agent_list, **kwargs)
 
     def create_environment(self, env_class: Type[EnvironmentType]) -> EnvironmentType:
         """
@@ -194,6 +341,7 @@ class Model:
         grid_cls = grid_cls if grid_cls is not None else Grid
         spot_cls = spot_cls if spot_cls is not None else Spot
         grid = grid_cls(spot_cls, self.scenario)
+        grid.model = self
         self.initialization_queue.append(grid)
         return grid
 
@@ -217,6 +365,22 @@ class Model:
         self.initialization_queue.append(network)
         return network
 
+    def create_continuous_space(
+        self, space_cls: Optional[Type[SpaceType]] = None
+    ) -> SpaceType:
+        """
+        Create a continuous space, where agents stand at float coordinates.
+
+        :param space_cls: The class of the space. Defaults to
+            :class:`~Melodie.ContinuousSpace`.
+        :return: The created space object.
+        """
+        space_cls = space_cls if space_cls is not None else ContinuousSpace
+        space = space_cls(self.scenario)
+        space.model = self
+        self.initialization_queue.append(space)
+        return space
+
     def create_data_collector(self, data_collector_cls: Type[DataCollectorType]) -> DataCollectorType:
         """
         Create the data collector for the model.
@@ -308,6 +472,57 @@ class Model:
         """
         return ModelRunRoutine(period_num, self)
 
+    def event_iterator(self, max_time: float, sampling_interval: float = 1):
+        """
+        Get an iterator for a discrete-event simulation loop.
+
+        Instead of polling every agent every period, agents schedule callbacks at
+        future times in :attr:`calendar`, e.g. their recovery when they get
+        infected. The iterator yields the sampling instants from ``0`` to before
+        ``max_time``, every ``sampling_interval``, after running the events due
+        until this instant. So the work is proportional to the number of events
+        and sampling instants, not to periods times agents:
+
+        .. code-block:: python
+
+            def run(self):
+                for t in self.event_iterator(self.scenario.period_num):
+                    self.data_collector.collect(t)
+                self.data_collector.save()
+
+        :param max_time: The end of the simulation. Events scheduled after the
+            last sampling instant are not run.
+        :param sampling_interval: Time between two sampling instants.
+        :return: An ``EventRunRoutine`` iterator object.
+        """
+        return EventRunRoutine(max_time, sampling_interval, self)
+
+    def _use_agent_pool(self, agent_pool: "AgentPool"):
+        """
+        Take agents from ``agent_pool`` when agent lists are set up, unless
+        ``agent_pooling`` is disabled for this model.
+        """
+        if self.agent_pooling:
+            self.agent_pool = agent_pool
+
+    def _release_agents(self):
+        """
+        At the end of a run, return the agents of all agent lists to the agent
+        pool, if there is one.
+        """
+        if self.agent_pool is None:
+            return
+        for agent_list in self._agent_lists:
+            agent_list._release_to_pool(self.agent_pool)
+
+    def _commit_staged_agents(self):
+        """
+        Commit the staged additions and removals of all agent lists.
+        """
+        staged_agent_lists, self._staged_agent_lists = self._staged_agent_lists, []
+        for agent_list in staged_agent_lists:
+            agent_list.commit()
+
     def _visualizer_step(self, current_step: int):
         """
         If a visualizer is present, advance it by one step.
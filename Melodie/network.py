@@ -1,13 +1,16 @@
 import ast
+import inspect
 import logging
 import os
-from typing import TYPE_CHECKING, Dict, List, Set, Tuple, Type, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Set, Tuple, Type, Union
 
 import networkx as nx
 import numpy as np
 
 from MelodieInfra.core import Agent, AgentList
 
+from .network_generators import GENERATORS
+
 if TYPE_CHECKING:
     from .model import Model
 logger = logging.getLogger(__name__)
@@ -113,8 +116,7 @@ class Network:
         self.model: "Model" = model
         self.simple = True
         self.directed = directed
-        self.nodes: Set[NodeType] = set()
-        self.edges: Dict[NodeType, Dict[NodeType, Edge]] = {}
+        self._setup_storage()
         self.edge_cls: Type[Edge] = edge_cls if edge_cls is not None else Edge
         self.agent_categories: Dict[int, AgentList] = {}
 
@@ -126,6 +128,10 @@ class Network:
 
         self.setup()
 
+    def _setup_storage(self):
+        self.nodes: Set[NodeType] = set()
+        self.edges: Dict[NodeType, Dict[NodeType, Edge]] = {}
+
     def _setup(self):
         self.setup()
 
@@ -320,16 +326,23 @@ class Network:
 
                 traceback.print_exc()
 
-        g = nx.DiGraph()
-        for start_node in self.edges.keys():
-            for end_node in self.edges[start_node].keys():
-                g.add_edge(start_node, end_node)
+        g = self._layout_graph()
         layout = self._layout_creator(g)
         for node, pos in layout.items():
             g.nodes[node]["viz"] = {"position": {"x": pos[0], "y": pos[1], "z": 0}}
         nx.write_gexf(g, self.layout_file)
         self.layout = layout
 
+    def _layout_graph(self) -> "nx.DiGraph":
+        """
+        Build the NetworkX graph passed to the layout creator.
+        """
+        g = nx.DiGraph()
+        for start_node in self.edges.keys():
+            for end_node in self.edges[start_node].keys():
+                g.add_edge(start_node, end_node)
+        return g
+
     def get_position(self, agent_category: int, agent_id: int):
         """
         Get the position of agent.
@@ -352,18 +365,25 @@ class Network:
         Set up the connection between agents.
         The name and parameters come from NetworkX package. For example, The documentation for BA scale-free network
         is here: https://networkx.org/documentation/stable/reference/generated/networkx.generators.random_graphs.barabasi_albert_graph.html.
-        To create it, network_type is `barabasi_albert_graph`, and parameters should be a dict {"n": 100, "m": 3}.
+        To create it, network_type is `barabasi_albert_graph`, and parameters should be a dict {"m": 3}, as the
+        number of nodes is the number of agents.
+
+        The network types in ``Melodie.network_generators.GENERATORS``, i.e. `erdos_renyi_graph`,
+        `barabasi_albert_graph`, `watts_strogatz_graph`, `configuration_model` (with parameter `deg_sequence`) and
+        `stochastic_block_model` (with parameters `sizes` and `p`), are generated with NumPy without building a
+        NetworkX graph, from the random stream of the model, ``model.rng``. If the parameters include others, such
+        as `seed` or `directed`, the network is generated by NetworkX as before.
+
+        Unlike NetworkX, which returns a multigraph, the NumPy `configuration_model` drops the self-loops and the
+        repeated edges, so that agents may have fewer neighbors than their degrees in `deg_sequence`.
 
         :param agent_lists: Initial agent lists containing agents to be placed onto the network.
         :param network_type: str, describing the type of network, which should be the corresponding to networkx.
         :param network_params: A dictionary for parameter values.
         :return: None
         """
-        import networkx as nx
-
         assert isinstance(agent_lists, list)
-        node_id = 0
-        node_id_to_node_type_map: Dict[int, NodeType] = {}
+        nodes: List[NodeType] = []
         for agent_list in agent_lists:
             if len(agent_list) > 0:
                 agent_list[0].set_category()
@@ -373,19 +393,492 @@ class Network:
             for agent in agent_list:
                 self.add_agent(agent)
                 agent._set_network(self)
-                node_id_to_node_type_map[node_id] = (agent.category, agent.id)
-                node_id += 1
-
-        g = getattr(nx, network_type)(
-            len(self.nodes),
-            **network_params,
-        )
+                nodes.append((agent.category, agent.id))
+
+        network_params = network_params if network_params is not None else {}
+        generator = GENERATORS.get(network_type)
+        if generator is not None and set(network_params) <= set(
+            inspect.signature(generator).parameters
+        ) - {"n", "rng"}:
+            sources, targets = generator(
+                len(nodes), rng=self.model.rng.generator, **network_params
+            )
+        else:
+            g = getattr(nx, network_type)(
+                len(nodes),
+                **network_params,
+            )
+            edges = np.array(g.edges, dtype=np.int64).reshape(-1, 2)
+            sources, targets = edges[:, 0], edges[:, 1]
+        self._add_generated_edges(nodes, sources, targets)
 
-        for edge in g.edges:
-            agent_src = node_id_to_node_type_map[edge[0]]
-            agent_dest = node_id_to_node_type_map[edge[1]]
+    def _add_generated_edges(
+        self, nodes: List[NodeType], sources: np.ndarray, targets: np.ndarray
+    ):
+        """
+        Add the edges of a generated network, whose ends are given as positions in
+        ``nodes``.
+        """
+        for source, target in zip(sources.tolist(), targets.tolist()):
+            agent_src = nodes[source]
+            agent_dest = nodes[target]
             edge_obj = self.edge_cls(
                 agent_src[0], agent_src[1], agent_dest[0], agent_dest[1], {}
             )
             self.add_edge(agent_src, agent_dest, edge_obj)
-        self._nx_edges = list(g.edges)
+
+
+def _grown(values: np.ndarray, size: int, fill=0) -> np.ndarray:
+    """
+    Return ``values``, or a copy at least twice as long if it is shorter than
+    ``size``, whose new items are ``fill``.
+    """
+    if size <= len(values):
+        return values
+    grown = np.full(max(size, 2 * len(values)), fill, dtype=values.dtype)
+    grown[: len(values)] = values
+    return grown
+
+
+class SparseNetwork(Network):
+    """
+    A ``Network`` storing its edges in NumPy arrays, instead of one ``Edge`` object
+    per edge in a dict of dicts, for networks with millions of edges.
+
+    Nodes are mapped to integer indices. Edges are appended to coordinate (COO)
+    arrays of source and target nodes, with each edge property in a column array,
+    and the edges of a node are looked up in a compressed sparse row (CSR) index,
+    rebuilt once enough edges have changed since. ``Edge`` objects are only created
+    when asked for, by ``get_edge``, ``get_node_edges`` or ``edges``, and kept
+    afterwards: attributes assigned to them stay on these objects.
+
+    Agent ids should be non-negative integers. To use it, pass it to
+    ``Model.create_network``:
+
+    .. code-block:: python
+
+        self.network = self.create_network(network_cls=SparseNetwork)
+    """
+
+    def _setup_storage(self):
+        self._category_codes: Dict[Any, int] = {}
+        self._categories: List[Any] = []
+        # For each category, the node index of each agent id, or -1.
+        self._node_indices: List[np.ndarray] = []
+        self._node_codes = np.zeros(0, dtype=np.int32)
+        self._node_ids = np.zeros(0, dtype=np.int64)
+        self._node_alive = np.zeros(0, dtype=bool)
+        self._num_nodes = 0
+
+        # The edges ever added, by row. Removed edges are marked as not alive.
+        self._sources = np.zeros(0, dtype=np.int64)
+        self._targets = np.zeros(0, dtype=np.int64)
+        self._edge_alive = np.zeros(0, dtype=bool)
+        self._num_edges = 0
+        # The properties of the edges, and if each row has them.
+        self._edge_columns: Dict[str, np.ndarray] = {}
+        self._edge_has: Dict[str, np.ndarray] = {}
+        self._edge_objects: Dict[int, Edge] = {}
+
+        # The CSR index of the edges of each node, in both directions if the
+        # network is undirected, covering the rows added before it was built.
+        # Rows added one by one since are listed in ``_pending`` by node.
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._neighbors = np.zeros(0, dtype=np.int64)
+        self._neighbor_edges = np.zeros(0, dtype=np.int64)
+        self._indexed_edges = 0
+        self._pending: Dict[int, List[int]] = {}
+        # For directed networks, the same index of the incoming edges of each node,
+        # to remove them with the node.
+        self._in_offsets = np.zeros(1, dtype=np.int64)
+        self._in_edges = np.zeros(0, dtype=np.int64)
+        self._pending_in: Dict[int, List[int]] = {}
+        self._changes = 0
+        self._stale = False
+
+    @property
+    def nodes(self) -> Set[NodeType]:
+        """
+        The nodes on the network, as a new set of ``(category, agent_id)``.
+        """
+        alive = np.flatnonzero(self._node_alive[: self._num_nodes])
+        return set(self._node_keys(alive))
+
+    @property
+    def edges(self) -> Dict[NodeType, Dict[NodeType, Edge]]:
+        """
+        The edges of the network, as a new dict of dicts like ``Network.edges``.
+
+        It creates the ``Edge`` objects of all edges, which is only meant for small
+        networks, e.g. to visualize them.
+        """
+        edges: Dict[NodeType, Dict[NodeType, Edge]] = {}
+        rows = np.flatnonzero(self._edge_alive[: self._num_edges])
+        sources = self._node_keys(self._sources[rows])
+        targets = self._node_keys(self._targets[rows])
+        for row, source, target in zip(rows.tolist(), sources, targets):
+            edge = self._edge(row)
+            edges.setdefault(source, {})[target] = edge
+            if not self.directed:
+                edges.setdefault(target, {})[source] = edge
+        return edges
+
+    def _node_keys(self, nodes: np.ndarray) -> List[NodeType]:
+        categories = map(self._categories.__getitem__, self._node_codes[nodes].tolist())
+        return list(zip(categories, self._node_ids[nodes].tolist()))
+
+    def _node(self, node: NodeType) -> int:
+        """
+        Get the index of a node, or raise a ``KeyError`` if it is not on the network.
+        """
+        category, agent_id = node
+        code = self._category_codes.get(category)
+        if code is not None:
+            indices = self._node_indices[code]
+            if 0 <= agent_id < len(indices) and indices[agent_id] >= 0:
+                return int(indices[agent_id])
+        raise KeyError(node)
+
+    def _add_agent(self, category: int, agent_id: int):
+        if agent_id < 0:
+            raise ValueError(
+                f"Agent ids on a SparseNetwork should be non-negative, but got {agent_id}"
+            )
+        code = self._category_codes.get(category)
+        if code is None:
+            code = self._category_codes[category] = len(self._categories)
+            self._categories.append(category)
+            self._node_indices.append(np.zeros(0, dtype=np.int64))
+        indices = self._node_indices[code] = _grown(
+            self._node_indices[code], agent_id + 1, -1
+        )
+        if indices[agent_id] >= 0:
+            return
+        node = self._num_nodes
+        self._node_codes = _grown(self._node_codes, node + 1)
+        self._node_ids = _grown(self._node_ids, node + 1)
+        self._node_alive = _grown(self._node_alive, node + 1)
+        self._node_codes[node] = code
+        self._node_ids[node] = agent_id
+        self._node_alive[node] = True
+        indices[agent_id] = node
+        self._num_nodes += 1
+
+    def _remove_agent(self, category: int, agent_id: int):
+        node = self._node((category, agent_id))
+        self._node_indices[self._category_codes[category]][agent_id] = -1
+        self._node_alive[node] = False
+        rows, _ = self._edge_rows(node)
+        if self.directed:
+            incoming = self._incoming_rows(node)
+            # Self-loops are outgoing edges already.
+            rows = np.concatenate((rows, incoming[self._sources[incoming] != node]))
+        for row in rows.tolist():
+            self._remove_row(row)
+
+    def _edge_rows(self, node: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the rows of the edges of a node, and the nodes at their other ends, in
+        the order they were added.
+        """
+        self._update_index()
+        if node < len(self._offsets) - 1:
+            start, end = self._offsets[node], self._offsets[node + 1]
+            rows = self._neighbor_edges[start:end]
+            others = self._neighbors[start:end]
+        else:
+            rows = others = self._neighbor_edges[:0]
+        if self._changes == 0:
+            # The index only has alive edges right after it is built.
+            return rows, others
+        pending = self._pending.get(node)
+        if pending:
+            pending_rows = np.array(pending, dtype=np.int64)
+            sources = self._sources[pending_rows]
+            pending_others = np.where(
+                sources == node, self._targets[pending_rows], sources
+            )
+            rows = np.concatenate((rows, pending_rows))
+            others = np.concatenate((others, pending_others))
+        alive = self._edge_alive[rows]
+        return rows[alive], others[alive]
+
+    def _incoming_rows(self, node: int) -> np.ndarray:
+        """
+        Get the rows of the edges to a node of a directed network.
+        """
+        self._update_index()
+        if node < len(self._in_offsets) - 1:
+            rows = self._in_edges[self._in_offsets[node] : self._in_offsets[node + 1]]
+        else:
+            rows = self._in_edges[:0]
+        if self._changes == 0:
+            return rows
+        pending = self._pending_in.get(node)
+        if pending:
+            rows = np.concatenate((rows, np.array(pending, dtype=np.int64)))
+        return rows[self._edge_alive[rows]]
+
+    def _update_index(self):
+        if self._stale or self._changes > max(1024, self._indexed_edges // 8):
+            self._build_index()
+
+    def _build_index(self):
+        rows = np.flatnonzero(self._edge_alive[: self._num_edges])
+        sources, targets = self._sources[rows], self._targets[rows]
+        if not self.directed:
+            back = sources != targets
+            sources, targets = (
+                np.concatenate((sources, targets[back])),
+                np.concatenate((targets, sources[back])),
+            )
+            rows = np.concatenate((rows, rows[back]))
+        else:
+            in_order = np.lexsort((rows, targets))
+            self._in_offsets = np.zeros(self._num_nodes + 1, dtype=np.int64)
+            np.cumsum(
+                np.bincount(targets, minlength=self._num_nodes),
+                out=self._in_offsets[1:],
+            )
+            self._in_edges = rows[in_order]
+            self._pending_in = {}
+        order = np.lexsort((rows, sources))
+        self._offsets = np.zeros(self._num_nodes + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(sources, minlength=self._num_nodes), out=self._offsets[1:]
+        )
+        self._neighbors = targets[order]
+        self._neighbor_edges = rows[order]
+        self._indexed_edges = self._num_edges
+        self._pending = {}
+        self._changes = 0
+        self._stale = False
+
+    def _find_edge(self, source: int, target: int) -> int:
+        rows, others = self._edge_rows(source)
+        found = rows[others == target]
+        return int(found[-1]) if len(found) > 0 else -1
+
+    def _column(self, name: str, values) -> np.ndarray:
+        """
+        Get the column of an edge property, created or converted to hold ``values``.
+        """
+        dtype = np.asarray(values).dtype
+        if dtype.kind not in "biuf":
+            dtype = np.dtype(object)
+        column = self._edge_columns.get(name)
+        if column is None:
+            column = np.full(len(self._sources), None if dtype == object else 0, dtype)
+            self._edge_has[name] = np.zeros(len(self._sources), dtype=bool)
+        elif column.dtype != object and dtype != object:
+            column = column.astype(np.result_type(column, dtype), copy=False)
+        else:
+            column = column.astype(object, copy=False)
+        self._edge_columns[name] = column
+        return column
+
+    def _add_rows(
+        self, sources: np.ndarray, targets: np.ndarray, properties: Dict[str, Any]
+    ) -> int:
+        """
+        Append edges, and return the row of the first one.
+        """
+        start = self._num_edges
+        end = start + len(sources)
+        self._sources = _grown(self._sources, end)
+        self._targets = _grown(self._targets, end)
+        self._edge_alive = _grown(self._edge_alive, end)
+        capacity = len(self._sources)
+        for name, column in self._edge_columns.items():
+            fill = None if column.dtype == object else 0
+            self._edge_columns[name] = _grown(column, capacity, fill)
+            self._edge_has[name] = _grown(self._edge_has[name], capacity)
+        self._sources[start:end] = sources
+        self._targets[start:end] = targets
+        self._edge_alive[start:end] = True
+        for name, values in properties.items():
+            self._column(name, values)[start:end] = values
+            self._edge_has[name][start:end] = True
+        self._num_edges = end
+        return start
+
+    def _add_edge(self, source: int, target: int, properties: Dict[str, Any]) -> int:
+        existing = self._find_edge(source, target)
+        if existing >= 0:
+            self._remove_row(existing)
+        row = self._add_rows(np.array([source]), np.array([target]), properties)
+        self._pending.setdefault(source, []).append(row)
+        if self.directed:
+            self._pending_in.setdefault(target, []).append(row)
+        elif target != source:
+            self._pending.setdefault(target, []).append(row)
+        self._changes += 1
+        return row
+
+    def _remove_row(self, row: int):
+        self._edge_alive[row] = False
+        self._edge_objects.pop(row, None)
+        self._changes += 1
+
+    def _edge(self, row: int) -> Edge:
+        """
+        Get the ``Edge`` object of a row, created on the first call.
+        """
+        edge = self._edge_objects.get(row)
+        if edge is None:
+            properties = {
+                name: column[row] if column.dtype == object else column[row].item()
+                for name, column in self._edge_columns.items()
+                if self._edge_has[name][row]
+            }
+            (source, target) = self._node_keys(
+                np.array([self._sources[row], self._targets[row]])
+            )
+            edge = self._edge_objects[row] = self.edge_cls(
+                source[0], source[1], target[0], target[1], properties
+            )
+        return edge
+
+    def add_edge(self, source_id: NodeType, target_id: NodeType, edge: Edge):
+        """
+        Add an edge onto the network, replacing the edge between the same nodes.
+
+        :param source_id: A tuple ``<agent_category, agent_id>`` stands for source agent.
+        :param target_id: A tuple ``<agent_category, agent_id>`` stands for target agent.
+        :param edge: An ``Edge`` object, stored as it is.
+        :return: None
+        """
+        row = self._add_edge(
+            self._node(source_id), self._node(target_id), edge.properties
+        )
+        self._edge_objects[row] = edge
+
+    def create_edge(
+        self,
+        agent_1_id: int,
+        category_1: int,
+        agent_2_id: int,
+        category_2: int,
+        **edge_properties,
+    ):
+        """
+        Create a new edge from one agent to another agent, storing its properties
+        in the columns without creating an ``Edge`` object.
+
+        :param agent_1_id: ``id`` of source agent
+        :param category_1: ``category`` of source agent
+        :param agent_2_id: ``id`` of target agent
+        :param category_2: ``category`` of target agent
+        :param edge_properties: keyword arguments for edge properties.
+        :return:
+        """
+        self._add_edge(
+            self._node((category_1, agent_1_id)),
+            self._node((category_2, agent_2_id)),
+            edge_properties,
+        )
+
+    def get_edge(self, source_id: NodeType, target_id: NodeType):
+        """
+        Get an edge from the network, or raise a ``KeyError`` if it does not exist.
+
+        :param source_id: A tuple ``<agent_category, agent_id>`` stands for source agent.
+        :param target_id: A tuple ``<agent_category, agent_id>`` stands for target agent.
+        :return: An ``Edge`` object
+        """
+        row = self._find_edge(self._node(source_id), self._node(target_id))
+        if row < 0:
+            raise KeyError((source_id, target_id))
+        return self._edge(row)
+
+    def remove_edge(self, source_id: NodeType, target_id: NodeType):
+        """
+        Remove an edge from the network, or raise a ``KeyError`` if it does not exist.
+
+        :param source_id: A tuple ``<agent_category, agent_id>`` stands for source agent.
+        :param target_id: A tuple ``<agent_category, agent_id>`` stands for target agent.
+        :return: None
+        """
+        row = self._find_edge(self._node(source_id), self._node(target_id))
+        if row < 0:
+            raise KeyError((source_id, target_id))
+        self._remove_row(row)
+
+    def _get_neighbor_positions(
+        self, agent_id: int, category: int
+    ) -> List[Tuple[int, int]]:
+        _, others = self._edge_rows(self._node((category, agent_id)))
+        return self._node_keys(others)
+
+    def all_agents(self) -> Set[NodeType]:
+        """
+        Get all agents on the network.
+
+        :return: A set of (`Agent category`, `Agent id`)
+        """
+        return self.nodes
+
+    def get_node_edges(self, agent: Agent):
+        """
+        Get the edges from one node.
+
+        :param agent: ``NetworkAgent`` object
+        :return: A list of ``Edge`` object
+        """
+        assert isinstance(agent, NetworkAgent)
+        rows, _ = self._edge_rows(self._node((agent.category, agent.id)))
+        return [self._edge(row) for row in rows.tolist()]
+
+    def _layout_graph(self) -> "nx.DiGraph":
+        """
+        Build the NetworkX graph passed to the layout creator from the edge arrays,
+        including the nodes without edges, so that every node gets a position.
+        """
+        g = nx.DiGraph()
+        alive = np.flatnonzero(self._node_alive[: self._num_nodes])
+        g.add_nodes_from(self._node_keys(alive))
+        rows = np.flatnonzero(self._edge_alive[: self._num_edges])
+        g.add_edges_from(
+            zip(
+                self._node_keys(self._sources[rows]),
+                self._node_keys(self._targets[rows]),
+            )
+        )
+        return g
+
+    def get_position(self, agent_category: int, agent_id: int):
+        """
+        Get the position of agent, updating the layout if the agent has none yet.
+
+        :param agent_category: The category of agent
+        :param agent_id: The id of agent
+        :return: The position, as an array ``[x, y]``.
+        """
+        node = (agent_category, agent_id)
+        if node not in self.layout:
+            # Check the node first, not to update the layout for unknown nodes.
+            self._node(node)
+            self.update_layout()
+        return self.layout[node] * 1000
+
+    def _add_generated_edges(
+        self, nodes: List[NodeType], sources: np.ndarray, targets: np.ndarray
+    ):
+        indices = np.array([self._node(node) for node in nodes], dtype=np.int64)
+        if self._edge_alive[: self._num_edges].any():
+            # Generated edges replace the existing edges between the same nodes.
+            for source, target in zip(sources.tolist(), targets.tolist()):
+                self._add_edge(int(indices[source]), int(indices[target]), {})
+        else:
+            # Repeated pairs are kept once, as add_edge would replace them.
+            if self.directed:
+                keys = sources * len(nodes) + targets
+            else:
+                keys = (
+                    np.minimum(sources, targets) * len(nodes)
+                    + np.maximum(sources, targets)
+                )
+            _, first = np.unique(keys, return_index=True)
+            first.sort()
+            self._add_rows(indices[sources[first]], indices[targets[first]], {})
+            self._stale = True
@@ -0,0 +1,227 @@
+"""
+Random network generators building the edges of large networks with NumPy.
+
+Each generator returns the edges of a simple undirected graph of ``n`` nodes, as
+two arrays ``(sources, targets)`` of node positions, and draws its random numbers
+from a NumPy ``Generator``. ``Network.setup_agent_connections`` uses them for the
+network types in ``GENERATORS``, with the random stream of the model.
+"""
+from typing import Callable, Dict, Sequence, Tuple
+
+import numpy as np
+
+Edges = Tuple[np.ndarray, np.ndarray]
+
+# Below this number of candidate pairs, pairs are drawn one by one.
+_DENSE_PAIRS = 1 << 22
+
+
+def _sample_indices(count: int, p: float, rng: np.random.Generator) -> np.ndarray:
+    """
+    Select each of ``range(count)`` with probability ``p``, in ascending order.
+    """
+    if count <= 0 or p <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if p >= 1:
+        return np.arange(count, dtype=np.int64)
+    if count <= _DENSE_PAIRS:
+        return np.flatnonzero(rng.random(count) < p)
+    # Draw how many are selected, then which ones, as distinct uniform integers.
+    size = rng.binomial(count, p)
+    selected = np.zeros(0, dtype=np.int64)
+    while len(selected) < size:
+        selected = np.concatenate(
+            (selected, rng.integers(0, count, size - len(selected), dtype=np.int64))
+        )
+        selected.sort()
+        selected = selected[np.concatenate(([True], selected[1:] != selected[:-1]))]
+    return selected
+
+
+def _triangle_pairs(indices: np.ndarray) -> Edges:
+    """
+    Convert indices of pairs ``j < i``, numbered ``i * (i - 1) / 2 + j``, to the
+    pairs ``(j, i)``.
+    """
+    i = ((1 + np.sqrt(1 + 8 * indices.astype(float))) // 2).astype(np.int64)
+    # Correct the rounding errors of the square root for large indices.
+    i -= i * (i - 1) // 2 > indices
+    i += (i + 1) * i // 2 <= indices
+    return indices - i * (i - 1) // 2, i
+
+
+def _edge_keys(sources: np.ndarray, targets: np.ndarray, n: int) -> np.ndarray:
+    """
+    Number the undirected edges between ``n`` nodes.
+    """
+    return np.minimum(sources, targets) * n + np.maximum(sources, targets)
+
+
+def _unique_edges(sources: np.ndarray, targets: np.ndarray, n: int) -> Edges:
+    """
+    Drop the self-loops and the repeated edges, keeping the first of each.
+    """
+    _, first = np.unique(_edge_keys(sources, targets, n), return_index=True)
+    first = np.sort(first[sources[first] != targets[first]])
+    return sources[first], targets[first]
+
+
+def erdos_renyi_graph(n: int, p: float, rng: np.random.Generator) -> Edges:
+    """
+    The G(n, p) random graph, where each pair of nodes is linked with probability
+    ``p``. It costs O(n + edges) for sparse graphs.
+    """
+    return _triangle_pairs(_sample_indices(n * (n - 1) // 2, p, rng))
+
+
+def barabasi_albert_graph(n: int, m: int, rng: np.random.Generator) -> Edges:
+    """
+    The Barabási–Albert preferential attachment graph. Like in NetworkX, it starts
+    from a star of ``m + 1`` nodes, and each next node is linked to ``m`` distinct
+    earlier nodes, chosen with probabilities proportional to their degrees.
+
+    Choosing a node proportionally to its degree is choosing a uniform position
+    in the list of the ends of the earlier edges (Batagelj and Brandes, 2005). The
+    positions are drawn for all nodes at once, and resolved by following the ends
+    copied from earlier positions. The choices repeating a node are redrawn.
+    """
+    if m < 1 or m >= n:
+        raise ValueError(f"Barabási–Albert network must have m >= 1 and m < n, m = {m}, n = {n}")
+    num_edges = m + (n - m - 1) * m
+    sources = np.concatenate(
+        (np.zeros(m, dtype=np.int64), np.repeat(np.arange(m + 1, n), m))
+    )
+    # The edges from the new nodes, and the number of ends of the earlier edges.
+    new_edges = np.arange(m, num_edges)
+    num_ends = 2 * (m + (sources[new_edges] - m - 1) * m)
+    choices = np.zeros(num_edges, dtype=np.int64)
+    redrawn = new_edges
+    while True:
+        choices[redrawn] = rng.integers(0, num_ends[redrawn - m])
+        # ``ends[2 * e]`` and ``ends[2 * e + 1]`` are the ends of the edge ``e``.
+        ends = np.empty(2 * num_edges, dtype=np.int64)
+        ends[0::2] = sources
+        ends[1 : 2 * m : 2] = np.arange(1, m + 1)
+        resolved = np.zeros(2 * num_edges, dtype=bool)
+        resolved[0::2] = True
+        resolved[1 : 2 * m : 2] = True
+        positions, copied = 2 * new_edges + 1, choices[new_edges]
+        while len(positions) > 0:
+            done = resolved[copied]
+            ends[positions[done]] = ends[copied[done]]
+            resolved[positions[done]] = True
+            positions = positions[~done]
+            copied = choices[copied[~done] // 2]
+        targets = ends[1::2]
+
+        rows = targets[m:].reshape(-1, m)
+        order = np.argsort(rows, axis=1, kind="stable")
+        sorted_rows = np.take_along_axis(rows, order, axis=1)
+        repeated = np.zeros(rows.shape, dtype=bool)
+        repeated[:, 1:] = sorted_rows[:, 1:] == sorted_rows[:, :-1]
+        if not repeated.any():
+            return sources, targets
+        row_indices, columns = np.nonzero(repeated)
+        redrawn = m + row_indices * m + order[row_indices, columns]
+
+
+def watts_strogatz_graph(n: int, k: int, p: float, rng: np.random.Generator) -> Edges:
+    """
+    The Watts–Strogatz small-world graph. Like in NetworkX, each node is linked to
+    its ``k // 2`` nearest neighbors on each side of a ring, then the far end of
+    each edge is moved to a random node with probability ``p``, avoiding
+    self-loops and repeated edges.
+    """
+    if k > n:
+        raise ValueError("k > n, choose smaller k or larger n")
+    if k == n:
+        return erdos_renyi_graph(n, 1, rng)
+    half = k // 2
+    sources = np.tile(np.arange(n, dtype=np.int64), half)
+    targets = (sources + np.repeat(np.arange(1, half + 1), n)) % n
+    if 2 * half >= n - 1:
+        # The nodes are linked to all the others already.
+        return sources, targets
+    rewired = np.flatnonzero(rng.random(len(sources)) < p)
+    kept = np.ones(len(sources), dtype=bool)
+    kept[rewired] = False
+    kept_keys = np.sort(_edge_keys(sources[kept], targets[kept], n))
+    while len(rewired) > 0:
+        rewired_sources = sources[rewired]
+        new_targets = rng.integers(0, n, len(rewired))
+        keys = _edge_keys(rewired_sources, new_targets, n)
+        found = np.minimum(np.searchsorted(kept_keys, keys), len(kept_keys) - 1)
+        valid = (
+            (new_targets != rewired_sources)
+            & (new_targets != targets[rewired])
+            & (kept_keys[found] != keys)
+        )
+        _, first = np.unique(keys[valid], return_index=True)
+        accepted = np.flatnonzero(valid)[first]
+        targets[rewired[accepted]] = new_targets[accepted]
+        kept_keys = np.sort(np.concatenate((kept_keys, keys[accepted])))
+        accepted_mask = np.zeros(len(rewired), dtype=bool)
+        accepted_mask[accepted] = True
+        rewired = rewired[~accepted_mask]
+    return sources, targets
+
+
+def configuration_model(
+    n: int, deg_sequence: Sequence[int], rng: np.random.Generator
+) -> Edges:
+    """
+    The configuration model, pairing the stubs of the nodes at random, where node
+    ``i`` has ``deg_sequence[i]`` stubs. Unlike NetworkX, the self-loops and the
+    repeated edges are dropped, so nodes may end up with lower degrees.
+    """
+    degrees = np.asarray(deg_sequence, dtype=np.int64)
+    if len(degrees) != n:
+        raise ValueError(
+            f"The degree sequence should have one degree per node, {n}, but has {len(degrees)}"
+        )
+    if (degrees < 0).any():
+        raise ValueError("Invalid degree sequence: degrees must be non-negative")
+    if degrees.sum() % 2 != 0:
+        raise ValueError("Invalid degree sequence: sum of degrees must be even")
+    stubs = rng.permutation(np.repeat(np.arange(n), degrees))
+    return _unique_edges(stubs[0::2], stubs[1::2], n)
+
+
+def stochastic_block_model(
+    n: int,
+    sizes: Sequence[int],
+    p: Sequence[Sequence[float]],
+    rng: np.random.Generator,
+) -> Edges:
+    """
+    The stochastic block model. Nodes are split into consecutive blocks of
+    ``sizes`` nodes, and two nodes of the blocks ``a`` and ``b`` are linked with
+    probability ``p[a][b]``, which should be symmetric.
+    """
+    sizes = [int(size) for size in sizes]
+    if sum(sizes) != n:
+        raise ValueError(f"The sizes of the blocks should add up to {n}, but got {sizes}")
+    p = np.asarray(p, dtype=float)
+    if p.shape != (len(sizes), len(sizes)) or not np.allclose(p, p.T):
+        raise ValueError("'p' must be a symmetric matrix with one row per block")
+    offsets = np.concatenate(([0], np.cumsum(sizes)))
+    all_sources, all_targets = [], []
+    for a, size_a in enumerate(sizes):
+        pairs = _sample_indices(size_a * (size_a - 1) // 2, p[a, a], rng)
+        sources, targets = _triangle_pairs(pairs)
+        all_sources.append(sources + offsets[a])
+        all_targets.append(targets + offsets[a])
+        for b in range(a + 1, len(sizes)):
+            pairs = _sample_indices(size_a * sizes[b], p[a, b], rng)
+            all_sources.append(pairs // sizes[b] + offsets[a])
+            all_targets.append(pairs % sizes[b] + offsets[b])
+    return np.concatenate(all_sources), np.concatenate(all_targets)
+
+
+GENERATORS: Dict[str, Callable[..., Edges]] = {
+    "erdos_renyi_graph": erdos_renyi_graph,
+    "barabasi_albert_graph": barabasi_albert_graph,
+    "watts_strogatz_graph": watts_strogatz_graph,
+    "configuration_model": configuration_model,
+    "stochastic_block_model": stochastic_block_model,
+}
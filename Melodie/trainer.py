@@ -19,7 +19,7 @@ from typing import (
 import pandas as pd
 
 from MelodieInfra import Config, MelodieExceptions
-from MelodieInfra.core import Agent, AgentList
+from MelodieInfra.core import Agent, AgentList, AgentPool
 from MelodieInfra.parallel.parallel_manager import ParallelManager, ThreadParallelManager
 from MelodieInfra.utils.utils import underline_to_camel
 
@@ -212,6 +212,8 @@ class GATrainerAlgorithm:
         self._current_generation = 0
         self.processors = processors
         self.parallel_mode = parallel_mode
+        # Agent pools of thread workers, by core id.
+        self._agent_pools: Dict[int, AgentPool] = {}
 
         if self.parallel_mode == "process":
             d = {
@@ -270,6 +272,7 @@ class GATrainerAlgorithm:
         scenario._setup(scenario_json)
 
         model = trainer.model_cls(trainer.config, scenario)
+        model._use_agent_pool(self._agent_pools.setdefault(core_id, AgentPool()))
         model.create()
         model._setup()
 
@@ -295,6 +298,7 @@ class GATrainerAlgorithm:
 
         env: Environment = model.environment
         env_data = env.to_dict(trainer.environment_properties)
+        model._release_agents()
 
         t1 = time.time()
         thread_logger.info(
@@ -471,9 +471,7 @@ class Visualizer(BaseVisualizer):
             if len(agent_list) == 0:
                 continue
             first_agent = agent_list[0]
-            attributes = ["id", "x", "y", "category"] + list(
-                first_agent.__dict__.keys()
-            )
+            attributes = ["id", "x", "y", "category"] + first_agent._property_names()
             # attributes.remove("grid")
             for agent in agent_list:
                 agents_vis_dicts.append(
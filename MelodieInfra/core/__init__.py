@@ -1,5 +1,17 @@
 from .agent import *
 from .agent_list import AgentList, BaseAgentContainer
+from .agent_pool import AgentPool
 from .api import set_seed
+from .continuous_space import ContinuousAgent, ContinuousSpace
 from .environment import *
+from .event_calendar import Event, EventCalendar
 from .grid import *
+from .grid_paths import DistanceField
+from .rng import RandomStream
+from .scheduler import (
+    RandomActivation,
+    Scheduler,
+    SequentialActivation,
+    SparseActivation,
+    StagedActivation,
+)
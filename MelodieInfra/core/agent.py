@@ -1,7 +1,11 @@
-from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 
 class Element:
+    # Names of properties whose values are not stored in the instance ``__dict__``,
+    # for example properties kept in the columns of a columnar ``AgentList``.
+    _external_props_: Tuple[str, ...] = ()
+
     def set_params(self, params: Dict[str, Any]):
         """
         :param params:
@@ -12,7 +16,7 @@ class Element:
             # assert (
             #     paramName in self.__dict__.keys()
             # ), f"param named {paramName}, value {paramValue} not in Agent.params:{self.__dict__.keys()}"
-            if paramName in self.__dict__.keys():
+            if paramName in self.__dict__ or paramName in self._external_props_:
                 setattr(self, paramName, paramValue)
 
     def to_dict(self, properties: List[str] = None) -> Dict:
@@ -22,10 +26,10 @@ class Element:
         :param properties:
         """
         if properties is None:
-            properties = self.__dict__.keys()
+            properties = self._property_names()
         d = {}
         for property in properties:
-            d[property] = self.__dict__[property]
+            d[property] = getattr(self, property)
         return d
 
     def to_json(self, properties: List[str] = None) -> Dict:
@@ -35,17 +39,29 @@ class Element:
         :param properties:
         """
         if properties is None:
-            properties = self.__dict__.keys()
+            properties = self._property_names()
         d = {}
         for property in properties:
             if property in self._unserializable_props_:
                 continue
-            d[property] = self.__dict__[property]
+            d[property] = getattr(self, property)
         return d
 
+    def _property_names(self) -> List[str]:
+        """
+        Names of all properties, including those stored outside ``__dict__``.
+        """
+        return list(self.__dict__.keys()) + [
+            name
+            for name in self._external_props_
+            if name not in self.__dict__ and hasattr(self, name)
+        ]
+
 
 class Agent(Element):
     _unserializable_props_ = ("model", "scenario")
+    # Properties tracked by every ``AgentList`` of this class, see ``AgentList.track``.
+    _tracked_props_: Tuple[str, ...] = ()
 
     def __init__(self, agent_id: int):
         super().__init__()
@@ -79,12 +95,42 @@ class Agent(Element):
         """
         pass
 
+    def reset(self):
+        """
+        Reinitialize an agent reused from a previous model run.
+
+        If ``Model.agent_pooling`` is turned on, Calibrator and Trainer workers keep
+        agent objects between the runs of a worker. A reused agent already has its
+        new ``id``, ``scenario`` and ``model`` when this method is called, and it is
+        called instead of ``setup()``.
+
+        By default, all attributes are dropped, including those stored in
+        ``__slots__`` by compact agent lists, and the agent is initialized again
+        with ``__init__`` and ``setup()``, just like a new agent, so pooling only
+        saves the allocation of the agent objects. Override this method to make
+        pooling worthwhile, by only resetting the properties changed during a run.
+        An override must also drop what refers to the previous run, such as other
+        agents, spots or caches, as these would otherwise be kept alive.
+
+        :return: None
+        """
+        agent_id, scenario, model = self.id, self.scenario, self.model
+        self.__dict__.clear()
+        for cls in type(self).__mro__:
+            slots = cls.__dict__.get("__slots__", ())
+            for name in (slots,) if isinstance(slots, str) else slots:
+                if name not in ("__dict__", "__weakref__") and hasattr(self, name):
+                    delattr(self, name)
+        self.__init__(agent_id)
+        self.scenario = scenario
+        self.model = model
+        self.setup()
+
     def __repr__(self) -> str:
         d = {}
-        for item in self.__dict__.items():
-            k, v = item
+        for k in self._property_names():
             if not k.startswith("_"):
-                d[k] = v
+                d[k] = getattr(self, k)
         # d = {k: v for k, v in self.__dict__.items() if
         #      not k.startswith("_")}
         return "<%s %s>" % (self.__class__.__name__, d)
@@ -0,0 +1,118 @@
+from typing import TYPE_CHECKING, Any, Dict, List, Type
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .agent_list import AgentList
+
+
+class AgentColumns:
+    """
+    Contiguous NumPy arrays storing numeric agent properties, one array per
+    property and one row per agent.
+
+    Row ``i`` of every array belongs to the agent at position ``i`` in the
+    owning ``AgentList``. The arrays are over-allocated, so only the first
+    ``len(agent_list)`` rows are meaningful.
+    """
+
+    def __init__(self, dtypes: Dict[str, Any], capacity: int = 16):
+        """
+        :param dtypes: A dict mapping property names to NumPy-compatible dtypes,
+            such as ``{"health_state": int, "wealth": float}``.
+        :param capacity: Initial number of rows to allocate.
+        """
+        self.dtypes: Dict[str, np.dtype] = {
+            name: np.dtype(dtype) for name, dtype in dtypes.items()
+        }
+        self.capacity = max(capacity, 1)
+        self.arrays: Dict[str, np.ndarray] = {
+            name: np.zeros(self.capacity, dtype=dtype)
+            for name, dtype in self.dtypes.items()
+        }
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.dtypes.keys())
+
+    def reserve(self, size: int):
+        """
+        Make sure there are at least ``size`` rows allocated. The capacity grows
+        geometrically, so appending rows one by one costs amortized O(1).
+
+        :param size: Number of rows required.
+        :return: None
+        """
+        if size <= self.capacity:
+            return
+        new_capacity = max(size, self.capacity * 2)
+        for name, array in self.arrays.items():
+            new_array = np.zeros(new_capacity, dtype=array.dtype)
+            new_array[: self.capacity] = array
+            self.arrays[name] = new_array
+        self.capacity = new_capacity
+
+    def view(self, name: str, size: int) -> np.ndarray:
+        """
+        Get a zero-copy view of the first ``size`` rows of a column.
+        """
+        return self.arrays[name][:size]
+
+    def take(self, rows: List[int]):
+        """
+        Rearrange the first ``len(rows)`` rows, so that new row ``i`` is the old
+        row ``rows[i]``. Used to reorder rows and to drop rows of removed agents.
+        """
+        size = len(rows)
+        for array in self.arrays.values():
+            array[:size] = array[rows]
+
+    def row_values(self, row: int) -> Dict[str, Any]:
+        """
+        Get the values of one row as a dict of python scalars.
+        """
+        return {name: array.item(row) for name, array in self.arrays.items()}
+
+
+class ColumnProperty:
+    """
+    Data descriptor redirecting an agent attribute to a row of an
+    ``AgentColumns`` array.
+    """
+
+    def __init__(self, name: str, agent_list: "AgentList"):
+        self.name = name
+        self.agent_list = agent_list
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        agent_list = self.agent_list
+        return agent_list._columns.arrays[self.name].item(
+            agent_list.indices[instance.id]
+        )
+
+    def __set__(self, instance, value):
+        agent_list = self.agent_list
+        agent_list._columns.arrays[self.name][agent_list.indices[instance.id]] = value
+
+
+def create_columnar_agent_class(
+    agent_class: Type, agent_list: "AgentList", names: List[str]
+) -> Type:
+    """
+    Derive a subclass of ``agent_class`` whose properties in ``names`` are read
+    from and written to the columns of ``agent_list``.
+
+    The subclass keeps the name of ``agent_class``, and its instances are still
+    instances of ``agent_class``.
+    """
+    namespace: Dict[str, Any] = {
+        name: ColumnProperty(name, agent_list) for name in names
+    }
+    namespace["__module__"] = agent_class.__module__
+    namespace["__qualname__"] = agent_class.__qualname__
+    namespace["_external_props_"] = tuple(agent_class._external_props_) + tuple(
+        name for name in names if name not in agent_class._external_props_
+    )
+    return type(agent_class.__name__, (agent_class,), namespace)
@@ -1,6 +1,6 @@
 # import random
 import logging
-import random
+from itertools import repeat
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -8,40 +8,36 @@ from typing import (
     ClassVar,
     Dict,
     Generic,
+    Iterable,
     List,
+    Optional,
     Set,
+    Tuple,
     Type,
     TypeVar,
     Union,
 )
 
+import numpy as np
 import pandas as pd
 
 from ..exceptions import MelodieExceptions, show_prettified_warning
 from ..table import TABLE_TYPE, TableInterface
 from .agent import Agent
+from .agent_columns import AgentColumns, create_columnar_agent_class
+from .agent_pool import AgentPool
+from .agent_slots import create_compact_agent_class
+from .agent_tracking import (
+    ObservedProperty,
+    PropertyIndex,
+    PropertyStats,
+    observe_property,
+)
+from .api import default_random_stream
 
 AgentGeneric = TypeVar("AgentGeneric")
 logger = logging.getLogger("purepython-agent-list")
 
-
-class SeqIter:
-    """
-    The iterator to deal with for-loops in AgentList or other agent containers
-    """
-
-    def __init__(self, seq):
-        self._seq = seq
-        self._i = 0
-
-    def __next__(self):
-        if self._i >= len(self._seq):
-            raise StopIteration
-        next_item = self._seq[self._i]
-        self._i += 1
-        return next_item
-
-
 class BaseAgentContainer(Generic[AgentGeneric]):
     """
     The base class that contains agents
@@ -78,25 +74,144 @@ class BaseAgentContainer(Generic[AgentGeneric]):
 
 
 class AgentList(BaseAgentContainer, Generic[AgentGeneric]):
-    def __init__(self, agent_class: "Type[AgentGeneric]", model: "Model") -> None:
+    """
+    A list of agents, supporting lookup by id.
+
+    Agents are kept in the order they were added (``set_properties`` sorts them by
+    id). Removing an agent costs O(1): its slot is emptied, and the list is
+    compacted lazily in one O(N) pass when it is iterated or accessed by position
+    (``agents[i]``, ``random_sample``, ``column``...) next time. So removing ``k``
+    agents within a step costs O(k + N) instead of O(k * N).
+
+    Compaction never reorders agents, and ``get_agent`` stays O(1) all the time.
+
+    A loop over the list iterates the underlying Python list directly, and visits
+    the agents that were in the list when the loop started: the first addition or
+    removal inside the loop copies the list (one O(N) copy per loop), so agents
+    added meanwhile are not visited, and agents removed meanwhile are still
+    visited if the loop had not reached them. Schedulers (see ``Scheduler``) skip
+    the agents removed during a step. Every other access sees the changes at once.
+    """
+
+    def __init__(
+        self,
+        agent_class: "Type[AgentGeneric]",
+        model: "Model",
+        columns: Dict[str, Any] = None,
+        compact: bool = False,
+    ) -> None:
+        """
+        :param agent_class: The class of agents in this list.
+        :param model: The model this list belongs to.
+        :param columns: Optional. A dict mapping numeric property names to their
+            dtypes, such as ``{"health_state": int}``. If provided, the list runs
+            in columnar mode: these properties are stored in contiguous NumPy
+            arrays instead of on each agent object, and can be accessed as a whole
+            with :meth:`column`. Agents still read and write them as ordinary
+            attributes, e.g. ``agent.health_state``.
+        :param compact: Optional, default False. If True, agents are created from a
+            subclass of ``agent_class`` that stores the attributes declared in
+            ``__init__`` and ``setup()`` in ``__slots__`` instead of an instance
+            ``__dict__``, which saves memory for large populations. Agent objects
+            passed to :meth:`add` are copied into such compact agents.
+        """
         super().__init__()
         self.scenario = model.scenario
         self.agent_class: "Type[AgentGeneric]" = agent_class
         self.model = model
         self.indices = {}
         self.agents: List[AgentGeneric] = []
+        # Number of empty slots (``None``) in ``self.agents`` left by removed agents.
+        self._tombstones = 0
+        # If ``self.agents`` may be iterated by a running loop, in which case it is
+        # copied before being modified.
+        self._shared = False
+        # Staged additions and removals, applied by ``commit()``.
+        self._staged_additions: List[Tuple[Union["AgentGeneric", None], Dict]] = []
+        self._staged_removals: Dict[int, "AgentGeneric"] = {}
+        self._columns: Union[AgentColumns, None] = None
+        # Class of agent objects, without the descriptors redirecting column
+        # properties to ``self._columns``.
+        self._object_class: "Type[AgentGeneric]" = (
+            create_compact_agent_class(agent_class) if compact else agent_class
+        )
+        # Class used to create agents in this list.
+        self._instance_class: "Type[AgentGeneric]" = self._object_class
+        if columns is not None:
+            self._columns = AgentColumns(columns)
+            self._instance_class = create_columnar_agent_class(
+                self._object_class, self, self._columns.names
+            )
+        # Properties whose assignments are observed, and the indexes and running
+        # aggregates built on them.
+        self._observed_properties: Dict[str, ObservedProperty] = {}
+        self._indexes: Dict[str, PropertyIndex] = {}
+        self._stats: Dict[str, PropertyStats] = {}
+        for prop_name in getattr(agent_class, "_tracked_props_", ()):
+            self.track(prop_name)
 
     def __repr__(self):
-        return f"<AgentList {self.agents}>"
+        return f"<AgentList {[agent for agent in self.agents if agent is not None]}>"
 
     def __len__(self):
-        return len(self.agents)
+        return len(self.agents) - self._tombstones
 
     def __getitem__(self, item) -> AgentGeneric:
-        return self.agents.__getitem__(item)
+        return self._live_agents().__getitem__(item)
 
     def __iter__(self):
-        return SeqIter(self.agents)
+        self._compact()
+        self._shared = True
+        return iter(self.agents)
+
+    def _iter_positions(self, positions: Iterable[int]):
+        """
+        Iterate over the agents at ``positions`` in the list, as it was when the
+        iteration started, skipping the agents removed meanwhile.
+        """
+        agents = self._live_agents()
+        self._shared = True
+        indices = self.indices
+        for i in positions:
+            agent = agents[i]
+            if agent.id in indices:
+                yield agent
+
+    def _live_agents(self) -> List["AgentGeneric"]:
+        """
+        Get the agents in the list, compacted.
+        """
+        self._compact()
+        return self.agents
+
+    def _own_agents(self) -> List["AgentGeneric"]:
+        """
+        Get ``self.agents`` to modify it, copied first if a loop may be iterating it.
+        """
+        if self._shared:
+            self.agents = self.agents.copy()
+            self._shared = False
+        return self.agents
+
+    def _compact(self):
+        """
+        Drop the empty slots left by removed agents, keeping the order of the
+        remaining agents. Indices are only rebuilt from the first empty slot on.
+
+        The compacted agents are a new list, so running loops are not affected.
+        """
+        if self._tombstones == 0:
+            return
+        agents = self.agents
+        first_empty = agents.index(None)
+        kept_rows = [i for i, agent in enumerate(agents) if agent is not None]
+        self.agents = [agents[i] for i in kept_rows]
+        self._shared = False
+        if self._columns is not None:
+            self._columns.take(kept_rows)
+        for i in range(first_empty, len(self.agents)):
+            self._set_index(self.agents[i].id, i)
+        self._tombstones = 0
 
     def setup_agents(self, agents_num: int, params_df: TABLE_TYPE = None):
         """
@@ -110,7 +225,12 @@ class AgentList(BaseAgentContainer, Generic[AgentGeneric]):
         :return: None
         """
         self.initial_agent_num = agents_num
+        for observed in self._observed_properties.values():
+            for observer in observed.observers:
+                observer.clear()
         self.agents = self.init_agents()
+        self._tombstones = 0
+        self._shared = False
         for i, agent in enumerate(self.agents):
             self._set_index(agent.id, i)
         if params_df is not None:
@@ -140,59 +260,210 @@ class AgentList(BaseAgentContainer, Generic[AgentGeneric]):
     def init_agents(self) -> List[AgentGeneric]:
         """
         Initialize all agents in the container, and call the `setup()` method
+
+        If the model has an agent pool (see ``Model.agent_pooling``), agents left
+        by a previous run are reused and reinitialized by their ``reset()`` method
+        instead.
+
         :return:
         """
-        agents: List["AgentGeneric"] = [
-            self.agent_class(self.new_id()) for i in range(self.initial_agent_num)
-        ]
         scenario = self.model.scenario
-        for agent in agents:
+        agent_pool: Union[AgentPool, None] = getattr(self.model, "agent_pool", None)
+        pooled_agents: List["AgentGeneric"] = []
+        if agent_pool is not None:
+            pooled_agents = agent_pool.take(self._object_class, self.initial_agent_num)
+            for agent in pooled_agents:
+                agent.id = self.new_id()
+                agent.scenario = scenario
+                agent.model = self.model
+                agent.reset()
+        # Agents are created as ``_object_class``, and adopted once indexed, so the
+        # properties assigned in ``__init__`` (e.g. ``x`` and ``y`` of grid agents)
+        # are moved to the columns, and observed properties are reported once.
+        agents: List["AgentGeneric"] = pooled_agents + [
+            self._object_class(self.new_id())
+            for i in range(self.initial_agent_num - len(pooled_agents))
+        ]
+        if self._columns is not None:
+            # Column properties are located through the index, so it must be ready
+            # before `setup()` assigns them.
+            self._columns.reserve(len(agents))
+            for i, agent in enumerate(agents):
+                self._set_index(agent.id, i)
+        for i, agent in enumerate(pooled_agents):
+            self._adopt(agent, i)
+        for i in range(len(pooled_agents), len(agents)):
+            agent = agents[i]
+            self._adopt(agent, i)
             agent.scenario = scenario
             agent.model = self.model
             agent.setup()
         return agents
 
+    def _adopt(self, agent: "AgentGeneric", row: int):
+        """
+        Move an agent of ``_object_class``, whose properties are already
+        initialized, into this list at position ``row``.
+        """
+        if self._instance_class is self._object_class:
+            return
+        values = {}
+        if self._columns is not None:
+            for name in self._columns.names:
+                if hasattr(agent, name):
+                    values[name] = getattr(agent, name)
+                agent.__dict__.pop(name, None)
+        agent.__class__ = self._instance_class
+        for name, value in values.items():
+            self._columns.arrays[name][row] = value
+        self._observe(agent)
+
+    def _release_to_pool(self, agent_pool: AgentPool):
+        """
+        Empty this list at the end of a model run, and keep its agents in
+        ``agent_pool`` for the next run.
+        """
+        agents = self._live_agents()
+        if self._instance_class is not self._object_class:
+            for agent in agents:
+                self._detach(agent, self.indices[agent.id])
+        agent_pool.put(self._object_class, agents)
+        self.agents = []
+        self._shared = False
+        self.indices = {}
+        for observed in self._observed_properties.values():
+            for observer in observed.observers:
+                observer.clear()
+
     def random_sample(self, sample_num: int) -> List["AgentGeneric"]:
         """
-        Randomly sample `sample_num` agents from the container
+        Randomly sample `sample_num` agents from the container, drawing from the
+        random stream of the model (``Model.rng``).
+
         :param sample_num:
         :return:
         """
-        return random.sample(self.agents, sample_num)
+        rng = getattr(self.model, "rng", None) or default_random_stream()
+        return rng.sample(self._live_agents(), sample_num)
 
     def _set_properties(self, props_table: TABLE_TYPE):
         """
         Set parameters of all agents in current scenario from a pandas dataframe.
 
+        The rows of the current scenario are selected with a vectorized mask, and the
+        values are assigned column by column, so the property names are validated once
+        per column instead of once per cell.
+
         :return: None
         """
         table = TableInterface(props_table)
 
-        param_names = [param for param in table.columns if param not in {"id_scenario"}]
-
         if "id_scenario" in table.columns:
-            params_table = table.filter(
-                lambda row: row["id_scenario"] == self.scenario.id
-            )
+            params_table = table.filter_equal("id_scenario", self.scenario.id)
         else:
-            params_table = table  # deep copy this dataframe.
-        if "id" in param_names:
-            row: Dict[str, Any]
-            for i, row in enumerate(params_table.iter_dicts()):
-                params = {k: row[k] for k in param_names}
-                agent = self.get_agent(params["id"])
+            params_table = table
+        param_names = [
+            param for param in params_table.columns if param not in {"id_scenario", "id"}
+        ]
+        if "id" in params_table.columns:
+            agents = []
+            for agent_id in params_table.column_values("id"):
+                agent = self.get_agent(agent_id)
                 if agent is None:
                     agent = self.add()
-                agent.set_params(params)
+                    self._reassign_id(agent, agent_id)
+                agents.append(agent)
         else:
-            row: Dict[str, Any]
-            # params_table.df.data("out.csv")
             assert len(self) == len(params_table), (len(self), len(params_table))
+            agents = self._live_agents()
+        rows = None
+        if self._columns is not None:
+            rows = [self.indices[agent.id] for agent in agents]
+        for param_name in param_names:
+            self._assign_column(
+                agents, param_name, params_table.column_values(param_name), rows
+            )
+
+    def _assign_column(
+        self,
+        agents: List["AgentGeneric"],
+        prop_name: str,
+        values: List[Any],
+        rows: List[int] = None,
+    ):
+        """
+        Assign ``values[i]`` to property ``prop_name`` of ``agents[i]``.
 
-            for i, row in enumerate(params_table.iter_dicts()):
-                params = {k: row[k] for k in param_names}
-                agent = self.agents[i]
-                agent.set_params(params)
+        Like ``Element.set_params``, a property not declared on the agents is
+        ignored.
+
+        :param rows: For columnar lists, the column rows of ``agents``.
+        """
+        if len(agents) == 0:
+            return
+        sample_agent = agents[0]
+        if (
+            prop_name not in sample_agent.__dict__
+            and prop_name not in sample_agent._external_props_
+        ):
+            return
+        column = self._column_array(prop_name)
+        if column is not None:
+            column[rows] = values
+        else:
+            for agent, value in zip(agents, values):
+                setattr(agent, prop_name, value)
+
+    def _column_array(self, prop_name: str) -> Optional[np.ndarray]:
+        """
+        Get the array backing a column property, which can be written into
+        directly, or None if the property is not a column or is observed.
+        """
+        if (
+            self._columns is not None
+            and prop_name in self._columns.dtypes
+            and prop_name not in self._observed_properties
+        ):
+            return self._columns.arrays[prop_name]
+        return None
+
+    def _assign_positions(self, agent_ids: np.ndarray, xs: np.ndarray, ys: np.ndarray):
+        """
+        Assign ``xs[i]`` and ``ys[i]`` to ``x`` and ``y`` of the agent with id
+        ``agent_ids[i]``, in a vectorized way if ``x`` and ``y`` are columns. Ids
+        not in this list are ignored.
+        """
+        self._compact()
+        rows = np.fromiter(
+            map(self.indices.get, agent_ids.tolist(), repeat(-1)),
+            dtype=np.int64,
+            count=len(agent_ids),
+        )
+        if (rows == -1).any():
+            kept = rows != -1
+            rows, xs, ys = rows[kept], xs[kept], ys[kept]
+        x_column = self._column_array("x")
+        y_column = self._column_array("y")
+        if x_column is not None and y_column is not None:
+            x_column[rows] = xs
+            y_column[rows] = ys
+            return
+        agents = self.agents
+        for row, x, y in zip(rows.tolist(), xs.tolist(), ys.tolist()):
+            agent = agents[row]
+            agent.x = x
+            agent.y = y
+
+    def _reassign_id(self, agent: "AgentGeneric", agent_id: int):
+        """
+        Change the id of an agent in this list, keeping the index consistent.
+        """
+        self._unobserve(agent)
+        index = self.indices.pop(agent.id)
+        agent.id = agent_id
+        self._set_index(agent_id, index)
+        self._observe(agent)
+        self._id_offset = max(self._id_offset, agent_id)
 
     def filter(self, condition: Callable[[AgentGeneric], bool]):
         """
@@ -201,7 +472,7 @@ class AgentList(BaseAgentContainer, Generic[AgentGeneric]):
         :return: a list of filtered agents
         """
         filtered_agents = []
-        for agent in self.agents:
+        for agent in self:
             if condition(agent):
                 filtered_agents.append(agent)
         return filtered_agents
@@ -226,25 +497,166 @@ class AgentList(BaseAgentContainer, Generic[AgentGeneric]):
         new_id = self.new_id()
         if agent is not None:
             assert isinstance(agent, Agent)
+            if self._object_class is not self.agent_class and not isinstance(
+                agent, self._object_class
+            ):
+                agent = self._copy_to_compact_agent(agent)
         else:
-            agent = self.agent_class(new_id)
+            # Created as ``_object_class`` and attached once indexed, like in
+            # ``init_agents``, so ``__init__`` may assign column properties.
+            agent = self._object_class(new_id)
 
-        agent.scenario = self.model.scenario
-        agent.model = self.model
-        agent.setup()
         if params is not None:
             assert isinstance(params, dict)
             if params.get("id") is not None:
                 show_prettified_warning(
                     f"Warning, agent 'id'  {agent.id} passed in 'params' will be **overridden** by a new id {new_id} auto generated by {self.__class__.__name__}."
                 )
-            agent.set_params(params)
+                params = {k: v for k, v in params.items() if k != "id"}
         agent.id = new_id
-        self.agents.append(agent)
-
+        self._own_agents().append(agent)
         self._set_index(agent.id, len(self.agents) - 1)
+        if self._instance_class is not self._object_class:
+            self._attach(agent)
+
+        agent.scenario = self.model.scenario
+        agent.model = self.model
+        agent.setup()
+        if params is not None:
+            agent.set_params(params)
         return agent
 
+    def add_many(
+        self, agents_num: int, params_table: TABLE_TYPE = None
+    ) -> List["AgentGeneric"]:
+        """
+        Add a cohort of new agents at once.
+
+        Ids are allocated as one block, the index is extended once, and the
+        properties in ``params_table`` are assigned column by column. Compared with
+        calling :meth:`add` for each agent, no per-agent parameter dict or warning
+        check is needed.
+
+        :param agents_num: The number of agents to create.
+        :param params_table: Optional. A table with ``agents_num`` rows, whose row
+            ``i`` contains the properties of the ``i``-th new agent. An ``id``
+            column is ignored, as ids are generated by this list.
+        :return: The list of new agents.
+        """
+        first_id = self._id_offset + 1
+        self._id_offset += agents_num
+        first_row = len(self.agents)
+        # Created as ``_object_class`` and adopted once indexed, like in
+        # ``init_agents``, so ``__init__`` may assign column properties.
+        agents: List["AgentGeneric"] = [
+            self._object_class(agent_id)
+            for agent_id in range(first_id, first_id + agents_num)
+        ]
+        self._own_agents().extend(agents)
+        self.indices.update(
+            zip(range(first_id, first_id + agents_num), range(first_row, len(self.agents)))
+        )
+        if self._columns is not None:
+            self._columns.reserve(len(self.agents))
+        for row, agent in enumerate(agents, first_row):
+            self._adopt(agent, row)
+        scenario = self.model.scenario
+        for agent in agents:
+            agent.scenario = scenario
+            agent.model = self.model
+            agent.setup()
+
+        if params_table is not None:
+            table = TableInterface(params_table)
+            assert len(table) == agents_num, (len(table), agents_num)
+            rows = None
+            if self._columns is not None:
+                rows = list(range(first_row, len(self.agents)))
+            for param_name in table.columns:
+                if param_name in {"id", "id_scenario"}:
+                    continue
+                self._assign_column(
+                    agents, param_name, table.column_values(param_name), rows
+                )
+        return agents
+
+    def _copy_to_compact_agent(self, agent: "AgentGeneric") -> "AgentGeneric":
+        """
+        Copy an agent object created outside of this compact list into a compact
+        agent.
+        """
+        compact_agent = self._object_class(agent.id)
+        for name in agent._property_names():
+            setattr(compact_agent, name, getattr(agent, name))
+        return compact_agent
+
+    def _attach(self, agent: "AgentGeneric"):
+        """
+        Let the agent added last to this list read its column properties from
+        the columns, and report its observed properties.
+        """
+        row = len(self.agents) - 1
+        if self._columns is not None:
+            self._columns.reserve(len(self.agents))
+        if agent.__class__ is self._instance_class:
+            self._observe(agent)
+        else:
+            self._adopt(agent, row)
+
+    def _detach(self, agent: "AgentGeneric", index: int):
+        """
+        Turn a removed agent back into an ordinary object of ``_object_class``.
+        Its column properties are copied onto the agent object, so it remains
+        readable after leaving this columnar list.
+        """
+        values = {} if self._columns is None else self._columns.row_values(index)
+        agent.__class__ = self._object_class
+        for name, value in values.items():
+            setattr(agent, name, value)
+
+    def _observe(self, agent: "AgentGeneric"):
+        """
+        Report the current values of observed properties of ``agent``.
+
+        Column properties hold a value as soon as the agent is indexed, so agents
+        of columnar lists are reported before ``setup()`` assigns them.
+        """
+        for observed in self._observed_properties.values():
+            observed.insert(agent)
+
+    def _unobserve(self, agent: "AgentGeneric"):
+        """
+        Withdraw the current values of observed properties of ``agent``.
+        """
+        for observed in self._observed_properties.values():
+            observed.discard(agent)
+
+    def _observe_property(self, prop_name: str) -> ObservedProperty:
+        """
+        Make assignments to ``prop_name`` observable on the agents of this list.
+
+        Agents are then created from a subclass of ``_object_class`` owned by this
+        list, so the agent class itself is never modified.
+        """
+        if prop_name in self._observed_properties:
+            return self._observed_properties[prop_name]
+        if self._instance_class is self._object_class:
+            object_class = self._object_class
+            self._instance_class = type(
+                object_class.__name__,
+                (object_class,),
+                {
+                    "__module__": object_class.__module__,
+                    "__qualname__": object_class.__qualname__,
+                },
+            )
+            for agent in self.agents:
+                if agent is not None:
+                    agent.__class__ = self._instance_class
+        observed = observe_property(self._instance_class, prop_name)
+        self._observed_properties[prop_name] = observed
+        return observed
+
     def set_properties(self, props_df: TABLE_TYPE):
         """
         Extract properties from a dataframe, and Each row in the dataframe represents the property of an agent.
@@ -252,7 +664,7 @@ class AgentList(BaseAgentContainer, Generic[AgentGeneric]):
         :return:
         """
         self._set_properties(props_df)
-        self.agents.sort(key=lambda agent: agent.id)
+        self._sort_by_id()
 
     def to_list(self, column_names: List[str]) -> List[Dict]:
         """
@@ -262,17 +674,18 @@ class AgentList(BaseAgentContainer, Generic[AgentGeneric]):
         :return:
         """
 
+        agents = self._live_agents()
         data_list = []
-        if len(self.agents) == 0:
+        if len(agents) == 0:
             raise MelodieExceptions.Agents.AgentListEmpty(self)
 
-        agent0 = self.agents[0]
+        agent0 = agents[0]
         for column_name in column_names:
             if not hasattr(agent0, column_name):
                 raise MelodieExceptions.Agents.AgentPropertyNameNotExist(
                     column_name, agent0
                 )
-        for agent in self.agents:
+        for agent in agents:
             d = {k: getattr(agent, k) for k in column_names}
             d["id"] = agent.id
             data_list.append(d)
@@ -341,7 +754,23 @@ class AgentList(BaseAgentContainer, Generic[AgentGeneric]):
         :return:
         """
         self._set_properties(props_df)
-        self.agents.sort(key=lambda agent: agent.id)
+        self._sort_by_id()
+
+    def _sort_by_id(self):
+        """
+        Sort agents by id, keeping indices and columns aligned with the new order.
+        """
+        self._compact()
+        agents = self.agents
+        order = sorted(range(len(agents)), key=lambda i: agents[i].id)
+        if all(i == position for position, i in enumerate(order)):
+            return
+        self.agents = [agents[i] for i in order]
+        self._shared = False
+        if self._columns is not None:
+            self._columns.take(order)
+        for i, agent in enumerate(self.agents):
+            self._set_index(agent.id, i)
 
     def get_agent(self, agent_id):
         """
@@ -365,37 +794,278 @@ class AgentList(BaseAgentContainer, Generic[AgentGeneric]):
         :param args: Arguments of a method, a ``tuple``
         :return: None
         """
-        for agent in self.agents:
+        for agent in self:
             getattr(agent, method_name)(*args)
             # method(agent, *args)
 
-    def vectorize(self, prop_name):
+    def vectorize(self, prop_name) -> np.ndarray:
         """
-        NotImplemented yet.
-
         Generate an numpy array from this list, where the values come from the property defined by ``prop_name`` on each agent.
 
+        The array is a copy, so modifying it does not affect the agents. For column
+        properties of a columnar list, use :meth:`column` to get a zero-copy view.
+
         :param prop_name: Property name
         :return: An 1-D Numpy array
         """
-        if len(self.agents) == 0:
-            return
-        raise NotImplementedError
+        if self._columns is not None and prop_name in self._columns.dtypes:
+            return self.column(prop_name).copy()
+        return np.array([getattr(agent, prop_name) for agent in self])
+
+    def column(self, prop_name: str) -> np.ndarray:
+        """
+        Get the values of a column property for all agents, as a zero-copy view.
+
+        Only available when the list was created with ``columns``. Element ``i``
+        belongs to ``self[i]``, and writing into the array changes the agent
+        property directly, which makes vectorized updates possible:
+
+        .. code-block:: python
+
+            health_state = agents.column("health_state")
+            num_infected = np.count_nonzero(health_state == 1)
+            health_state[health_state == 1] = 2
+
+        The view is invalidated once agents are added, so get it again after
+        adding agents.
+
+        :param prop_name: Name of a property declared in ``columns``.
+        :return: An 1-D Numpy array.
+        """
+        if self._columns is None or prop_name not in self._columns.dtypes:
+            raise MelodieExceptions.Agents.AgentPropertyNotColumnar(prop_name, self)
+        self._compact()
+        return self._columns.view(prop_name, len(self.agents))
+
+    def create_index(self, prop_name: str):
+        """
+        Create an index on property ``prop_name``, which maps each value to the
+        agents holding it, so that :meth:`where` and :meth:`count_by` need not scan
+        the whole list.
+
+        The index is updated whenever the property of an agent is assigned, and
+        when agents are added or removed. Property values must be hashable.
+
+        .. code-block:: python
+
+            agents.create_index("health_state")
+            infected = agents.where(health_state=1)
+            counts = agents.count_by("health_state")  # e.g. {0: 950, 1: 50}
+
+        Writes into arrays returned by :meth:`column` bypass the index. After such
+        writes, call this method again to rebuild the index.
+
+        :param prop_name: Name of the property to index.
+        :return: None
+        """
+        index = self._indexes.get(prop_name)
+        if index is None:
+            index = PropertyIndex(prop_name)
+            self._observe_property(prop_name).observers.append(index)
+            self._indexes[prop_name] = index
+        index.clear()
+        for agent in self.agents:
+            if agent is not None and hasattr(agent, prop_name):
+                index.insert(agent.id, getattr(agent, prop_name))
+
+    def track(self, prop_name: str):
+        """
+        Track property ``prop_name``, maintaining running aggregates over the
+        agents in this list. They are updated whenever the property of an agent is
+        assigned, and when agents are added or removed, so :meth:`stats` needs no
+        scan over the list.
+
+        Properties can also be tracked for every list of an agent class, by
+        declaring them on the class:
+
+        .. code-block:: python
+
+            class CovidAgent(Agent):
+                _tracked_props_ = ("health_state",)
+
+        Writes into arrays returned by :meth:`column` bypass the aggregates. After
+        such writes, call this method again to recompute them.
+
+        :param prop_name: Name of the property to track.
+        :return: None
+        """
+        stats = self._stats.get(prop_name)
+        if stats is None:
+            stats = PropertyStats(prop_name)
+            self._observe_property(prop_name).observers.append(stats)
+            self._stats[prop_name] = stats
+        stats.clear()
+        for agent in self.agents:
+            if agent is not None and hasattr(agent, prop_name):
+                stats.insert(agent.id, getattr(agent, prop_name))
+
+    def stats(self, prop_name: str) -> PropertyStats:
+        """
+        Get the aggregates of property ``prop_name`` over the agents in this list:
+        ``counts`` (a dict mapping each value to the number of agents holding it),
+        ``count``, ``sum``, ``mean``, ``min`` and ``max``.
+
+        .. code-block:: python
+
+            health_state = agents.stats("health_state")
+            num_infected = health_state.counts.get(1, 0)
+
+        For a property tracked with :meth:`track`, this costs O(1), and the
+        returned object keeps up to date as agents change. Otherwise, the
+        aggregates are computed by scanning the list once.
+
+        :param prop_name: Name of the property.
+        :return: A ``PropertyStats`` object, whose attributes should not be
+            modified.
+        """
+        stats = self._stats.get(prop_name)
+        if stats is None:
+            stats = PropertyStats(prop_name)
+            for agent in self:
+                stats.insert(agent.id, getattr(agent, prop_name))
+        return stats
+
+    def where(self, **conditions) -> List["AgentGeneric"]:
+        """
+        Get the agents whose properties equal the given values, in the order of
+        this list, e.g. ``agents.where(health_state=1, age_group=2)``.
+
+        Indexed properties (see :meth:`create_index`) are looked up in the index,
+        so the cost is proportional to the size of the smallest matching bucket.
+        Other conditions are checked on these candidates only. Without any indexed
+        property, the whole list is scanned like :meth:`filter`.
+
+        :return: A list of agents.
+        """
+        indexed = [name for name in conditions if name in self._indexes]
+        if len(indexed) == 0:
+            return self.filter(
+                lambda agent: all(
+                    getattr(agent, name) == value for name, value in conditions.items()
+                )
+            )
+        buckets = sorted(
+            (self._indexes[name].ids(conditions[name]) for name in indexed), key=len
+        )
+        others = [
+            (name, value) for name, value in conditions.items() if name not in indexed
+        ]
+        indices = self.indices
+        rows = sorted(
+            indices[agent_id]
+            for agent_id in buckets[0]
+            if all(agent_id in bucket for bucket in buckets[1:])
+        )
+        agents = [self.agents[row] for row in rows]
+        if others:
+            agents = [
+                agent
+                for agent in agents
+                if all(getattr(agent, name) == value for name, value in others)
+            ]
+        return agents
+
+    def count_by(self, prop_name: str) -> Dict[Any, int]:
+        """
+        Count agents by the values of property ``prop_name``.
+
+        For an indexed property, this costs O(number of distinct values) instead of
+        a scan over all agents.
+
+        :return: A dict mapping each value to the number of agents holding it.
+        """
+        index = self._indexes.get(prop_name)
+        if index is not None:
+            return index.counts()
+        counts: Dict[Any, int] = {}
+        for agent in self:
+            value = getattr(agent, prop_name)
+            counts[value] = counts.get(value, 0) + 1
+        return counts
 
     def remove(self, agent):
         """
-        Remove an agent from the AgentList
+        Remove an agent from the AgentList in amortized O(1) time.
+
+        The slot of the agent is emptied, and the list is compacted lazily. See
+        :class:`AgentList` for details.
 
         :param agent:
         :return:
         """
-        # print(deref(self.indices))
-        index = self._get_index(agent.id)
+        if self._observed_properties:
+            self._unobserve(agent)
+        index = self.indices.pop(agent.id)
+        if self._instance_class is not self._object_class:
+            self._detach(agent, index)
+        self._own_agents()[index] = None
+        self._tombstones += 1
+
+    def defer_add(self, agent: "AgentGeneric" = None, params: Dict = None):
+        """
+        Stage an agent to be added by the next :meth:`commit`.
+
+        The list is not changed until then, so this is safe inside a loop over the
+        list. Inside ``for t in model.iterator(...)``, staged changes are committed
+        automatically at the end of each period.
+
+        :param agent: Optional, same as in :meth:`add`.
+        :param params: Optional, same as in :meth:`add`.
+        :return: None
+        """
+        self._staged_additions.append((agent, params))
+        self._register_staged_changes()
+
+    def defer_remove(self, agent: "AgentGeneric"):
+        """
+        Stage an agent to be removed by the next :meth:`commit`.
 
-        self.agents.pop(index)
+        The agent stays in the list, and is still visited by loops, until then.
+        Staging the same agent twice removes it only once.
 
-        for i, a in enumerate(self.agents):
-            self._set_index(a.id, i)
+        :param agent: The agent to remove.
+        :return: None
+        """
+        self._staged_removals[agent.id] = agent
+        self._register_staged_changes()
+
+    def commit(self) -> List["AgentGeneric"]:
+        """
+        Apply the changes staged by :meth:`defer_add` and :meth:`defer_remove`.
+
+        Removals are applied first, as one cohort, and then the new agents are added
+        in the order they were staged.
+
+        :return: The list of added agents.
+        """
+        removals, self._staged_removals = self._staged_removals, {}
+        additions, self._staged_additions = self._staged_additions, []
+        self.remove_many(
+            agent for agent in removals.values() if agent.id in self.indices
+        )
+        return [self._add(agent, params) for agent, params in additions]
+
+    def _register_staged_changes(self):
+        staged_agent_lists = getattr(self.model, "_staged_agent_lists", None)
+        if staged_agent_lists is not None and self not in staged_agent_lists:
+            staged_agent_lists.append(self)
+
+    def remove_many(self, agents_or_ids: "Iterable[Union[AgentGeneric, int]]"):
+        """
+        Remove a cohort of agents at once.
+
+        Each removal costs O(1), and the list is compacted only once afterwards,
+        so removing ``k`` agents costs O(k + N).
+
+        :param agents_or_ids: Agent objects or agent ids to remove.
+        :return: None
+        """
+        for item in agents_or_ids:
+            agent = item if isinstance(item, Agent) else self.get_agent(item)
+            if agent is None:
+                raise KeyError(f"Agent with id {item} is not in {self}")
+            self.remove(agent)
+        self._compact()
 
     # def type_check(self, param_names: List[str], agent_params_df: pd.DataFrame):
     #     """
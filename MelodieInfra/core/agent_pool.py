@@ -0,0 +1,36 @@
+from typing import Dict, List, Type
+
+from .agent import Agent
+
+
+class AgentPool:
+    """
+    Agent objects kept between model runs in the same worker, so that later runs
+    can reuse them instead of creating new agents.
+
+    A pool must not be shared by models running at the same time, e.g. in
+    different threads.
+    """
+
+    def __init__(self):
+        self._agents: Dict[Type[Agent], List[Agent]] = {}
+
+    def __len__(self):
+        return sum(len(agents) for agents in self._agents.values())
+
+    def put(self, agent_class: Type[Agent], agents: List[Agent]):
+        """
+        Keep agents of exactly ``agent_class`` for reuse.
+        """
+        self._agents.setdefault(agent_class, []).extend(agents)
+
+    def take(self, agent_class: Type[Agent], num: int) -> List[Agent]:
+        """
+        Take at most ``num`` agents of ``agent_class`` out of the pool.
+        """
+        pooled = self._agents.get(agent_class)
+        if not pooled:
+            return []
+        taken = pooled[max(len(pooled) - num, 0) :]
+        del pooled[max(len(pooled) - num, 0) :]
+        return taken
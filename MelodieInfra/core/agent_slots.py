@@ -0,0 +1,49 @@
+from functools import lru_cache
+from typing import List, Type
+
+
+def declared_attributes(agent_class: Type) -> List[str]:
+    """
+    Get the names of attributes declared in ``__init__`` and ``setup()`` of
+    ``agent_class`` and its bases.
+
+    The source code is parsed if it is available. Otherwise, a probe agent is
+    created and set up, and the attributes it holds are taken.
+    """
+    from ..lowcode.astmani.model_static_inspector import scan_assigned_attributes
+
+    names = scan_assigned_attributes(agent_class)
+    if names is None:
+        probe = agent_class(0)
+        probe.setup()
+        names = list(probe.__dict__.keys())
+    return names
+
+
+@lru_cache(maxsize=None)
+def create_compact_agent_class(agent_class: Type) -> Type:
+    """
+    Derive a subclass of ``agent_class`` storing the declared attributes in
+    ``__slots__``, so that agents do not need an instance ``__dict__``.
+
+    Attributes that are not declared in ``__init__`` or ``setup()`` can still be
+    assigned, and fall back to a ``__dict__`` created on demand. Names that are
+    already defined on ``agent_class``, such as properties or class-level default
+    values, are left untouched.
+
+    The subclass is created once per agent class, keeps the name of
+    ``agent_class``, and its instances are still instances of ``agent_class``.
+    """
+    slots = tuple(
+        name
+        for name in declared_attributes(agent_class)
+        if not hasattr(agent_class, name)
+    )
+    namespace = {
+        "__slots__": slots,
+        "__module__": agent_class.__module__,
+        "__qualname__": agent_class.__qualname__,
+        "_external_props_": tuple(agent_class._external_props_)
+        + tuple(name for name in slots if name not in agent_class._external_props_),
+    }
+    return type(agent_class.__name__, (agent_class,), namespace)
@@ -0,0 +1,246 @@
+from typing import Any, Dict, List, Set, Type
+
+_MISSING = object()
+
+
+class PropertyObserver:
+    """
+    Base class of objects notified when a property of the agents in an
+    ``AgentList`` is assigned.
+    """
+
+    def __init__(self, prop_name: str):
+        self.prop_name = prop_name
+
+    def clear(self):
+        """
+        Forget all agents.
+        """
+        raise NotImplementedError
+
+    def insert(self, agent_id: int, value: Any):
+        """
+        An agent with property value ``value`` joins.
+        """
+        raise NotImplementedError
+
+    def discard(self, agent_id: int, value: Any):
+        """
+        An agent with property value ``value`` leaves.
+        """
+        raise NotImplementedError
+
+    def update(self, agent_id: int, old_value: Any, new_value: Any):
+        """
+        The property of an agent is changed from ``old_value`` to ``new_value``.
+        ``old_value`` is ``_MISSING`` if the property was not assigned before.
+        """
+        if old_value is not _MISSING:
+            self.discard(agent_id, old_value)
+        self.insert(agent_id, new_value)
+
+
+class PropertyIndex(PropertyObserver):
+    """
+    A secondary index mapping each value of a property to the ids of the agents
+    holding this value. Property values must be hashable.
+    """
+
+    def __init__(self, prop_name: str):
+        super().__init__(prop_name)
+        self.buckets: Dict[Any, Set[int]] = {}
+
+    def clear(self):
+        self.buckets = {}
+
+    def insert(self, agent_id: int, value: Any):
+        bucket = self.buckets.get(value)
+        if bucket is None:
+            self.buckets[value] = {agent_id}
+        else:
+            bucket.add(agent_id)
+
+    def discard(self, agent_id: int, value: Any):
+        bucket = self.buckets.get(value)
+        if bucket is not None:
+            bucket.discard(agent_id)
+            if len(bucket) == 0:
+                del self.buckets[value]
+
+    def ids(self, value: Any) -> Set[int]:
+        """
+        Get the ids of agents whose property equals ``value``.
+        """
+        return self.buckets.get(value, set())
+
+    def counts(self) -> Dict[Any, int]:
+        """
+        Get the number of agents holding each value.
+        """
+        return {value: len(bucket) for value, bucket in self.buckets.items()}
+
+
+class PropertyStats(PropertyObserver):
+    """
+    Running aggregates of a property over the agents of an ``AgentList``: the
+    number of agents holding each value, the sum, the minimum and the maximum.
+
+    Each assignment updates the aggregates in O(1). Reading ``min`` or ``max``
+    is O(1) as well, unless the agents holding the extreme value all left, in
+    which case it is recomputed once from the distinct values.
+    """
+
+    def __init__(self, prop_name: str):
+        super().__init__(prop_name)
+        self.counts: Dict[Any, int] = {}
+        self.count = 0
+        self.sum: Any = 0
+        self._min: Any = _MISSING
+        self._max: Any = _MISSING
+
+    def clear(self):
+        self.counts = {}
+        self.count = 0
+        self.sum = 0
+        self._min = self._max = _MISSING
+
+    def insert(self, agent_id: int, value: Any):
+        counts = self.counts
+        counts[value] = counts.get(value, 0) + 1
+        self.count += 1
+        if self.sum is not None:
+            try:
+                self.sum += value
+            except TypeError:
+                # Not summable, e.g. strings.
+                self.sum = None
+        if self._min is not _MISSING and value < self._min:
+            self._min = value
+        if self._max is not _MISSING and value > self._max:
+            self._max = value
+
+    def discard(self, agent_id: int, value: Any):
+        counts = self.counts
+        remaining = counts[value] - 1
+        if remaining == 0:
+            del counts[value]
+            if value == self._min:
+                self._min = _MISSING
+            if value == self._max:
+                self._max = _MISSING
+        else:
+            counts[value] = remaining
+        self.count -= 1
+        if self.sum is not None:
+            self.sum -= value
+
+    @property
+    def min(self) -> Any:
+        """
+        The minimum value, or None if there are no agents.
+        """
+        if self._min is _MISSING and self.counts:
+            self._min = min(self.counts)
+        return None if self._min is _MISSING else self._min
+
+    @property
+    def max(self) -> Any:
+        """
+        The maximum value, or None if there are no agents.
+        """
+        if self._max is _MISSING and self.counts:
+            self._max = max(self.counts)
+        return None if self._max is _MISSING else self._max
+
+    @property
+    def mean(self) -> Any:
+        """
+        The mean value, or None if there are no agents or values are not summable.
+        """
+        if self.count == 0 or self.sum is None:
+            return None
+        return self.sum / self.count
+
+
+class ObservedProperty:
+    """
+    Data descriptor notifying observers when an agent property is assigned.
+
+    The value itself is stored by the descriptor that was defined for this name on
+    the agent class before (e.g. a slot or a column), or in the instance
+    ``__dict__`` otherwise. In the latter case, ``default`` is returned for agents
+    that never assigned the property, like a class attribute would be.
+    """
+
+    def __init__(self, name: str, inner: Any = None, default: Any = _MISSING):
+        self.name = name
+        self.inner = inner
+        self.default = default
+        self.observers: List[PropertyObserver] = []
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        if self.inner is not None:
+            return self.inner.__get__(instance, owner)
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            if self.default is _MISSING:
+                raise AttributeError(self.name)
+            return self.default
+
+    def __set__(self, instance, value):
+        old_value = self.get_value(instance)
+        if self.inner is not None:
+            self.inner.__set__(instance, value)
+        else:
+            instance.__dict__[self.name] = value
+        agent_id = instance.id
+        for observer in self.observers:
+            observer.update(agent_id, old_value, value)
+
+    def get_value(self, instance) -> Any:
+        """
+        Get the property value of ``instance``, or ``_MISSING`` if not assigned.
+        """
+        try:
+            return self.__get__(instance, type(instance))
+        except (AttributeError, KeyError):
+            return _MISSING
+
+    def insert(self, instance):
+        """
+        Notify the observers that ``instance`` joins with its current value.
+        """
+        value = self.get_value(instance)
+        if value is not _MISSING:
+            for observer in self.observers:
+                observer.insert(instance.id, value)
+
+    def discard(self, instance):
+        """
+        Notify the observers that ``instance`` leaves with its current value.
+        """
+        value = self.get_value(instance)
+        if value is not _MISSING:
+            for observer in self.observers:
+                observer.discard(instance.id, value)
+
+
+def observe_property(agent_class: Type, name: str) -> ObservedProperty:
+    """
+    Install an ``ObservedProperty`` for ``name`` on ``agent_class``, or get the one
+    already installed.
+    """
+    current = agent_class.__dict__.get(name)
+    if isinstance(current, ObservedProperty):
+        return current
+    inner = getattr(agent_class, name, _MISSING)
+    if hasattr(type(inner), "__set__"):
+        observed = ObservedProperty(name, inner)
+    else:
+        observed = ObservedProperty(name, default=inner)
+    setattr(agent_class, name, observed)
+    return observed
+
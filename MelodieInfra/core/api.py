@@ -2,6 +2,17 @@ import random as random_module
 from functools import lru_cache
 from math import floor
 from random import randint
+from typing import Optional
+
+import numpy as np
+
+from .rng import RandomStream, stream_key
+
+# The seed set by ``set_seed``, from which the random streams of model runs are
+# derived, and the number of times it was set.
+_seed: Optional[int] = None
+_seed_epoch = 0
+_default_stream: Optional[RandomStream] = None
 
 
 def iterable(a):
@@ -12,16 +23,43 @@ def new(a):
     return a
 
 
-def _random():
-    return random_module.random()
-
-
 def set_seed(seed: int):
+    """
+    Seed the global ``random`` and ``np.random`` states, and the random streams of
+    models (``Model.rng``). Each model run then draws from its own stream, derived
+    from ``seed``, the scenario id and the run id, so runs are reproducible even
+    when they run in parallel.
+    """
+    global _seed, _seed_epoch, _default_stream
     random_module.seed(seed)
-    try:
-        import numpy as np
-
-        np.random.seed(seed)
-    except ImportError:
-        pass
+    np.random.seed(seed)
+    _seed = seed
+    _seed_epoch += 1
+    _default_stream = None
     # srand(seed)
+
+
+def seed_epoch() -> int:
+    """
+    Get the number of times ``set_seed`` was called, so that random streams
+    created before can be renewed.
+    """
+    return _seed_epoch
+
+
+def run_seed_sequence(*keys) -> np.random.SeedSequence:
+    """
+    Get the seed sequence of the random stream identified by ``keys``, e.g. the
+    scenario id and the run id. If no seed was set, fresh entropy is used.
+    """
+    return np.random.SeedSequence(_seed, spawn_key=tuple(stream_key(key) for key in keys))
+
+
+def default_random_stream() -> RandomStream:
+    """
+    Get the random stream used by components that do not belong to a model.
+    """
+    global _default_stream
+    if _default_stream is None:
+        _default_stream = RandomStream(run_seed_sequence())
+    return _default_stream
@@ -0,0 +1,583 @@
+import math
+from typing import TYPE_CHECKING, Dict, List, Literal, Set, Tuple, Union
+
+import numpy as np
+
+from ..exceptions import MelodieExceptions
+from .agent import Agent
+
+if TYPE_CHECKING:
+    from .agent_list import AgentList
+
+
+class ContinuousAgent(Agent):
+    """
+    Base class of the agents placed in a :class:`ContinuousSpace`, at float
+    coordinates ``(x, y)``.
+    """
+
+    _unserializable_props_ = ("model", "scenario", "space")
+
+    def __init__(self, agent_id: int, x: float = 0.0, y: float = 0.0, space=None):
+        super().__init__(agent_id)
+        self.space = space
+        self.x = x
+        self.y = y
+        self.category = -1
+        self.set_category()
+        assert self.category >= 0, "Category should be larger or equal to 0"
+
+    def set_category(self):
+        """
+        Set the category of the agent, which tells the type of agents apart in the
+        space. Be sure to inherit this method in custom ``ContinuousAgent``.
+
+        :return: None
+        """
+        raise NotImplementedError("Category should be set for ContinuousAgent")
+
+
+class _CategoryPositions:
+    """
+    The positions of the agents of one category, in arrays indexed by slot, and
+    the spatial hash mapping each cell to the ids of the agents in it.
+
+    A removed agent is replaced by the agent of the last slot, so the slots stay
+    dense.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self.ids = np.zeros(16, dtype=np.int64)
+        self.xs = np.zeros(16)
+        self.ys = np.zeros(16)
+        self.cells = np.zeros(16, dtype=np.int64)
+        self.slots: Dict[int, int] = {}
+        self.cell_agents: Dict[int, Set[int]] = {}
+        # Incremented on each change, to know when to rebuild the KD-tree.
+        self.version = 0
+        self.tree = None
+        self.tree_version = -1
+
+    def reserve(self, num: int):
+        capacity = len(self.ids)
+        if self.size + num <= capacity:
+            return
+        capacity = max(2 * capacity, self.size + num)
+        for name in ["ids", "xs", "ys", "cells"]:
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[: self.size] = old[: self.size]
+            setattr(self, name, new)
+
+
+class ContinuousSpace:
+    """
+    A rectangular space where agents stand at float coordinates, with efficient
+    "all agents within a radius" queries.
+
+    By default, the space is divided into square cells, and the ids of the agents
+    in each cell are kept up to date as agents move, so a query only visits the
+    cells overlapping its radius. For agents that rarely move, a SciPy ``cKDTree``
+    can be used instead, rebuilt at the first query after agents moved.
+
+    .. code-block:: python
+
+        self.space = self.create_continuous_space()
+        self.space.setup_params(100.0, 100.0, cell_size=5.0)
+        self.space.setup_agent_locations(self.agents)
+        ...
+        for neighbor in self.space.neighbors_of(agent, radius=5.0):
+            ...
+    """
+
+    def __init__(self, scenario=None):
+        self._width = -1.0
+        self._height = -1.0
+        self._torus = True
+        self._index = "hash"
+        # The number of cells along x and y, and their size.
+        self._num_cells_x = 1
+        self._num_cells_y = 1
+        self._cell_width = 1.0
+        self._cell_height = 1.0
+        self._positions: Dict[int, _CategoryPositions] = {}
+        self._agent_containers: Dict[int, "AgentList"] = {}
+        self.scenario = scenario
+        # The model this space belongs to.
+        self.model = None
+
+    def setup_params(
+        self,
+        width: float,
+        height: float,
+        torus=True,
+        cell_size: float = 1.0,
+        index: Literal["hash", "kdtree"] = "hash",
+    ):
+        """
+        Setup the parameters of the space.
+
+        :param width: The width of the space, where ``0 <= x < width``.
+        :param height: The height of the space, where ``0 <= y < height``.
+        :param torus: A boolean (default True). If True, an agent moving out of the
+            space on one side re-enters from the opposite side, and distances are
+            measured across the borders. Otherwise, positions beyond the borders
+            raise an ``IndexError``.
+        :param cell_size: The size of the cells of the spatial hash, about the
+            radius of the usual queries. It is adjusted so the cells tile the space.
+        :param index: ``"hash"`` (default) keeps the spatial hash up to date as
+            agents move, which suits agents moving every step. ``"kdtree"`` builds a
+            SciPy ``cKDTree`` per category at the first query after agents moved,
+            which suits agents that rarely move.
+        :return: None
+        """
+        if index not in ("hash", "kdtree"):
+            raise MelodieExceptions.Program.Variable.VariableNotInSet(
+                "index", index, {"hash", "kdtree"}
+            )
+        if cell_size <= 0:
+            raise MelodieExceptions.Program.Variable.VariableInvalid(
+                "cell_size", cell_size, "a positive number"
+            )
+        self._width = float(width)
+        self._height = float(height)
+        self._torus = torus
+        self._index = index
+        self._num_cells_x = max(1, int(self._width // cell_size))
+        self._num_cells_y = max(1, int(self._height // cell_size))
+        self._cell_width = self._width / self._num_cells_x
+        self._cell_height = self._height / self._num_cells_y
+        self._positions = {}
+
+    def setup(self):
+        """
+        Be sure to inherit this function.
+
+        :return: None
+        """
+        pass
+
+    def _setup(self):
+        self.setup()
+
+    def width(self) -> float:
+        return self._width
+
+    def height(self) -> float:
+        return self._height
+
+    def add_category(self, category):
+        """
+        Add an agent category.
+
+        :param category: The category of the agents.
+        :return: None
+        """
+        self._positions[category] = _CategoryPositions()
+
+    def _get_positions(self, category) -> _CategoryPositions:
+        positions = self._positions.get(category)
+        if positions is None:
+            raise KeyError(f"Category {category} is not on the space!")
+        return positions
+
+    @property
+    def agent_categories(self):
+        return set(self._positions.keys())
+
+    def get_agent_container(self, category) -> "AgentList":
+        ret = self._agent_containers.get(category)
+        assert ret is not None, f"Agent List for category id {category} is not registered!"
+        return ret
+
+    def _wrap(self, x: float, y: float) -> Tuple[float, float]:
+        """
+        Wrap a position on a torus, or check that it is in the space.
+        """
+        if self._torus:
+            x %= self._width
+            y %= self._height
+            # ``-1e-20 % width`` rounds to ``width``.
+            return (x if x < self._width else 0.0), (y if y < self._height else 0.0)
+        if not (0 <= x < self._width and 0 <= y < self._height):
+            raise IndexError(f"Position {(x, y)} is out of the space")
+        return x, y
+
+    def _wrap_many(self, xs: np.ndarray, ys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Wrap positions on a torus, or check that they are in the space.
+        """
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        if self._torus:
+            xs = xs % self._width
+            ys = ys % self._height
+            xs[xs >= self._width] = 0.0
+            ys[ys >= self._height] = 0.0
+        elif not (
+            ((0 <= xs) & (xs < self._width)).all()
+            and ((0 <= ys) & (ys < self._height)).all()
+        ):
+            raise IndexError("space position was out of range")
+        return xs, ys
+
+    def _cell(self, x: float, y: float) -> int:
+        cx = min(int(x / self._cell_width), self._num_cells_x - 1)
+        cy = min(int(y / self._cell_height), self._num_cells_y - 1)
+        return cx * self._num_cells_y + cy
+
+    def _cells(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        cxs = np.minimum((xs / self._cell_width).astype(np.int64), self._num_cells_x - 1)
+        cys = np.minimum((ys / self._cell_height).astype(np.int64), self._num_cells_y - 1)
+        return cxs * self._num_cells_y + cys
+
+    def add_agent(self, agent: ContinuousAgent):
+        """
+        Add an agent to the space, at ``(agent.x, agent.y)``.
+
+        :param agent: A ``ContinuousAgent`` object.
+        :return: None
+        """
+        if not isinstance(agent, ContinuousAgent):
+            raise TypeError(
+                f"Parameter `agent` should be of type {ContinuousAgent.__name__} "
+            )
+        agent.space = self
+        agent.x, agent.y = self._add_agent(agent.id, agent.category, agent.x, agent.y)
+
+    def _add_agent(self, agent_id: int, category, x: float, y: float) -> Tuple[float, float]:
+        x, y = self._wrap(x, y)
+        if category not in self._positions:
+            self.add_category(category)
+        positions = self._positions[category]
+        if agent_id in positions.slots:
+            raise ValueError(f"Agent with id: {agent_id} already exists on space!")
+        positions.reserve(1)
+        slot = positions.size
+        positions.ids[slot] = agent_id
+        positions.xs[slot] = x
+        positions.ys[slot] = y
+        positions.slots[agent_id] = slot
+        positions.size += 1
+        positions.version += 1
+        if self._index == "hash":
+            cell = positions.cells[slot] = self._cell(x, y)
+            cell_agents = positions.cell_agents.get(cell)
+            if cell_agents is None:
+                cell_agents = positions.cell_agents[cell] = set()
+            cell_agents.add(agent_id)
+        return x, y
+
+    def remove_agent(self, agent: ContinuousAgent):
+        """
+        Remove an agent from the space.
+
+        :param agent: A ``ContinuousAgent`` object.
+        :return: None
+        """
+        self._remove_agent(agent.id, agent.category)
+
+    def _remove_agent(self, agent_id: int, category):
+        positions = self._get_positions(category)
+        slot = positions.slots.pop(agent_id, None)
+        if slot is None:
+            raise ValueError(f"Agent with id: {agent_id} does not exist on space!")
+        if self._index == "hash":
+            positions.cell_agents[int(positions.cells[slot])].discard(agent_id)
+        last = positions.size - 1
+        if slot != last:
+            last_id = int(positions.ids[last])
+            for array in (positions.ids, positions.xs, positions.ys, positions.cells):
+                array[slot] = array[last]
+            positions.slots[last_id] = slot
+        positions.size -= 1
+        positions.version += 1
+
+    def move_agent(self, agent: ContinuousAgent, target_x: float, target_y: float):
+        """
+        Move an agent to ``(target_x, target_y)``, wrapped on a torus.
+
+        :return: None
+        """
+        positions = self._get_positions(agent.category)
+        slot = positions.slots.get(agent.id)
+        if slot is None:
+            raise ValueError(f"Agent with id: {agent.id} does not exist on space!")
+        x, y = self._wrap(target_x, target_y)
+        positions.xs[slot] = x
+        positions.ys[slot] = y
+        positions.version += 1
+        if self._index == "hash":
+            cell = self._cell(x, y)
+            old_cell = int(positions.cells[slot])
+            if cell != old_cell:
+                positions.cell_agents[old_cell].discard(agent.id)
+                cell_agents = positions.cell_agents.get(cell)
+                if cell_agents is None:
+                    cell_agents = positions.cell_agents[cell] = set()
+                cell_agents.add(agent.id)
+                positions.cells[slot] = cell
+        agent.x, agent.y = x, y
+
+    def get_agent_pos(self, agent_id: int, category) -> Tuple[float, float]:
+        """
+        Get the position of an agent.
+
+        :return: A tuple ``(x, y)``.
+        """
+        positions = self._get_positions(category)
+        slot = positions.slots[agent_id]
+        return positions.xs.item(slot), positions.ys.item(slot)
+
+    def agent_positions(self, category) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get the positions of all agents of a category, as arrays.
+
+        :param category: The category of the agents.
+        :return: A tuple ``(agent_ids, xs, ys)`` of NumPy arrays, sorted by agent
+            id.
+        """
+        positions = self._get_positions(category)
+        size = positions.size
+        order = np.argsort(positions.ids[:size], kind="stable")
+        return positions.ids[order], positions.xs[order], positions.ys[order]
+
+    def move_agents(self, category, agent_ids, xs, ys):
+        """
+        Move several agents of a category at once, e.g. after computing their new
+        positions in a vectorized way.
+
+        The ``x`` and ``y`` of the agents are updated if their agent list was
+        registered with :meth:`setup_agent_locations`, in a vectorized way if ``x``
+        and ``y`` are columns of the list.
+
+        :param category: The category of the agents.
+        :param agent_ids: The ids of the agents, as an array or a list.
+        :param xs: The x coordinates of the targets.
+        :param ys: The y coordinates of the targets.
+        :return: None
+        """
+        agent_ids = np.asarray(agent_ids, dtype=np.int64)
+        xs, ys = self._wrap_many(xs, ys)
+        positions = self._get_positions(category)
+        try:
+            slots = np.fromiter(
+                map(positions.slots.__getitem__, agent_ids.tolist()),
+                dtype=np.int64,
+                count=len(agent_ids),
+            )
+        except KeyError as e:
+            raise ValueError(f"Agent with id: {e.args[0]} does not exist on space!")
+        positions.xs[slots] = xs
+        positions.ys[slots] = ys
+        positions.version += 1
+        if self._index == "hash":
+            cells = self._cells(xs, ys)
+            old_cells = positions.cells[slots]
+            changed = np.flatnonzero(cells != old_cells)
+            cell_agents = positions.cell_agents
+            for agent_id, old_cell, cell in zip(
+                agent_ids[changed].tolist(),
+                old_cells[changed].tolist(),
+                cells[changed].tolist(),
+            ):
+                cell_agents[old_cell].discard(agent_id)
+                agents_in_cell = cell_agents.get(cell)
+                if agents_in_cell is None:
+                    agents_in_cell = cell_agents[cell] = set()
+                agents_in_cell.add(agent_id)
+            positions.cells[slots] = cells
+        self._sync_agent_positions(category, agent_ids, xs, ys)
+
+    def _sync_agent_positions(
+        self, category, agent_ids: np.ndarray, xs: np.ndarray, ys: np.ndarray
+    ):
+        """
+        Write the positions of moved agents to the agents of the agent list
+        registered for ``category``, if any.
+        """
+        agent_list = self._agent_containers.get(category)
+        if agent_list is not None:
+            agent_list._assign_positions(agent_ids, xs, ys)
+
+    def setup_agent_locations(self, agent_list: "AgentList"):
+        """
+        Register an agent list, and add all its agents to the space at once, at
+        their ``(x, y)``.
+
+        :param agent_list: An ``AgentList`` of ``ContinuousAgent``.
+        :return: None
+        """
+        assert agent_list is not None, f"Agent Container was None"
+        if len(agent_list) == 0:
+            return
+        category = agent_list[0].category
+        assert (
+            category not in self._agent_containers
+        ), f"Category ID {category} already existed!"
+        self._agent_containers[category] = agent_list
+        for agent in agent_list:
+            if not isinstance(agent, ContinuousAgent):
+                raise TypeError(
+                    f"Parameter `agent` should be of type {ContinuousAgent.__name__} "
+                )
+            agent.space = self
+        agent_ids = np.array([agent.id for agent in agent_list], dtype=np.int64)
+        xs, ys = self._wrap_many(
+            [agent.x for agent in agent_list], [agent.y for agent in agent_list]
+        )
+        if category not in self._positions:
+            self.add_category(category)
+        positions = self._positions[category]
+        new_ids = set(agent_ids.tolist())
+        if len(new_ids) != len(agent_ids) or not new_ids.isdisjoint(positions.slots):
+            raise ValueError(f"Agents of category {category} already exist on space!")
+        num = len(agent_ids)
+        positions.reserve(num)
+        start = positions.size
+        new_slots = slice(start, start + num)
+        positions.ids[new_slots] = agent_ids
+        positions.xs[new_slots] = xs
+        positions.ys[new_slots] = ys
+        positions.slots.update(zip(agent_ids.tolist(), range(start, start + num)))
+        positions.size += num
+        positions.version += 1
+        if self._index == "hash":
+            cells = positions.cells[new_slots] = self._cells(xs, ys)
+            cell_agents = positions.cell_agents
+            for agent_id, cell in zip(agent_ids.tolist(), cells.tolist()):
+                agents_in_cell = cell_agents.get(cell)
+                if agents_in_cell is None:
+                    agents_in_cell = cell_agents[cell] = set()
+                agents_in_cell.add(agent_id)
+        self._sync_agent_positions(category, agent_ids, xs, ys)
+
+    def distance(self, x1: float, y1: float, x2: float, y2: float) -> float:
+        """
+        The euclidean distance between two positions, across the borders on a
+        torus.
+        """
+        dx = abs(x1 - x2)
+        dy = abs(y1 - y2)
+        if self._torus:
+            dx = min(dx, self._width - dx)
+            dy = min(dy, self._height - dy)
+        return math.hypot(dx, dy)
+
+    def _cell_range(self, center: float, radius: float, cell_size: float, num_cells: int):
+        """
+        The indices of the cells along one axis overlapping
+        ``[center - radius, center + radius]``.
+        """
+        low = math.floor((center - radius) / cell_size)
+        high = math.floor((center + radius) / cell_size)
+        if self._torus:
+            if high - low + 1 >= num_cells:
+                return range(num_cells)
+            return [i % num_cells for i in range(low, high + 1)]
+        return range(max(low, 0), min(high, num_cells - 1) + 1)
+
+    def get_agent_ids_in_radius(self, category, x: float, y: float, radius: float) -> np.ndarray:
+        """
+        Get the ids of the agents of a category within ``radius`` of ``(x, y)``,
+        borders included.
+
+        :return: A NumPy array of agent ids, in ascending order.
+        """
+        positions = self._positions.get(category)
+        if positions is None or positions.size == 0:
+            return np.zeros(0, dtype=np.int64)
+        if self._index == "kdtree":
+            return self._query_tree(positions, x, y, radius)
+        cell_agents = positions.cell_agents
+        num_cells_y = self._num_cells_y
+        candidates = []
+        for cx in self._cell_range(x, radius, self._cell_width, self._num_cells_x):
+            for cy in self._cell_range(y, radius, self._cell_height, num_cells_y):
+                agents_in_cell = cell_agents.get(cx * num_cells_y + cy)
+                if agents_in_cell:
+                    candidates.extend(agents_in_cell)
+        if not candidates:
+            return np.zeros(0, dtype=np.int64)
+        slots_of = positions.slots
+        slots = np.fromiter(
+            map(slots_of.__getitem__, candidates), dtype=np.int64, count=len(candidates)
+        )
+        dx = np.abs(positions.xs[slots] - x)
+        dy = np.abs(positions.ys[slots] - y)
+        if self._torus:
+            np.minimum(dx, self._width - dx, out=dx)
+            np.minimum(dy, self._height - dy, out=dy)
+        within = dx * dx + dy * dy <= radius * radius
+        return np.sort(positions.ids[slots[within]])
+
+    def _query_tree(self, positions: _CategoryPositions, x: float, y: float, radius: float):
+        if positions.tree_version != positions.version:
+            from scipy.spatial import cKDTree
+
+            size = positions.size
+            data = np.column_stack((positions.xs[:size], positions.ys[:size]))
+            boxsize = (self._width, self._height) if self._torus else None
+            positions.tree = cKDTree(data, boxsize=boxsize)
+            positions.tree_version = positions.version
+        slots = positions.tree.query_ball_point((x, y), radius)
+        return np.sort(positions.ids[np.asarray(slots, dtype=np.int64)])
+
+    def get_neighbors(self, agent: ContinuousAgent, radius: float = 1.0, except_self=True):
+        """
+        Get the agents of all categories within ``radius`` of an agent.
+
+        :param agent: The agent, at ``(agent.x, agent.y)``.
+        :param radius: The radius of the neighborhood.
+        :param except_self: If True, the agent itself is excluded.
+        :return: A list of the tuple: (`Agent category`, `Agent id`), like
+            ``Grid.get_neighbors``.
+        """
+        neighbor_ids = []
+        for category in self._positions:
+            for agent_id in self.get_agent_ids_in_radius(
+                category, agent.x, agent.y, radius
+            ).tolist():
+                if not (except_self and agent_id == agent.id and category == agent.category):
+                    neighbor_ids.append((category, agent_id))
+        return neighbor_ids
+
+    def neighbors_of(
+        self,
+        agent: ContinuousAgent,
+        category=None,
+        radius: float = 1.0,
+        except_self=True,
+        as_objects=True,
+    ) -> Union[List[ContinuousAgent], np.ndarray]:
+        """
+        Get the neighbors of an agent in one category, within ``radius``.
+
+        :param agent: The agent, at ``(agent.x, agent.y)``.
+        :param category: Optional. The category of the neighbors. Defaults to the
+            category of ``agent``.
+        :param radius: The radius of the neighborhood.
+        :param except_self: If True, the agent itself is excluded.
+        :param as_objects: If True (default), return the neighbor agents, taken from
+            the agent list registered for ``category`` with
+            :meth:`setup_agent_locations`. Otherwise, return their ids.
+        :return: A list of agents, or a NumPy array of agent ids, in ascending order
+            of id.
+        """
+        if category is None:
+            category = agent.category
+        neighbor_ids = self.get_agent_ids_in_radius(category, agent.x, agent.y, radius)
+        if except_self and category == agent.category:
+            neighbor_ids = neighbor_ids[neighbor_ids != agent.id]
+        if not as_objects:
+            return neighbor_ids
+        agent_list = self.get_agent_container(category)
+        # The indices of live agents stay valid while removed ones leave empty
+        # slots, so the list need not be compacted.
+        agents = agent_list.agents
+        indices = agent_list.indices
+        return [agents[indices[agent_id]] for agent_id in neighbor_ids.tolist()]
+
+
+__all__ = ["ContinuousAgent", "ContinuousSpace"]
@@ -0,0 +1,119 @@
+import heapq
+from itertools import count
+from typing import Any, Callable, List, Optional, Tuple
+
+from ..exceptions import MelodieExceptions
+
+
+class Event:
+    """
+    An event scheduled in an :class:`EventCalendar`.
+    """
+
+    __slots__ = ("time", "callback", "args", "cancelled")
+
+    def __init__(self, time: float, callback: Callable, args: Tuple):
+        self.time = time
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def __repr__(self):
+        return f"<Event time={self.time} callback={self.callback} cancelled={self.cancelled}>"
+
+    def cancel(self):
+        """
+        Cancel the event, so its callback is not called.
+
+        :return: None
+        """
+        self.cancelled = True
+
+
+class EventCalendar:
+    """
+    A calendar of events, each calling a callback at a future time.
+
+    Events are kept in a heap, so scheduling an event and running the next one cost
+    O(log(number of pending events)). Events at the same time run in the order they
+    were scheduled. Cancelled events stay in the heap and are dropped when they come
+    up.
+
+    .. code-block:: python
+
+        # e.g. in ``agent.infect()``:
+        self.model.calendar.schedule_in(recovery_time, self.recover)
+    """
+
+    def __init__(self):
+        # The time of the event running, or the time the calendar was run until.
+        self.now: float = 0
+        self._queue: List[Tuple[float, int, Event]] = []
+        self._counter = count()
+
+    def __len__(self):
+        """
+        Number of pending events, including cancelled events not dropped yet.
+        """
+        return len(self._queue)
+
+    def schedule(self, time: float, callback: Callable, *args: Any) -> Event:
+        """
+        Schedule ``callback(*args)`` at ``time``.
+
+        :param time: The time of the event, which cannot be earlier than ``now``.
+        :param callback: The function to call, e.g. an agent method.
+        :param args: Arguments passed to the callback.
+        :return: The event, which can be cancelled with ``event.cancel()``.
+        """
+        if time < self.now:
+            raise MelodieExceptions.Program.Variable.VariableInvalid(
+                "event time", time, f"a time not earlier than now ({self.now})"
+            )
+        event = Event(time, callback, args)
+        heapq.heappush(self._queue, (time, next(self._counter), event))
+        return event
+
+    def schedule_in(self, delay: float, callback: Callable, *args: Any) -> Event:
+        """
+        Schedule ``callback(*args)`` at ``now + delay``.
+        """
+        return self.schedule(self.now + delay, callback, *args)
+
+    def next_time(self) -> Optional[float]:
+        """
+        The time of the next pending event, or None if there is none.
+        """
+        queue = self._queue
+        while queue and queue[0][2].cancelled:
+            heapq.heappop(queue)
+        return queue[0][0] if queue else None
+
+    def run_until(self, time: float) -> int:
+        """
+        Run the events scheduled until ``time``, included, in order of time. Events
+        scheduled by the callbacks also run if they are due.
+
+        :param time: The time to run the calendar until.
+        :return: The number of events run.
+        """
+        queue = self._queue
+        num_events = 0
+        while queue and queue[0][0] <= time:
+            event_time, _, event = heapq.heappop(queue)
+            if event.cancelled:
+                continue
+            self.now = event_time
+            event.callback(*event.args)
+            num_events += 1
+        if time > self.now:
+            self.now = time
+        return num_events
+
+    def clear(self):
+        """
+        Drop all pending events.
+
+        :return: None
+        """
+        self._queue.clear()
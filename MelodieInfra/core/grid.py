@@ -1,10 +1,23 @@
-from typing import ClassVar, Dict, List, Literal, Tuple
+from typing import ClassVar, Dict, List, Literal, Optional, Set, Tuple, Union
+
+import numpy as np
 
 from MelodieInfra.core.agent_list import AgentList
 
 from .agent import Agent
-from .api import _random as random
-from .api import floor, iterable, lru_cache, randint
+from ..exceptions import MelodieExceptions
+from .api import default_random_stream, floor, lru_cache
+from .grid_layers import (
+    LayerProperty,
+    TrackedProperty,
+    correlate,
+    diffuse,
+    rect_sums,
+    summed_area_table,
+)
+from .grid_occupancy import ArrayOccupancy, SetOccupancy, SpotSet
+from .grid_paths import DistanceField, shortest_paths
+from .rng import RandomStream
 
 
 class GridItem(Agent):
@@ -72,6 +85,13 @@ class Grid:
     Grid contains many `Spot`s, each `Spot` could contain several agents.
     """
 
+    # Maximum memory, in bytes, of the neighbor index built for each kind of
+    # neighborhood (radius, moore, except_self) if ``caching`` is enabled. Beyond
+    # it, neighbors are computed on each query from the neighborhood offsets.
+    neighbor_cache_bytes: int = 64 * 2**20
+    # Maximum number of distance fields cached by ``distance_field``.
+    distance_field_cache_size: int = 16
+
     def __init__(self, spot_cls: ClassVar[Spot], scenario=None):
         """
         :param spot_cls: The class of Spot
@@ -85,18 +105,73 @@ class Grid:
         self._wrap = False
         self._caching = True
         self._multi = False
+        self._lazy_spots = False
 
         self._spot_cls = spot_cls
-        self._existed_agents: Dict[str, Dict[int, Tuple[int, int]]] = {}
-        self._agent_ids: "Dict[str, List[Set[int]]]" = {}
-        self._spots = []
+        # Subclass of ``spot_cls`` reading the layers, created by ``init_grid``.
+        self._spot_layer_cls = spot_cls
+        self._layers: Dict[str, np.ndarray] = {}
+        # The agents of each category on the grid.
+        self._occupancy_cls = SetOccupancy
+        self._occupancies: Dict[int, Union[SetOccupancy, ArrayOccupancy]] = {}
+        # ``_spots[y][x]``, or the spots created so far by their 1-d position if
+        # ``lazy_spots`` is enabled.
+        self._spots: Union[List[List[Spot]], Dict[int, Spot]] = []
         self.scenario = scenario
-        self._empty_spots = set()
+        # The model this grid belongs to, whose random stream is used.
+        self.model = None
+        # Built at the first query of empty spots, and kept up to date afterwards.
+        self._empty_spots: Optional[SpotSet] = None
+        # Rows ``[x, y, 0, colormap]`` of the spots, built by ``get_colormap``.
+        self._roles: Optional[np.ndarray] = None
+        # The spots whose colormap was assigned, and the agents added, moved or
+        # removed, by category, since the last ``get_colormap`` call. None until
+        # the first call.
+        self._dirty_spots: Optional[Set[int]] = None
+        self._dirty_agents: Optional[Dict[int, Set[int]]] = None
         self._agent_containers = {}
-        self._cache = {}
+        # Neighborhood offsets and neighbor indexes, by (radius, moore, except_self).
+        self._neighbor_offsets: Dict[Tuple[int, bool, bool], List[Tuple[int, int]]] = {}
+        self._neighbor_indexes: Dict[
+            Tuple[int, bool, bool], Optional[Tuple[np.ndarray, np.ndarray]]
+        ] = {}
+        # The summed-area tables of the agent counts, by category, with the
+        # occupancy and the version of the occupancy they were built from.
+        self._count_tables: Dict[int, Tuple[object, int, np.ndarray]] = {}
+        # Distance fields by (targets, passable, cost, moore), with copies of the
+        # layers they were computed from.
+        self._distance_fields: Dict[
+            Tuple[bytes, Optional[str], Optional[str], bool],
+            Tuple[List[np.ndarray], DistanceField],
+        ] = {}
 
     def init_grid(self):
-        SpotCls = self._spot_cls
+        self._neighbor_indexes = {}
+        self._distance_fields = {}
+        self._layers = {}
+        # A subclass for this grid only, as layer properties are added to it. It
+        # keeps the name of ``spot_cls``, and its instances are still instances of
+        # ``spot_cls``.
+        namespace = {
+            "__module__": self._spot_cls.__module__,
+            "__qualname__": self._spot_cls.__qualname__,
+        }
+        # Record the spots whose colormap is assigned, unless ``spot_cls`` defines
+        # the colormap itself, e.g. as a property.
+        self._colormap_tracked = not hasattr(self._spot_cls, "colormap")
+        if self._colormap_tracked:
+            namespace["colormap"] = TrackedProperty("colormap", self)
+        self._spot_layer_cls = type(
+            self._spot_cls.__name__, (self._spot_cls,), namespace
+        )
+        self._empty_spots = None
+        self._roles = None
+        self._dirty_spots = None
+        self._dirty_agents = None
+        if self._lazy_spots:
+            self._spots = {}
+            return
+        SpotCls = self._spot_layer_cls
         self._spots = [
             [SpotCls(self._convert_to_1d(x, y), self, x, y) for x in range(self._width)]
             for y in range(self._height)
@@ -104,10 +179,6 @@ class Grid:
         for x in range(self._width):
             for y in range(self._height):
                 self._spots[y][x].setup()
-                self._empty_spots.add(self._convert_to_1d(x, y))
-        self._roles_list = [
-            [0 for j in range(4)] for i in range(self._width * self._height)
-        ]
         # if self._caching:
         #     self.enable_caching()
 
@@ -118,7 +189,14 @@ class Grid:
     #     self._width * self._height)(self._bound_check)
 
     def setup_params(
-        self, width: int, height: int, wrap=True, caching=True, multi=True
+        self,
+        width: int,
+        height: int,
+        wrap=True,
+        caching=True,
+        multi=True,
+        occupancy: Literal["sets", "arrays"] = "sets",
+        lazy_spots=False,
     ):
         """
         Setup the parameters of the grid.
@@ -127,18 +205,38 @@ class Grid:
         :param height: An integer for the grid height.
         :param wrap: A boolean (default True). If True, an agent moving out of
             the grid on one side will re-enter from the opposite side.
-        :param caching: A boolean (default True). If True, the grid caches the
-            neighbors of each spot to improve performance.
+        :param caching: A boolean (default True). If True, the grid indexes the
+            neighbors of all spots at the first query of each kind of
+            neighborhood, within ``neighbor_cache_bytes``, to improve
+            performance.
         :param multi: A boolean (default True). If True, more than one agent can
             stand on the same spot. If False, an error will be raised when
             attempting to place multiple agents on one spot.
+        :param occupancy: How the agents on each spot are stored. ``"sets"``
+            (default) keeps a set of agent ids per spot and category. ``"arrays"``
+            keeps flat integer arrays indexed by spot and by agent id, which use
+            much less memory on large grids, and are faster to update when agents
+            move. Both give the same results.
+        :param lazy_spots: A boolean (default False). If True, each ``Spot`` is
+            created, and set up, at the first access to it with :meth:`get_spot`,
+            instead of all spots at once. This saves time and memory on large grids
+            whose spots are mostly handled through layers, see :meth:`add_layer`.
+            The attributes of a spot stored in layers keep the values of the
+            layers, even if ``setup()`` assigns them.
         :return: None
         """
+        occupancy_classes = {"sets": SetOccupancy, "arrays": ArrayOccupancy}
+        if occupancy not in occupancy_classes:
+            raise MelodieExceptions.Program.Variable.VariableNotInSet(
+                "occupancy", occupancy, set(occupancy_classes)
+            )
+        self._occupancy_cls = occupancy_classes[occupancy]
         self._width = width
         self._height = height
         self._wrap = wrap
         self._caching = caching
         self._multi = multi
+        self._lazy_spots = lazy_spots
         self.init_grid()
 
     def setup(self):
@@ -158,10 +256,9 @@ class Grid:
         :param category_name:
         :return:
         """
-        self._agent_ids[category_name] = [
-            set() for i in range(self._width * self._height)
-        ]
-        self._existed_agents[category_name] = {}
+        self._occupancies[category_name] = self._occupancy_cls(
+            self._width * self._height
+        )
 
     def get_spot(self, x, y) -> "Spot":
         """
@@ -172,7 +269,37 @@ class Grid:
         :return: The ``Spot`` at position (x, y)
         """
         x, y = self._bound_check(x, y)
-        return self._spots[y][x]
+        return self._spot_at(x, y)
+
+    def _spot_at(self, x: int, y: int) -> "Spot":
+        """
+        Get the spot at ``(x, y)``, within the bounds, creating it if needed.
+        """
+        if not self._lazy_spots:
+            return self._spots[y][x]
+        pos_1d = x * self._height + y
+        spot = self._spots.get(pos_1d)
+        if spot is None:
+            spot = self._spots[pos_1d] = self._create_spot(pos_1d, x, y)
+        return spot
+
+    def _create_spot(self, pos_1d: int, x: int, y: int) -> "Spot":
+        """
+        Create and set up a spot of a lazy grid. The spot is built as an instance of
+        the spot class, and then switched to the subclass reading the layers, so the
+        values assigned by ``__init__`` and ``setup()`` do not overwrite the layers.
+        """
+        spot = self._spot_cls(pos_1d, self, x, y)
+        spot.setup()
+        if self._layers:
+            spot_dict = spot.__dict__
+            for name in self._layers:
+                spot_dict.pop(name, None)
+        spot.__class__ = self._spot_layer_cls
+        if self._dirty_spots is not None:
+            # ``setup()`` may have assigned the colormap.
+            self._dirty_spots.add(pos_1d)
+        return spot
 
     def get_agent_ids(self, category: str, x: int, y: int) -> "Set[int]":
         """
@@ -182,32 +309,36 @@ class Grid:
         :param y:
         :return: A set of int, the agent ids.
         """
-        agent_ids = self._agent_ids[category][self._convert_to_1d(x, y)]
-        if agent_ids is None:
-            raise KeyError(f"Category {category} not registered!")
-        return agent_ids
+        x, y = self._bound_check(x, y)
+        return self._get_occupancy(category).agent_ids(self._convert_to_1d(x, y))
 
     def _convert_to_1d(self, x, y):
         return x * self._height + y
 
     def _num_to_2d_coor(self, num: int):
-        return floor(num / self._height), num % self._width
+        return divmod(num, self._height)
 
     def _in_bounds(self, x, y):
-        return (0 <= x < self.width) and (0 <= y <= self._height)
+        return (0 <= x < self._width) and (0 <= y < self._height)
 
-    def _get_category_of_agents(self, category_name: str):
-        # category = self._existed_agents.get(category_name)
+    def _get_occupancy(self, category) -> Union[SetOccupancy, ArrayOccupancy]:
+        occupancy = self._occupancies.get(category)
+        if occupancy is None:
+            raise KeyError(f"Category {category} not registered!")
+        return occupancy
 
-        # raise ValueError(f"Category {category_name} is not registered!")
-        return self._existed_agents[category_name]
+    def _is_spot_empty(self, pos_1d: int) -> bool:
+        for occupancy in self._occupancies.values():
+            if occupancy.count(pos_1d) > 0:
+                return False
+        return True
 
     def _bound_check(self, x, y):
         if self._wrap:
             return self.coords_wrap(x, y)
         if not (0 <= x < self._width):
             raise IndexError("grid index x was out of range")
-        elif not (0 <= y <= self._height):
+        elif not (0 <= y < self._height):
             raise IndexError("grid index y was out of range")
         else:
             return x, y
@@ -224,6 +355,100 @@ class Grid:
         y_wrapped = y_wrapped if y_wrapped >= 0 else self._height + y_wrapped
         return x_wrapped, y_wrapped
 
+    def _get_neighbor_offsets(
+        self, radius: int, moore: bool, except_self: bool
+    ) -> List[Tuple[int, int]]:
+        """
+        Get the offsets ``(dx, dy)`` of the spots in a neighborhood, computed once
+        per kind of neighborhood.
+        """
+        key = (radius, moore, except_self)
+        offsets = self._neighbor_offsets.get(key)
+        if offsets is None:
+            offsets = [
+                (dx, dy)
+                for dx in range(-radius, radius + 1)
+                for dy in range(-radius, radius + 1)
+                if (moore or abs(dx) + abs(dy) <= radius)
+                and not (dx == 0 and dy == 0 and except_self)
+            ]
+            self._neighbor_offsets[key] = offsets
+        return offsets
+
+    def _get_neighbor_index(
+        self, radius: int, moore: bool, except_self: bool
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Get a CSR index of the neighbors of all spots: the neighbors of the spot
+        at 1-d position ``p`` are at the 1-d positions
+        ``indices[offsets[p]:offsets[p + 1]]``.
+
+        The index is built at once with NumPy, by applying the neighborhood
+        offsets to all spots and wrapping or clipping the results. It is None if
+        ``caching`` is disabled or if the index would take more than
+        ``neighbor_cache_bytes``.
+        """
+        key = (radius, moore, except_self)
+        if key in self._neighbor_indexes:
+            return self._neighbor_indexes[key]
+        num_spots = self._width * self._height
+        num_offsets = len(self._get_neighbor_offsets(radius, moore, except_self))
+        index = None
+        index_bytes = num_spots * num_offsets * 4 + (num_spots + 1) * 8
+        if self._caching and index_bytes <= self.neighbor_cache_bytes:
+            index = self._build_neighbor_index(radius, moore, except_self)
+        self._neighbor_indexes[key] = index
+        return index
+
+    def _build_neighbor_index(
+        self, radius: int, moore: bool, except_self: bool
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Build the CSR index of the neighbors of all spots, see
+        :meth:`_get_neighbor_index`.
+        """
+        offsets = self._get_neighbor_offsets(radius, moore, except_self)
+        num_spots = self._width * self._height
+        dx = np.array([offset[0] for offset in offsets], dtype=np.int32)
+        dy = np.array([offset[1] for offset in offsets], dtype=np.int32)
+        # Shape (width, 1, k) and (1, height, k), broadcast to all spots.
+        xs = (np.arange(self._width, dtype=np.int32)[:, None] + dx)[:, None, :]
+        ys = (np.arange(self._height, dtype=np.int32)[:, None] + dy)[None, :, :]
+        if self._wrap:
+            indices = ((xs % self._width) * self._height + ys % self._height).ravel()
+            spot_offsets = np.arange(num_spots + 1, dtype=np.int64) * len(offsets)
+        else:
+            valid = ((0 <= xs) & (xs < self._width)) & ((0 <= ys) & (ys < self._height))
+            valid = valid.reshape(num_spots, len(offsets))
+            indices = (xs * self._height + ys).reshape(num_spots, len(offsets))[valid]
+            spot_offsets = np.zeros(num_spots + 1, dtype=np.int64)
+            np.cumsum(valid.sum(axis=1), out=spot_offsets[1:])
+        return spot_offsets, indices
+
+    def _get_neighbor_spot_ids(
+        self, x, y, radius: int = 1, moore=True, except_self=True
+    ) -> List[int]:
+        """
+        Get the 1-d positions of the neighbors of the spot at (x, y).
+        """
+        x, y = self._bound_check(x, y)
+        index = self._get_neighbor_index(radius, moore, except_self)
+        pos_1d = self._convert_to_1d(x, y)
+        if index is not None:
+            spot_offsets, indices = index
+            return indices[spot_offsets[pos_1d] : spot_offsets[pos_1d + 1]].tolist()
+        width, height = self._width, self._height
+        offsets = self._get_neighbor_offsets(radius, moore, except_self)
+        if self._wrap:
+            return [
+                ((x + dx) % width) * height + (y + dy) % height for dx, dy in offsets
+            ]
+        return [
+            (x + dx) * height + y + dy
+            for dx, dy in offsets
+            if 0 <= x + dx < width and 0 <= y + dy < height
+        ]
+
     def _get_neighbor_positions(
         self, x, y, radius: int = 1, moore=True, except_self=True
     ) -> List[Tuple[int, int]]:
@@ -237,54 +462,22 @@ class Grid:
         :param except_self:
         :return:
         """
-        x, y = self._bound_check(x, y)
-        neighbors = []
-        # s = except_self+moore*2**1+radius*2**10+x*2**20+y*2**30
-        s = f"{except_self}+{moore}+{radius}+{x}+{y}"
-        if s not in self._cache:
-            for dx in range(-radius, radius + 1):
-                for dy in range(-radius, radius + 1):
-                    if not moore and abs(dx) + abs(dy) > radius:
-                        continue
-                    if not self._wrap and not self._in_bounds(x + dx, y + dy):
-                        continue
-                    if dx == 0 and dy == 0 and except_self:
-                        continue
-                    neighbors.append(self._bound_check(x + dx, y + dy))
-            self._cache[s] = neighbors
-            return neighbors
-        else:
-            return self._cache[s]
-        # s = except_self+moore*2**1+radius*2**10+x*2**20+y*2**30
-        # if s not in self._cache:
-        #     neighbors = []
-        #     for dx in range(-radius, radius + 1):
-        #         for dy in range(-radius, radius + 1):
-        #             if not moore and abs(dx) + abs(dy) > radius:
-        #                 continue
-        #             if not self._wrap and not self._in_bounds(x + dx, y + dy):
-        #                 continue
-        #             if dx == 0 and dy == 0 and except_self:
-        #                 continue
-        #             neighbors.append(self._bound_check(x + dx, y + dy))
-        #     self._cache[s] = neighbors
-        #     return neighbors
-        # else:
-        #     return self._cache[s]
+        height = self._height
+        return [
+            divmod(pos_1d, height)
+            for pos_1d in self._get_neighbor_spot_ids(x, y, radius, moore, except_self)
+        ]
 
     def _get_neighborhood(self, x, y, radius=1, moore=True, except_self=True):
         """
         Get all spots around (x, y)
 
         """
-        neighbor_positions = self._get_neighbor_positions(
-            x, y, radius, moore, except_self
-        )
-        spots = []
-        for pos in neighbor_positions:
-            x, y = pos
-            spots.append(self.get_spot(x, y))
-        return spots
+        spot_at = self._spot_at
+        return [
+            spot_at(x, y)
+            for x, y in self._get_neighbor_positions(x, y, radius, moore, except_self)
+        ]
 
     def get_agent_neighborhood(self, agent, radius=1, moore=True, except_self=True):
         return self._get_neighborhood(agent.x, agent.y, radius, moore, except_self)
@@ -317,50 +510,32 @@ class Grid:
         :return:
         """
         x, y = self._bound_check(x, y)
-        if category not in self._existed_agents:
-            self._existed_agents[category] = {}
-        if category not in self._agent_ids:
-            l = []
-            for _ in range(self._width * self._height):
-                l.append(set())
-            self._agent_ids[category] = l  # = [set()
-            #  for _ in range(self._width * self._height)]
-
-        category_of_agents = self._get_category_of_agents(category)
-
-        if agent_id in category_of_agents:
-            raise ValueError(f"Agent with id: {agent_id} already exists on grid!")
+        if category not in self._occupancies:
+            self.add_category(category)
         pos_1d = self._convert_to_1d(x, y)
-        if agent_id in self._agent_ids[category][pos_1d]:
-            raise ValueError(
-                f"Agent with id: {agent_id} already exists at position {(x, y)}!"
-            )
-        else:
-            self._agent_ids[category][pos_1d].add(agent_id)
-            self._existed_agents[category][agent_id] = (x, y)
-        if pos_1d in self._empty_spots:
-            self._empty_spots.remove(pos_1d)
+        self._occupancies[category].add(agent_id, pos_1d)
+        if self._empty_spots is not None:
+            self._empty_spots.discard(pos_1d)
+        if self._dirty_agents is not None:
+            self._mark_agents_dirty(category, (agent_id,))
 
     def _remove_agent(self, agent_id: int, category: str, x: int, y: int):
         x, y = self._bound_check(x, y)
-
-        category_of_agents = self._get_category_of_agents(category)
-
-        if agent_id not in category_of_agents.keys():
+        occupancy = self._get_occupancy(category)
+        try:
+            current_pos_1d = occupancy.position(agent_id)
+        except KeyError:
             raise ValueError(f"Agent with id: {agent_id} does not exist on grid!")
         pos_1d = self._convert_to_1d(x, y)
-        if agent_id not in self._existed_agents[category]:
-            raise ValueError("Agent does not exist on the grid!")
-        if agent_id not in self._agent_ids[category][pos_1d]:
-            print("Melodie-boost error occured. agent_id:", agent_id, "x:", x, "y:", y)
-            raise IndexError("agent_id does not exist on such coordinate.")
-        else:
-            self._agent_ids[category][pos_1d].remove(agent_id)
-            self._existed_agents[category].pop(agent_id)
-
-        agents = self._get_spot_agents(pos_1d)
-        if len(agents) == 0:
+        if current_pos_1d != pos_1d:
+            raise IndexError(
+                f"Agent with id: {agent_id} does not exist at position {(x, y)}."
+            )
+        occupancy.remove(agent_id)
+        if self._empty_spots is not None and self._is_spot_empty(pos_1d):
             self._empty_spots.add(pos_1d)
+        if self._dirty_agents is not None:
+            self._mark_agents_dirty(category, (agent_id,))
 
     def remove_agent(self, agent: GridAgent):
         """
@@ -393,7 +568,109 @@ class Grid:
         :param category:
         :return:
         """
-        return self._existed_agents[category][agent_id]
+        return self._num_to_2d_coor(self._occupancies[category].position(agent_id))
+
+    def agent_positions(self, category) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get the positions of all agents of a category on the grid, as arrays.
+
+        :param category: The category of the agents.
+        :return: A tuple ``(agent_ids, xs, ys)`` of NumPy arrays, sorted by agent
+            id.
+        """
+        occupancy = self._get_occupancy(category)
+        agent_ids = occupancy.placed_agent_ids()
+        xs, ys = np.divmod(occupancy.positions_of(agent_ids), self._height)
+        return agent_ids, xs, ys
+
+    def move_agents(self, category, agent_ids, xs, ys):
+        """
+        Move several agents of a category at once, e.g. after computing their
+        targets in a vectorized way.
+
+        The targets are wrapped or checked in a vectorized way, and the agents are
+        moved in one pass. The ``x`` and ``y`` of the agents are updated if their
+        agent list was registered with :meth:`setup_agent_locations`, in a
+        vectorized way if ``x`` and ``y`` are columns of the list. Otherwise, the
+        positions can be read with :meth:`agent_positions`.
+
+        :param category: The category of the agents.
+        :param agent_ids: The ids of the agents, as an array or a list.
+        :param xs: The target x coordinates.
+        :param ys: The target y coordinates.
+        :return: None
+        """
+        agent_ids = np.asarray(agent_ids, dtype=np.int64)
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        if self._wrap:
+            xs = xs % self._width
+            ys = ys % self._height
+        else:
+            if not ((0 <= xs) & (xs < self._width)).all():
+                raise IndexError("grid index x was out of range")
+            if not ((0 <= ys) & (ys < self._height)).all():
+                raise IndexError("grid index y was out of range")
+        occupancy = self._get_occupancy(category)
+        targets = xs * self._height + ys
+        try:
+            sources = occupancy.move_many(agent_ids, targets)
+        except KeyError as e:
+            raise ValueError(f"Agent with id: {e.args[0]} does not exist on grid!")
+        self._update_empty_spots(sources, targets)
+        if self._dirty_agents is not None:
+            self._mark_agents_dirty(category, agent_ids[sources != targets].tolist())
+        self._sync_agent_positions(category, agent_ids, xs, ys)
+
+    def rand_move_agents(self, category, x_range: int, y_range: int, rng=None):
+        """
+        Randomly move all agents of a category, by at most ``x_range`` on the x
+        axis and ``y_range`` on the y axis, like :meth:`rand_move_agent`, but
+        with the offsets drawn and applied in a vectorized way.
+
+        On a grid without wrapping, agents moving out of the grid stay at its
+        border.
+
+        :param category: The category of the agents.
+        :param x_range: The activity range of agents on the x axis.
+        :param y_range: The activity range of agents on the y axis.
+        :param rng: Optional. A :class:`~Melodie.RandomStream` or NumPy
+            ``Generator`` to draw the moves from, instead of :attr:`rng`.
+        :return: None
+        """
+        rng = self.rng if rng is None else rng
+        agent_ids, xs, ys = self.agent_positions(category)
+        dx = (rng.random(len(agent_ids)) * (2 * x_range + 1)).astype(np.int64) - x_range
+        dy = (rng.random(len(agent_ids)) * (2 * y_range + 1)).astype(np.int64) - y_range
+        xs += dx
+        ys += dy
+        if not self._wrap:
+            np.clip(xs, 0, self._width - 1, out=xs)
+            np.clip(ys, 0, self._height - 1, out=ys)
+        self.move_agents(category, agent_ids, xs, ys)
+
+    def _update_empty_spots(self, sources: np.ndarray, targets: np.ndarray):
+        """
+        Update the empty spots after agents moved from ``sources`` to ``targets``.
+        """
+        empty_spots = self._empty_spots
+        if empty_spots is None:
+            return
+        empty_spots.discard_many(targets.tolist())
+        for pos_1d in set(sources.tolist()):
+            if self._is_spot_empty(pos_1d):
+                empty_spots.add(pos_1d)
+
+    def _sync_agent_positions(
+        self, category, agent_ids: np.ndarray, xs: np.ndarray, ys: np.ndarray
+    ):
+        """
+        Write the positions of moved agents to the agents of the agent list
+        registered for ``category``, if any.
+        """
+        agent_list = self._agent_containers.get(category)
+        if agent_list is not None:
+            agent_list._assign_positions(agent_ids, xs, ys)
 
     def height(self):
         """
@@ -423,15 +700,65 @@ class Grid:
         :return:  A list of the tuple: (`Agent category`, `Agent id`).
         """
         neighbor_ids = []
-        neighbor_positions = self._get_neighbor_positions(
+        occupancies = list(self._occupancies.items())
+        for pos_1d in self._get_neighbor_spot_ids(
             agent.x, agent.y, radius, moore, except_self
-        )
-        for neighbor_pos in neighbor_positions:
-            x, y = neighbor_pos
-            agent_ids = self.get_spot_agents(self.get_spot(x, y))
-            neighbor_ids.extend(agent_ids)
+        ):
+            for category, occupancy in occupancies:
+                if occupancy.count(pos_1d):
+                    for agent_id in occupancy.iter_agent_ids(pos_1d):
+                        neighbor_ids.append((category, agent_id))
         return neighbor_ids
 
+    def neighbors_of(
+        self,
+        agent: GridAgent,
+        category=None,
+        radius=1,
+        moore=True,
+        except_self=True,
+        as_objects=True,
+    ) -> Union[List[GridAgent], np.ndarray]:
+        """
+        Get the neighbors of an agent in one category, without building a
+        ``(category, id)`` tuple per neighbor as :meth:`get_neighbors` does:
+
+        .. code-block:: python
+
+            for neighbor in self.grid.neighbors_of(self):
+                if neighbor.health_state == 0:
+                    ...
+
+        :param agent: The agent, whose position is ``(agent.x, agent.y)``.
+        :param category: Optional. The category of the neighbors. Defaults to the
+            category of ``agent``.
+        :param radius: The radius of the neighborhood.
+        :param moore: If True, the neighborhood is a square, otherwise a diamond.
+        :param except_self: If True, the spot of the agent is excluded.
+        :param as_objects: If True (default), return the neighbor agents, taken from
+            the agent list registered for ``category`` with
+            :meth:`setup_agent_locations`. Otherwise, return their ids.
+        :return: A list of agents, or a NumPy array of agent ids, in the order of
+            the spots of the neighborhood.
+        """
+        if category is None:
+            category = agent.category
+        occupancy = self._get_occupancy(category)
+        neighbor_ids = []
+        for pos_1d in self._get_neighbor_spot_ids(
+            agent.x, agent.y, radius, moore, except_self
+        ):
+            if occupancy.count(pos_1d):
+                neighbor_ids.extend(occupancy.iter_agent_ids(pos_1d))
+        if not as_objects:
+            return np.array(neighbor_ids, dtype=np.int64)
+        agent_list = self.get_agent_container(category)
+        # The indices of live agents stay valid while removed ones leave empty
+        # slots, so the list need not be compacted.
+        agents = agent_list.agents
+        indices = agent_list.indices
+        return [agents[indices[agent_id]] for agent_id in neighbor_ids]
+
     def get_spot_agents(self, spot: Spot):
         """
         Get agents on the spot.
@@ -441,43 +768,105 @@ class Grid:
 
     def _get_spot_agents(self, spot_id: int):
         l = []
-        for item in iterable(self._agent_ids.items()):
-            category, spot_set_list = item
-            for agent_id in spot_set_list[spot_id]:
+        for category, occupancy in self._occupancies.items():
+            for agent_id in occupancy.iter_agent_ids(spot_id):
                 l.append((category, agent_id))
         return l
 
-    def get_colormap(self):
+    def _mark_agents_dirty(self, category, agent_ids):
+        dirty_agents = self._dirty_agents.get(category)
+        if dirty_agents is None:
+            dirty_agents = self._dirty_agents[category] = set()
+        dirty_agents.update(agent_ids)
+
+    def get_colormap(self, incremental=False):
         """
         Get the role of each spot.
 
+        The first call returns the full frame. Afterwards, with ``incremental=True``,
+        only the changes since the previous call are returned: the rows of the spots
+        whose colormap changed, and the entries of the agents added, moved or
+        removed. The entry of a removed agent has ``None`` as ``"value"``.
+
+        Assigned colormaps are recorded as they are assigned, and a ``colormap``
+        layer is compared with the previous frame, so an incremental frame does not
+        visit all spots. If the spot class defines ``colormap`` itself, e.g. as a
+        property, all spots are read.
+
+        :param incremental: If True, return only the changes since the last call.
         :return: A tuple. The first item is a nested list for spot roles, and the second item is a dict for agent roles.
         """
+        roles = self._roles
+        incremental = incremental and roles is not None
+        if roles is None:
+            # One integer array for all spots, instead of a list per spot.
+            num_spots = self._width * self._height
+            roles = self._roles = np.zeros((num_spots, 4), dtype=np.int64)
+            roles[:, 0], roles[:, 1] = np.divmod(np.arange(num_spots), self._height)
+
+        if incremental and "colormap" not in self._layers and self._colormap_tracked:
+            changed = np.array(sorted(self._dirty_spots), dtype=np.int64)
+            roles[changed, 3] = [
+                self._spot_at(x, y).colormap
+                for x, y in zip(*np.divmod(changed, self._height))
+            ]
+        else:
+            colormaps = self._read_colormaps()
+            changed = np.flatnonzero(roles[:, 3] != colormaps)
+            roles[:, 3] = colormaps
 
         agents_series_data = {}
-        for category in self._agent_ids.keys():
-            agents_series_data[category] = []
-        for x in range(self._width):
-            for y in range(self._height):
-                spot = self.get_spot(x, y)
-                pos_1d = self._convert_to_1d(x, y)
-                role_pos_list = self._roles_list[pos_1d]
-                role_pos_list[0] = x
-                role_pos_list[1] = y
-                role_pos_list[2] = 0
-                role_pos_list[3] = spot.colormap
-                for agent_desc in self.get_spot_agents(spot):
-                    agent_category, agent_id = agent_desc
-                    series_data_one_category = agents_series_data[agent_category]
+        if incremental:
+            spot_roles = roles[changed].tolist()
+            for category, agent_ids in self._dirty_agents.items():
+                occupancy = self._occupancies[category]
+                series_data_one_category = agents_series_data[category] = []
+                for agent_id in sorted(agent_ids):
+                    if agent_id in occupancy:
+                        value = list(divmod(occupancy.position(agent_id), self._height))
+                    else:
+                        value = None
                     series_data_one_category.append(
-                        {
-                            "value": [x, y],
-                            "id": agent_id,
-                            "category": agent_category,
-                        }
+                        {"value": value, "id": agent_id, "category": category}
                     )
+        else:
+            spot_roles = roles.tolist()
+            for category, occupancy in self._occupancies.items():
+                offsets, agent_ids = occupancy.spot_index()
+                xs, ys = np.divmod(
+                    np.repeat(np.arange(len(roles)), np.diff(offsets)), self._height
+                )
+                agents_series_data[category] = [
+                    {"value": [x, y], "id": agent_id, "category": category}
+                    for x, y, agent_id in zip(
+                        xs.tolist(), ys.tolist(), agent_ids.tolist()
+                    )
+                ]
+        self._dirty_spots = set()
+        self._dirty_agents = {}
+        return spot_roles, agents_series_data
 
-        return self._roles_list, agents_series_data
+    def _read_colormaps(self) -> np.ndarray:
+        """
+        Read the colormap of all spots, by 1-d position.
+        """
+        if "colormap" in self._layers:
+            return self._layers["colormap"].T.ravel()
+        if self._lazy_spots:
+            # Spots not created yet have the default colormap.
+            colormaps = np.zeros(self._width * self._height, dtype=np.int64)
+            for pos_1d, spot in self._spots.items():
+                colormaps[pos_1d] = spot.colormap
+            return colormaps
+        spots = self._spots
+        return np.array(
+            [
+                spots[y][x].colormap
+                for x in range(self._width)
+                for y in range(self._height)
+            ],
+            dtype=np.int64,
+        )
 
     def spots_to_json(self):
         """
@@ -488,10 +877,22 @@ class Grid:
         spots_serialized = []
         for x in range(self.width()):
             for y in range(self.height()):
-                spot: Spot = self._spots[y][x]
+                spot: Spot = self._spot_at(x, y)
                 spots_serialized.append(spot.to_json())
         return spots_serialized
 
+    def _get_empty_spot_set(self) -> SpotSet:
+        """
+        Get the set of empty spots, built from the occupancies at the first call.
+        """
+        if self._empty_spots is None:
+            num_spots = self._width * self._height
+            counts = np.zeros(num_spots, dtype=np.int64)
+            for occupancy in self._occupancies.values():
+                counts += occupancy.counts()
+            self._empty_spots = SpotSet(num_spots, np.flatnonzero(counts == 0))
+        return self._empty_spots
+
     def get_empty_spots(self):
         """
         Get all empty spots from grid.
@@ -499,17 +900,48 @@ class Grid:
         :return: a list of empty spot coordinates.
         """
         positions = []
-        for spot_pos_1d in self._empty_spots:
+        for spot_pos_1d in self._get_empty_spot_set():
             positions.append(self._num_to_2d_coor(spot_pos_1d))
         return positions
 
-    def find_empty_spot(self):
-        rand_value = randint(0, len(self._empty_spots) - 1)
-        i = 0
-        for item in self._empty_spots:
-            if i == rand_value:
-                return self._num_to_2d_coor(item)
-            i += 1
+    @property
+    def rng(self) -> RandomStream:
+        """
+        The random stream used for random placement and moves: the one of the
+        model this grid belongs to, or a default stream for standalone grids.
+        """
+        if self.model is not None:
+            return self.model.rng
+        return default_random_stream()
+
+    def find_empty_spot(self) -> Optional[Tuple[int, int]]:
+        """
+        Get a random empty spot, in O(1).
+
+        :return: The coordinates ``(x, y)`` of the spot, or None if no spot is
+            empty.
+        """
+        empty_spots = self._get_empty_spot_set()
+        if len(empty_spots) == 0:
+            return None
+        spot = empty_spots[self.rng.integers(len(empty_spots))]
+        return self._num_to_2d_coor(spot)
+
+    def find_empty_spots(self, num: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get ``num`` distinct random empty spots, drawn at once.
+
+        :param num: The number of spots.
+        :return: A tuple ``(xs, ys)`` of NumPy arrays.
+        """
+        empty_spots = self._get_empty_spot_set()
+        if num > len(empty_spots):
+            raise ValueError(
+                f"Cannot find {num} empty spots, as only {len(empty_spots)} "
+                f"spots are empty."
+            )
+        chosen = self.rng.generator.choice(len(empty_spots), num, replace=False)
+        return np.divmod(empty_spots.to_array()[chosen], self._height)
 
     def setup_agent_locations(self, category, initial_placement: Literal["direct", "random_single"]="direct") -> None:
         """
@@ -523,7 +955,7 @@ class Grid:
         :param category: An AgentList object
         :param initial_placement: A str object stand for initial placement, which can be ``direct`` or ``random_single``
             ``direct`` means that the agent is placed at the position of its x and y;
-            ``random_single`` means that the agent is placed at a random position.
+            ``random_single`` means that the agents are placed on distinct random empty spots, drawn at once.
         :return: None
         """
         initial_placement = initial_placement.lower()
@@ -543,20 +975,63 @@ class Grid:
             "direct",
         ], f"Invalid initial placement '{initial_placement}' "
         if initial_placement == "random_single":
-            for agent in category:
-                pos = self.find_empty_spot()
-                agent.x = pos[0]
-                agent.y = pos[1]
-                self.add_agent(agent)
+            xs, ys = self.find_empty_spots(len(category))
+            self._place_agents(category, xs, ys)
         elif initial_placement == "direct":
-            for agent in category:
-                self.add_agent(agent)
+            self._place_agents(
+                category,
+                np.array([agent.x for agent in category], dtype=np.int64),
+                np.array([agent.y for agent in category], dtype=np.int64),
+            )
+
+    def _place_agents(self, agent_list: "AgentList", xs: np.ndarray, ys: np.ndarray):
+        """
+        Add all agents of ``agent_list`` onto the grid at once, at positions ``xs``
+        and ``ys``, updating the positions of the agents.
+        """
+        if len(agent_list) == 0:
+            return
+        category = agent_list[0].category
+        for agent in agent_list:
+            if not isinstance(agent, GridAgent):
+                raise TypeError(
+                    f"Parameter `agent` should be of type {GridAgent.__name__} "
+                )
+            agent.grid = self
+        if self._wrap:
+            xs = xs % self._width
+            ys = ys % self._height
+        elif not (
+            ((0 <= xs) & (xs < self._width)).all()
+            and ((0 <= ys) & (ys < self._height)).all()
+        ):
+            raise IndexError("grid index was out of range")
+        if category not in self._occupancies:
+            self.add_category(category)
+        agent_ids = np.array([agent.id for agent in agent_list], dtype=np.int64)
+        targets = xs * self._height + ys
+        self._occupancies[category].add_many(agent_ids, targets)
+        if self._empty_spots is not None:
+            self._empty_spots.discard_many(targets.tolist())
+        if self._dirty_agents is not None:
+            self._mark_agents_dirty(category, agent_ids.tolist())
+        self._sync_agent_positions(category, agent_ids, xs, ys)
 
     def set_spot_property(self, attr_name: str, array_2d):
         """
         Extract property values from a 2d-numpy-array and assign to each spot.
 
+        The values are stored in the layer ``attr_name``, created if needed, see
+        :meth:`add_layer`.
         """
+        array_2d = np.asarray(array_2d)
+        self._check_layer_shape(array_2d)
+        if attr_name in self._layers:
+            self._layers[attr_name][:] = array_2d
+        else:
+            self.add_layer(attr_name, array_2d)
+
+    def _check_layer_shape(self, array_2d):
         assert (
             len(array_2d.shape) == 2
         ), f"The spot property array should be 2-dimensional, but got shape: {array_2d.shape}"
@@ -566,10 +1041,268 @@ class Grid:
         assert (
             len(array_2d[0]) == self._width
         ), f"The columns of spot property matrix is {len(array_2d[0])} while the width of grid is {self._width}."
-        for y, row in enumerate(array_2d):
-            for x, value in enumerate(row):
-                spot = self.get_spot(x, y)
-                setattr(spot, attr_name, value)
+
+    def add_layer(self, name: str, values=0, dtype=None) -> np.ndarray:
+        """
+        Add a layer, a spot property stored as a 2d-numpy-array of shape
+        ``(height, width)`` on the grid, e.g. a pheromone or resource field.
+
+        ``spot.<name>`` reads and writes the cell ``[spot.y, spot.x]`` of the
+        layer, and the whole field can be updated at NumPy speed with
+        :meth:`layer`, :meth:`diffuse`, :meth:`decay` and :meth:`convolve`:
+
+        .. code-block:: python
+
+            self.grid.add_layer("pheromone")
+            ...
+            self.grid.layer("pheromone")[ys, xs] += deposit
+            self.grid.diffuse("pheromone", 0.2)
+            self.grid.decay("pheromone", 0.05)
+
+        :param name: The name of the layer and of the spot property.
+        :param values: Optional. The initial values, a scalar or a 2d-array of
+            shape ``(height, width)``. Defaults to 0.
+        :param dtype: Optional. The dtype of the layer. Defaults to the dtype of
+            ``values``, or float for a scalar.
+        :return: The layer array.
+        """
+        values = np.asarray(values)
+        if values.ndim == 0:
+            dtype = dtype if dtype is not None else float
+        else:
+            self._check_layer_shape(values)
+            dtype = dtype if dtype is not None else values.dtype
+        layer = np.empty((self._height, self._width), dtype=dtype)
+        layer[:] = values
+        self._layers[name] = layer
+        if not isinstance(self._spot_layer_cls.__dict__.get(name), LayerProperty):
+            setattr(self._spot_layer_cls, name, LayerProperty(name, self))
+            self._spot_layer_cls._external_props_ = tuple(
+                self._spot_layer_cls._external_props_
+            ) + (name,)
+        return layer
+
+    def layer(self, name: str) -> np.ndarray:
+        """
+        Get a layer as a 2d-numpy-array of shape ``(height, width)``, so
+        ``layer[y, x]`` belongs to the spot at ``(x, y)``. Writing into the array
+        changes the spot property directly.
+
+        :param name: The name of the layer.
+        :return: The layer array.
+        """
+        layer = self._layers.get(name)
+        if layer is None:
+            raise KeyError(f"Layer {name} is not registered!")
+        return layer
+
+    def decay(self, name: str, rate: float):
+        """
+        Decrease all values of a layer by ``rate`` times their value, e.g. for
+        evaporation.
+
+        :param name: The name of the layer.
+        :param rate: The share of the values lost, between 0 and 1.
+        :return: None
+        """
+        self.layer(name)[:] *= 1 - rate
+
+    def diffuse(self, name: str, rate: float, moore: bool = True):
+        """
+        Diffuse a layer: each spot keeps ``1 - rate`` of its value, and shares
+        ``rate`` of it equally among its 8 (``moore``) or 4 neighbors. Shares
+        cross the borders if the grid wraps, and stay on the spot otherwise, so the
+        total is conserved.
+
+        :param name: The name of the layer.
+        :param rate: The share of the values diffused, between 0 and 1.
+        :param moore: If True, diffuse to the 8 neighbors, otherwise to the 4
+            orthogonal neighbors.
+        :return: None
+        """
+        layer = self.layer(name)
+        layer[:] = diffuse(layer, rate, moore, self._wrap)
+
+    def convolve(self, name: str, kernel) -> np.ndarray:
+        """
+        Correlate a layer with a kernel of odd shape, centered on each spot:
+        ``result[y, x]`` is the sum of ``kernel[i, j] * layer[y + i - ci, x + j - cj]``,
+        with ``(ci, cj)`` the center of the kernel. Cells beyond the borders wrap
+        around if the grid wraps, and count as zeros otherwise.
+
+        For example, a kernel of ones sums the values around each spot.
+
+        :param name: The name of the layer.
+        :param kernel: A 2d-array of odd shape.
+        :return: A new 2d-array of shape ``(height, width)``.
+        """
+        return correlate(self.layer(name), kernel, self._wrap)
+
+    def count_raster(self, category, block: int = 1) -> np.ndarray:
+        """
+        Get the number of agents of a category on each spot, as a 2d-array of
+        shape ``(height, width)`` like a layer. The counts are kept up to date as
+        agents are placed, moved and removed.
+
+        :param category: The category of the agents.
+        :param block: Optional. If larger than 1, the counts are summed over blocks
+            of ``block x block`` spots, for a coarser view of the grid of shape
+            ``(ceil(height / block), ceil(width / block))``.
+        :return: A new 2d-array.
+        """
+        counts = self._get_occupancy(category).counts()
+        raster = counts.reshape(self._width, self._height).T.astype(np.int64)
+        if block > 1:
+            raster = np.add.reduceat(raster, np.arange(0, self._height, block), axis=0)
+            raster = np.add.reduceat(raster, np.arange(0, self._width, block), axis=1)
+        return raster
+
+    def _get_count_table(self, category) -> np.ndarray:
+        """
+        Get the summed-area table of the agent counts of a category, rebuilt at the
+        first query after agents of the category were placed, moved or removed.
+        """
+        occupancy = self._get_occupancy(category)
+        cached = self._count_tables.get(category)
+        if (
+            cached is None
+            or cached[0] is not occupancy
+            or cached[1] != occupancy._version
+        ):
+            table = summed_area_table(self.count_raster(category))
+            cached = self._count_tables[category] = (occupancy, occupancy._version, table)
+        return cached[2]
+
+    def count_agents(self, category, x0: int, y0: int, x1: int, y1: int) -> int:
+        """
+        Count the agents of a category in the rectangle ``x0 <= x <= x1``,
+        ``y0 <= y <= y1``, in O(1) whatever its size, with a summed-area table of
+        the counts. On a wrapping grid, the rectangle wraps around the borders;
+        otherwise, it is clipped.
+
+        :return: The number of agents.
+        """
+        table = self._get_count_table(category)
+        return int(rect_sums(table, x0, y0, x1, y1, self._wrap))
+
+    def count_neighbors(self, category, xs, ys, radius=1, moore=True, except_self=True):
+        """
+        Count the agents of a category in the neighborhood of one or many spots,
+        like ``len(get_neighbors(...))`` restricted to the category, but without
+        visiting the spots of the neighborhoods. With ``moore=True``, the cost per
+        spot is O(1) whatever the radius, and O(radius) otherwise.
+
+        For example, the number of infected agents around every agent is computed
+        at once with:
+
+        .. code-block:: python
+
+            agent_ids, xs, ys = grid.agent_positions(0)
+            num_infected = grid.count_neighbors(INFECTED, xs, ys, radius=10)
+
+        :param category: The category of the counted agents.
+        :param xs: The x coordinate of the center spot, or an array of them.
+        :param ys: The y coordinate of the center spot, or an array of them.
+        :param radius: The radius of the neighborhood.
+        :param moore: If True, the neighborhood is a square, otherwise a diamond.
+        :param except_self: If True, the agents on the center spot are not counted.
+        :return: The number of agents, or a NumPy array of them.
+        """
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        if self._wrap:
+            xs = xs % self._width
+            ys = ys % self._height
+        elif not (
+            ((0 <= xs) & (xs < self._width)).all()
+            and ((0 <= ys) & (ys < self._height)).all()
+        ):
+            raise IndexError("grid index was out of range")
+        table = self._get_count_table(category)
+        if moore:
+            counts = rect_sums(
+                table, xs - radius, ys - radius, xs + radius, ys + radius, self._wrap
+            )
+        else:
+            counts = 0
+            for dy in range(-radius, radius + 1):
+                half_width = radius - abs(dy)
+                counts = counts + rect_sums(
+                    table, xs - half_width, ys + dy, xs + half_width, ys + dy, self._wrap
+                )
+        if except_self:
+            counts = counts - rect_sums(table, xs, ys, xs, ys, self._wrap)
+        return int(counts) if np.ndim(counts) == 0 else counts
+
+    def distance_field(
+        self,
+        targets,
+        passable: Optional[str] = None,
+        cost: Optional[str] = None,
+        moore=True,
+    ) -> DistanceField:
+        """
+        Compute the distances from every spot to the nearest target, and the next
+        step of a shortest path toward it, for agents navigating to resources:
+
+        .. code-block:: python
+
+            field = self.grid.distance_field(exits, passable="floor")
+            for agent in self.agents:
+                self.grid.move_agent(agent, *field.next_step(agent.x, agent.y))
+
+        The field is computed at once for all spots with a multi-source Dijkstra,
+        and cached until the ``passable`` or ``cost`` layer changes, so calling
+        this method every step with the same targets is cheap.
+
+        :param targets: The positions ``(x, y)`` of the targets.
+        :param passable: Optional. The name of a layer, whose spots with a zero or
+            False value cannot be entered. By default, all spots can be entered.
+        :param cost: Optional. The name of a layer of positive values, the cost of
+            moving onto each spot. By default, each move costs 1.
+        :param moore: If True, agents move to the 8 spots around them, otherwise to
+            the 4 spots sharing a side.
+        :return: A :class:`DistanceField`.
+        """
+        targets = np.asarray(targets, dtype=np.int64).reshape(-1, 2)
+        xs, ys = targets[:, 0], targets[:, 1]
+        if self._wrap:
+            xs, ys = xs % self._width, ys % self._height
+        elif not (
+            ((0 <= xs) & (xs < self._width)).all()
+            and ((0 <= ys) & (ys < self._height)).all()
+        ):
+            raise IndexError("grid index was out of range")
+        sources = np.unique(xs * self._height + ys)
+        key = (sources.tobytes(), passable, cost, moore)
+        layers = [self.layer(name) for name in (passable, cost) if name is not None]
+        cached = self._distance_fields.get(key)
+        if cached is not None and all(
+            np.array_equal(snapshot, layer) for snapshot, layer in zip(cached[0], layers)
+        ):
+            return cached[1]
+
+        passable_spots = None
+        if passable is not None:
+            passable_spots = self.layer(passable).T.ravel().astype(bool)
+        cost_spots = None
+        if cost is not None:
+            cost_spots = self.layer(cost).T.ravel()
+            if not (cost_spots > 0).all():
+                raise ValueError(f"The costs of layer '{cost}' should be positive")
+        index = self._get_neighbor_index(1, moore, True)
+        if index is None:
+            index = self._build_neighbor_index(1, moore, True)
+        distances, next_spots = shortest_paths(
+            index[0], index[1], sources, passable_spots, cost_spots
+        )
+        field = DistanceField(self._width, self._height, distances, next_spots)
+        self._distance_fields.pop(key, None)
+        if len(self._distance_fields) >= self.distance_field_cache_size:
+            # Drop the least recently computed field.
+            del self._distance_fields[next(iter(self._distance_fields))]
+        self._distance_fields[key] = ([layer.copy() for layer in layers], field)
+        return field
 
     def rand_move_agent(self, agent: GridAgent, category, range_x, range_y):
         """
@@ -587,8 +1320,9 @@ class Grid:
         source_x = agent.x
         source_y = agent.y
         self._remove_agent(agent.id, category, source_x, source_y)
-        dx = floor((random() * (2 * range_x + 1))) - range_x
-        dy = floor((random() * (2 * range_y + 1))) - range_y
+        rng = self.rng
+        dx = floor((rng.random() * (2 * range_x + 1))) - range_x
+        dy = floor((rng.random() * (2 * range_y + 1))) - range_y
         target_x = source_x + dx
         target_y = source_y + dy
         self._add_agent(agent.id, category, target_x, target_y)
@@ -603,7 +1337,7 @@ class Grid:
 
     @property
     def agent_categories(self):
-        return set(self._existed_agents.keys())
+        return set(self._occupancies.keys())
 
 
 __all__ = ["GridAgent", "GridItem", "Spot", "Grid"]
@@ -0,0 +1,143 @@
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .grid import Grid
+
+
+class LayerProperty:
+    """
+    Data descriptor redirecting a spot attribute to the cell of a grid layer.
+    """
+
+    def __init__(self, name: str, grid: "Grid"):
+        self.name = name
+        self.grid = grid
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return self.grid._layers[self.name].item(instance.y, instance.x)
+
+    def __set__(self, instance, value):
+        self.grid._layers[self.name][instance.y, instance.x] = value
+
+
+class TrackedProperty:
+    """
+    Data descriptor storing a spot attribute in the spot as usual, and recording
+    the spots assigned in ``grid._dirty_spots`` while the grid tracks them.
+    """
+
+    def __init__(self, name: str, grid: "Grid"):
+        self.name = name
+        self.grid = grid
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name)
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.name] = value
+        dirty_spots = self.grid._dirty_spots
+        if dirty_spots is not None:
+            dirty_spots.add(instance.id)
+
+
+def correlate(values: np.ndarray, kernel: np.ndarray, wrap: bool) -> np.ndarray:
+    """
+    Correlate a 2-d array with a kernel of odd shape, centered on each cell:
+    ``result[y, x] = sum(kernel[i, j] * values[y + i - ci, x + j - cj])``, where
+    ``(ci, cj)`` is the center of the kernel.
+
+    :param wrap: If True, cells beyond the borders are read from the opposite side.
+        Otherwise, they count as zeros.
+    """
+    kernel = np.asarray(kernel)
+    kernel_height, kernel_width = kernel.shape
+    if kernel_height % 2 == 0 or kernel_width % 2 == 0:
+        raise ValueError(f"The kernel should have odd dimensions, but got {kernel.shape}")
+    ci, cj = kernel_height // 2, kernel_width // 2
+    height, width = values.shape
+    padded = np.pad(values, ((ci, ci), (cj, cj)), mode="wrap" if wrap else "constant")
+    result = np.zeros(values.shape, dtype=np.result_type(values, kernel, float))
+    for i in range(kernel_height):
+        for j in range(kernel_width):
+            if kernel[i, j] != 0:
+                result += kernel[i, j] * padded[i : i + height, j : j + width]
+    return result
+
+
+def neighborhood_kernel(moore: bool) -> np.ndarray:
+    """
+    The 3x3 kernel of the 8 (Moore) or 4 (von Neumann) neighbors of a cell.
+    """
+    if moore:
+        kernel = np.ones((3, 3))
+    else:
+        kernel = np.array([[0, 1, 0], [1, 0, 1], [0, 1, 0]], dtype=float)
+    kernel[1, 1] = 0
+    return kernel
+
+
+def diffuse(values: np.ndarray, rate: float, moore: bool, wrap: bool) -> np.ndarray:
+    """
+    Each cell keeps ``1 - rate`` of its value, and shares ``rate`` of it equally
+    among its neighbors. On a grid without wrapping, the shares of the neighbors
+    beyond the borders stay in the cell, so the total is conserved.
+    """
+    kernel = neighborhood_kernel(moore)
+    share = values * (rate / kernel.sum())
+    result = values * (1 - rate) + correlate(share, kernel, wrap)
+    if not wrap:
+        missing_neighbors = kernel.sum() - correlate(np.ones(values.shape), kernel, False)
+        result += share * missing_neighbors
+    return result
+
+
+def summed_area_table(values: np.ndarray) -> np.ndarray:
+    """
+    The summed-area table of a 2-d array, of shape ``(height + 1, width + 1)``:
+    ``table[i, j]`` is the sum of ``values[:i, :j]``.
+    """
+    height, width = values.shape
+    table = np.zeros((height + 1, width + 1), dtype=np.int64)
+    np.cumsum(values, axis=0, out=table[1:, 1:])
+    np.cumsum(table[1:, 1:], axis=1, out=table[1:, 1:])
+    return table
+
+
+def _split_interval(low: np.ndarray, high: np.ndarray, size: int, wrap: bool):
+    """
+    Split the inclusive intervals ``[low, high]`` of cells along an axis of
+    ``size`` cells into two half-open intervals within the axis, empty if needed.
+    """
+    if wrap:
+        start = low % size
+        end = start + np.clip(high - low + 1, 0, size)
+        wrapped = (np.zeros_like(start), np.maximum(end - size, 0))
+        return (start, np.minimum(end, size)), wrapped
+    start = np.clip(low, 0, size)
+    end = np.maximum(np.clip(high + 1, 0, size), start)
+    return (start, end), (np.zeros_like(start), np.zeros_like(start))
+
+
+def rect_sums(table: np.ndarray, x0, y0, x1, y1, wrap: bool) -> np.ndarray:
+    """
+    The sums of the values in the rectangles ``x0 <= x <= x1, y0 <= y <= y1``, in
+    O(1) per rectangle with the summed-area table of the values. Rectangles
+    crossing the borders are wrapped if ``wrap``, and clipped otherwise.
+    """
+    height, width = table.shape[0] - 1, table.shape[1] - 1
+    x_pieces = _split_interval(np.asarray(x0), np.asarray(x1), width, wrap)
+    y_pieces = _split_interval(np.asarray(y0), np.asarray(y1), height, wrap)
+    total = 0
+    for xa, xb in x_pieces:
+        for ya, yb in y_pieces:
+            total = total + (table[yb, xb] - table[ya, xb] - table[yb, xa] + table[ya, xa])
+    return total
@@ -0,0 +1,421 @@
+from array import array
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+# Marks an empty spot in ``ArrayOccupancy._heads``, and the end of a spot's list.
+_NONE = -1
+
+
+class SetOccupancy:
+    """
+    The agents of one category on a grid, stored as one ``set`` of agent ids per
+    spot and a dict mapping agent ids to spots.
+
+    Spots are identified by their 1-d position on the grid.
+    """
+
+    def __init__(self, num_spots: int):
+        self._spot_agent_ids: List[Set[int]] = [set() for _ in range(num_spots)]
+        self._positions: Dict[int, int] = {}
+        self._counts = array("i", [0]) * num_spots
+        # Bumped on each change, like ``ArrayOccupancy._version``.
+        self._version = 0
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, agent_id: int):
+        return agent_id in self._positions
+
+    def add(self, agent_id: int, pos_1d: int):
+        """
+        Place an agent on a spot.
+        """
+        if agent_id in self._positions:
+            raise ValueError(f"Agent with id: {agent_id} already exists on grid!")
+        self._spot_agent_ids[pos_1d].add(agent_id)
+        self._positions[agent_id] = pos_1d
+        self._counts[pos_1d] += 1
+        self._version += 1
+
+    def remove(self, agent_id: int) -> int:
+        """
+        Remove an agent from its spot.
+
+        :return: The spot the agent was on.
+        """
+        pos_1d = self._positions.pop(agent_id, _NONE)
+        if pos_1d == _NONE:
+            raise ValueError(f"Agent with id: {agent_id} does not exist on grid!")
+        self._spot_agent_ids[pos_1d].remove(agent_id)
+        self._counts[pos_1d] -= 1
+        self._version += 1
+        return pos_1d
+
+    def position(self, agent_id: int) -> int:
+        """
+        Get the spot of an agent, or raise a ``KeyError`` if it is not on the grid.
+        """
+        return self._positions[agent_id]
+
+    def agent_ids(self, pos_1d: int) -> Set[int]:
+        return self._spot_agent_ids[pos_1d]
+
+    def iter_agent_ids(self, pos_1d: int) -> Iterator[int]:
+        return iter(self._spot_agent_ids[pos_1d])
+
+    def count(self, pos_1d: int) -> int:
+        return self._counts[pos_1d]
+
+    def counts(self) -> np.ndarray:
+        """
+        Get the number of agents on each spot, as a NumPy view of the counts kept
+        up to date by the updates. It should not be written into.
+        """
+        return np.frombuffer(self._counts, dtype=np.int32)
+
+    def placed_agent_ids(self) -> np.ndarray:
+        """
+        Get the ids of the agents on the grid, in ascending order.
+        """
+        return np.sort(np.fromiter(self._positions.keys(), dtype=np.int64))
+
+    def positions_of(self, agent_ids: np.ndarray) -> np.ndarray:
+        """
+        Get the spots of several agents, raising a ``KeyError`` if one of them is
+        not on the grid.
+        """
+        positions = self._positions
+        return np.array([positions[agent_id] for agent_id in agent_ids.tolist()], dtype=np.int64)
+
+    def add_many(self, agent_ids: np.ndarray, targets: np.ndarray):
+        """
+        Place several agents on spots.
+        """
+        for agent_id, target in zip(agent_ids.tolist(), targets.tolist()):
+            self.add(agent_id, target)
+
+    def move_many(self, agent_ids: np.ndarray, targets: np.ndarray) -> np.ndarray:
+        """
+        Move several agents to other spots.
+
+        :return: The spots the agents were on.
+        """
+        sources = self.positions_of(agent_ids)
+        for agent_id, target in zip(agent_ids.tolist(), targets.tolist()):
+            self.remove(agent_id)
+            self.add(agent_id, target)
+        return sources
+
+    def spot_index(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Build a CSR index of the agents on each spot, see
+        :meth:`ArrayOccupancy.spot_index`.
+        """
+        num_agents = len(self._positions)
+        agent_ids = np.fromiter(self._positions.keys(), dtype=np.int64, count=num_agents)
+        positions = np.fromiter(self._positions.values(), dtype=np.int64, count=num_agents)
+        order = np.lexsort((agent_ids, positions))
+        offsets = np.zeros(len(self._spot_agent_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(positions, minlength=len(self._spot_agent_ids)), out=offsets[1:])
+        return offsets, agent_ids[order]
+
+
+class ArrayOccupancy:
+    """
+    The agents of one category on a grid, stored in flat integer arrays instead of
+    one Python object per spot:
+
+    * ``_positions[agent_id]`` is the spot of the agent, or -1;
+    * the agents on a spot form a linked list, starting at ``_heads[spot]`` and
+      chained by ``_next`` and ``_prev``, which are indexed by agent id;
+    * ``_counts[spot]`` is the number of agents on the spot.
+
+    So placing, removing and moving an agent cost O(1), and the memory does not
+    depend on the number of spots times the number of categories, beyond 12 bytes
+    per spot. Agent ids should be small non-negative integers, as assigned by
+    ``AgentList``, because the arrays indexed by agent id are as long as the
+    largest id.
+
+    For vectorized processing, :meth:`spot_index` builds a CSR index of the agents
+    on every spot with a counting sort.
+    """
+
+    def __init__(self, num_spots: int):
+        self._heads = array("q", [_NONE]) * num_spots
+        self._counts = array("i", [0]) * num_spots
+        self._positions = array("q")
+        self._next = array("q")
+        self._prev = array("q")
+        self._num_agents = 0
+        # Bumped on each change, to know whether the cached spot index is valid.
+        self._version = 0
+        self._spot_index_cache = None
+
+    def __len__(self):
+        return self._num_agents
+
+    def __contains__(self, agent_id: int):
+        return 0 <= agent_id < len(self._positions) and self._positions[agent_id] != _NONE
+
+    def _grow(self, agent_id: int):
+        extension = max(agent_id + 1, 2 * len(self._positions)) - len(self._positions)
+        filler = array("q", [_NONE]) * extension
+        self._positions.extend(filler)
+        self._next.extend(filler)
+        self._prev.extend(filler)
+
+    def add(self, agent_id: int, pos_1d: int):
+        """
+        Place an agent on a spot.
+        """
+        if agent_id < 0:
+            raise ValueError(f"Agent id should be non-negative, but got {agent_id}")
+        if agent_id >= len(self._positions):
+            self._grow(agent_id)
+        elif self._positions[agent_id] != _NONE:
+            raise ValueError(f"Agent with id: {agent_id} already exists on grid!")
+        heads = self._heads
+        prev_ids = self._prev
+        head = heads[pos_1d]
+        self._next[agent_id] = head
+        prev_ids[agent_id] = _NONE
+        if head != _NONE:
+            prev_ids[head] = agent_id
+        heads[pos_1d] = agent_id
+        self._positions[agent_id] = pos_1d
+        self._counts[pos_1d] += 1
+        self._num_agents += 1
+        self._version += 1
+
+    def remove(self, agent_id: int) -> int:
+        """
+        Remove an agent from its spot.
+
+        :return: The spot the agent was on.
+        """
+        positions = self._positions
+        pos_1d = positions[agent_id] if 0 <= agent_id < len(positions) else _NONE
+        if pos_1d == _NONE:
+            raise ValueError(f"Agent with id: {agent_id} does not exist on grid!")
+        next_ids = self._next
+        prev_ids = self._prev
+        prev_id = prev_ids[agent_id]
+        next_id = next_ids[agent_id]
+        if prev_id != _NONE:
+            next_ids[prev_id] = next_id
+        else:
+            self._heads[pos_1d] = next_id
+        if next_id != _NONE:
+            prev_ids[next_id] = prev_id
+        positions[agent_id] = _NONE
+        self._counts[pos_1d] -= 1
+        self._num_agents -= 1
+        self._version += 1
+        return pos_1d
+
+    def position(self, agent_id: int) -> int:
+        """
+        Get the spot of an agent, or raise a ``KeyError`` if it is not on the grid.
+        """
+        positions = self._positions
+        pos_1d = positions[agent_id] if 0 <= agent_id < len(positions) else _NONE
+        if pos_1d == _NONE:
+            raise KeyError(agent_id)
+        return pos_1d
+
+    def agent_ids(self, pos_1d: int) -> Set[int]:
+        return set(self.iter_agent_ids(pos_1d))
+
+    def iter_agent_ids(self, pos_1d: int) -> Iterator[int]:
+        next_ids = self._next
+        agent_id = self._heads[pos_1d]
+        while agent_id != _NONE:
+            yield agent_id
+            agent_id = next_ids[agent_id]
+
+    def count(self, pos_1d: int) -> int:
+        return self._counts[pos_1d]
+
+    def counts(self) -> np.ndarray:
+        """
+        Get the number of agents on each spot, see :meth:`SetOccupancy.counts`.
+        """
+        return np.frombuffer(self._counts, dtype=np.int32)
+
+    def placed_agent_ids(self) -> np.ndarray:
+        """
+        Get the ids of the agents on the grid, in ascending order.
+        """
+        return np.flatnonzero(np.array(self._positions, dtype=np.int64) != _NONE)
+
+    def positions_of(self, agent_ids: np.ndarray) -> np.ndarray:
+        """
+        Get the spots of several agents, raising a ``KeyError`` if one of them is
+        not on the grid.
+        """
+        positions = np.frombuffer(self._positions, dtype=np.int64)
+        in_range = (agent_ids >= 0) & (agent_ids < len(positions))
+        if not in_range.all():
+            raise KeyError(int(agent_ids[~in_range][0]))
+        result = positions[agent_ids]
+        if (result == _NONE).any():
+            raise KeyError(int(agent_ids[result == _NONE][0]))
+        return result
+
+    def add_many(self, agent_ids: np.ndarray, targets: np.ndarray):
+        """
+        Place several agents on spots. Like :meth:`move_many`, many agents are
+        placed at once by rebuilding the spot lists.
+        """
+        if len(agent_ids) * 8 < self._num_agents or len(agent_ids) == 0:
+            for agent_id, target in zip(agent_ids.tolist(), targets.tolist()):
+                self.add(agent_id, target)
+            return
+        if agent_ids.min() < 0:
+            raise ValueError(f"Agent id should be non-negative, but got {agent_ids.min()}")
+        max_id = int(agent_ids.max())
+        if max_id >= len(self._positions):
+            self._grow(max_id)
+        positions = np.frombuffer(self._positions, dtype=np.int64)
+        unique_ids, id_counts = np.unique(agent_ids, return_counts=True)
+        duplicated = unique_ids[(positions[unique_ids] != _NONE) | (id_counts > 1)]
+        if len(duplicated) > 0:
+            raise ValueError(f"Agent with id: {duplicated[0]} already exists on grid!")
+        positions[agent_ids] = targets
+        self._rebuild_spot_lists()
+
+    def move_many(self, agent_ids: np.ndarray, targets: np.ndarray) -> np.ndarray:
+        """
+        Move several agents to other spots.
+
+        Moving a small share of the agents patches the linked lists agent by agent.
+        Otherwise, the new positions are written at once, and the linked lists and
+        counts are rebuilt with a counting sort of the agents by spot.
+
+        :return: The spots the agents were on.
+        """
+        sources = self.positions_of(agent_ids)
+        if len(agent_ids) * 8 < self._num_agents:
+            for agent_id, target in zip(agent_ids.tolist(), targets.tolist()):
+                self.remove(agent_id)
+                self.add(agent_id, target)
+        else:
+            np.frombuffer(self._positions, dtype=np.int64)[agent_ids] = targets
+            self._rebuild_spot_lists()
+        return sources
+
+    def _rebuild_spot_lists(self):
+        """
+        Rebuild the linked lists of agents and the counts of all spots from the
+        positions of the agents.
+        """
+        positions = np.frombuffer(self._positions, dtype=np.int64)
+        heads = np.frombuffer(self._heads, dtype=np.int64)
+        next_ids = np.frombuffer(self._next, dtype=np.int64)
+        prev_ids = np.frombuffer(self._prev, dtype=np.int64)
+        placed = np.flatnonzero(positions != _NONE)
+        order = placed[np.argsort(positions[placed], kind="stable")]
+        spots = positions[order]
+        heads.fill(_NONE)
+        np.frombuffer(self._counts, dtype=np.int32)[:] = np.bincount(
+            spots, minlength=len(heads)
+        )
+        if len(order) > 0:
+            # Agents sorted by spot, each pointing to the next agent on the same spot.
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = spots[1:] != spots[:-1]
+            last = np.ones(len(order), dtype=bool)
+            last[:-1] = first[1:]
+            heads[spots[first]] = order[first]
+            next_ids[order[:-1]] = np.where(last[:-1], _NONE, order[1:])
+            next_ids[order[-1]] = _NONE
+            prev_ids[order[1:]] = np.where(first[1:], _NONE, order[:-1])
+            prev_ids[order[0]] = _NONE
+        self._num_agents = len(order)
+        self._version += 1
+
+    def spot_index(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Build a CSR index of the agents on each spot: the ids of the agents on spot
+        ``s`` are ``agent_ids[offsets[s]:offsets[s + 1]]``, in ascending order.
+
+        The index is built with a counting sort of the agents by spot, and cached
+        until an agent is placed, moved or removed.
+
+        :return: A tuple ``(offsets, agent_ids)`` of NumPy arrays.
+        """
+        if self._spot_index_cache is None or self._spot_index_cache[0] != self._version:
+            positions = np.array(self._positions, dtype=np.int64)
+            placed = np.flatnonzero(positions != _NONE)
+            agent_ids = placed[np.argsort(positions[placed], kind="stable")]
+            offsets = np.zeros(len(self._counts) + 1, dtype=np.int64)
+            np.cumsum(np.array(self._counts, dtype=np.int64), out=offsets[1:])
+            self._spot_index_cache = (self._version, offsets, agent_ids)
+        return self._spot_index_cache[1], self._spot_index_cache[2]
+
+
+class SpotSet:
+    """
+    A set of spots supporting O(1) membership tests, insertions, removals and
+    random access, e.g. to sample a random empty spot.
+
+    The spots are kept in an array, and ``_index[spot]`` is the position of a spot
+    in this array, or -1. A removed spot is replaced by the last spot of the
+    array, so the array stays dense.
+    """
+
+    def __init__(self, num_spots: int, spots: Optional[np.ndarray] = None):
+        """
+        :param num_spots: The number of spots on the grid.
+        :param spots: The spots initially in the set, if any.
+        """
+        # 4-byte integers are enough for grids of less than 2**31 spots.
+        typecode, dtype = ("i", np.int32) if num_spots < 2**31 else ("q", np.int64)
+        index = np.full(num_spots, _NONE, dtype=dtype)
+        if spots is None:
+            spots = np.zeros(0, dtype=dtype)
+        spots = np.asarray(spots, dtype=dtype)
+        index[spots] = np.arange(len(spots), dtype=dtype)
+        self._spots = array(typecode, spots.tobytes())
+        self._index = array(typecode, index.tobytes())
+
+    def __len__(self):
+        return len(self._spots)
+
+    def __contains__(self, spot: int):
+        return self._index[spot] != _NONE
+
+    def __iter__(self):
+        return iter(self._spots)
+
+    def __getitem__(self, i: int) -> int:
+        return self._spots[i]
+
+    def add(self, spot: int):
+        if self._index[spot] == _NONE:
+            self._index[spot] = len(self._spots)
+            self._spots.append(spot)
+
+    def discard(self, spot: int):
+        index = self._index
+        i = index[spot]
+        if i != _NONE:
+            spots = self._spots
+            last = spots.pop()
+            if last != spot:
+                spots[i] = last
+                index[last] = i
+            index[spot] = _NONE
+
+    def discard_many(self, spots):
+        discard = self.discard
+        for spot in spots:
+            discard(spot)
+
+    def to_array(self) -> np.ndarray:
+        """
+        Get the spots of this set as a NumPy array, in no particular order.
+        """
+        return np.array(self._spots, dtype=np.int64)
@@ -0,0 +1,112 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class DistanceField:
+    """
+    The distances from every spot of a grid to the nearest of a set of target
+    spots, and the first step of a shortest path from every spot, as computed by
+    ``Grid.distance_field``.
+
+    Looking up the distance or the next step of a spot costs O(1), so agents can
+    follow the field every step:
+
+    .. code-block:: python
+
+        field = self.grid.distance_field(shop_positions, passable="road")
+        self.grid.move_agent(self, *field.next_step(self.x, self.y))
+    """
+
+    def __init__(
+        self, width: int, height: int, distances: np.ndarray, next_spots: np.ndarray
+    ):
+        self._height = height
+        self._distances = distances
+        self._next_spots = next_spots
+        # A view of shape ``(height, width)``, like a layer: ``distances[y, x]``
+        # is the distance of the spot at ``(x, y)``, or ``inf`` if no target
+        # can be reached from it.
+        self.distances: np.ndarray = distances.reshape(width, height).T
+
+    def distance(self, x: int, y: int) -> float:
+        """
+        The distance from the spot at ``(x, y)`` to the nearest target, or ``inf``
+        if no target can be reached.
+        """
+        return self._distances.item(x * self._height + y)
+
+    def next_step(self, x: int, y: int) -> Tuple[int, int]:
+        """
+        The neighbor spot to move to from ``(x, y)`` to get closer to the nearest
+        target, or ``(x, y)`` itself on a target or if no target can be reached.
+        """
+        return divmod(self._next_spots.item(x * self._height + y), self._height)
+
+    def next_steps(
+        self, xs: np.ndarray, ys: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The next steps of several spots at once, see :meth:`next_step`.
+
+        :return: A tuple ``(xs, ys)`` of NumPy arrays.
+        """
+        spots = np.asarray(xs) * self._height + np.asarray(ys)
+        return np.divmod(self._next_spots[spots], self._height)
+
+
+def shortest_paths(
+    spot_offsets: np.ndarray,
+    neighbors: np.ndarray,
+    sources: np.ndarray,
+    passable: Optional[np.ndarray] = None,
+    cost: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the distances from all spots to the nearest source, with SciPy's
+    multi-source Dijkstra, and the next step of a shortest path from each spot.
+
+    Moving onto a spot costs ``cost[spot]``, or 1. Impassable spots are neither
+    entered nor left.
+
+    :param spot_offsets: The CSR index of the neighbors of all spots, whose
+        neighbors are ``neighbors[spot_offsets[s]:spot_offsets[s + 1]]``.
+    :param sources: The 1-d positions of the sources.
+    :param passable: Optional. A boolean array of all spots, by 1-d position.
+    :param cost: Optional. A positive array of all spots, by 1-d position.
+    :return: A tuple ``(distances, next_spots)`` of arrays of all spots.
+    """
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import dijkstra
+
+    num_spots = len(spot_offsets) - 1
+    spots = np.repeat(np.arange(num_spots), np.diff(spot_offsets))
+    kept = spots != neighbors
+    if passable is not None:
+        kept &= passable[spots] & passable[neighbors]
+    spots, neighbors = spots[kept], neighbors[kept]
+    offsets = np.zeros(num_spots + 1, dtype=np.int64)
+    np.cumsum(np.bincount(spots, minlength=num_spots), out=offsets[1:])
+    graph = csr_matrix(
+        (np.ones(len(spots)), neighbors, offsets), shape=(num_spots, num_spots)
+    )
+    # On small wrapping grids, a spot can be a neighbor twice.
+    graph.sum_duplicates()
+    offsets, neighbors = graph.indptr, graph.indices
+    spots = np.repeat(np.arange(num_spots), np.diff(offsets))
+
+    # Dijkstra runs from the sources along reversed edges, where going from a
+    # spot to its neighbor costs moving from the neighbor onto the spot.
+    graph.data = np.ones(len(spots)) if cost is None else cost[spots].astype(float)
+    distances = dijkstra(graph, directed=True, indices=sources, min_only=True)
+
+    # The next step of a spot is its neighbor minimizing the cost of moving onto
+    # it plus its distance, ties broken by 1-d position.
+    scores = distances[neighbors] + (1.0 if cost is None else cost[neighbors])
+    order = np.lexsort((scores, spots))
+    next_spots = np.arange(num_spots)
+    has_neighbors = offsets[1:] > offsets[:-1]
+    next_spots[has_neighbors] = neighbors[order[offsets[:-1][has_neighbors]]]
+    stays = ~np.isfinite(distances) | (distances == 0)
+    next_spots[stays] = np.flatnonzero(stays)
+    return distances, next_spots
@@ -0,0 +1,129 @@
+import zlib
+from typing import Any, List, MutableSequence, Optional, Sequence, Union
+
+import numpy as np
+
+
+def stream_key(value: Any) -> int:
+    """
+    Convert an identifier, such as a scenario id, to a non-negative integer usable
+    in the ``spawn_key`` of a ``SeedSequence``.
+    """
+    if isinstance(value, (int, np.integer)) and value >= 0:
+        return int(value)
+    return zlib.crc32(repr(value).encode("utf-8"))
+
+
+class RandomStream:
+    """
+    A stream of random numbers backed by a NumPy ``Generator``, with its own state.
+
+    Scalar draws, e.g. ``rng.random()``, are served from a buffer filled by batched
+    draws, which makes them about as cheap as ``random.random()``. Batched draws,
+    e.g. ``rng.random(n)``, return NumPy arrays, so per-agent probability checks can
+    be vectorized:
+
+    .. code-block:: python
+
+        infected = rng.random(len(agents)) < infection_prob
+
+    Independent child streams can be created with :meth:`spawn`.
+    """
+
+    def __init__(
+        self,
+        seed_sequence: Optional[np.random.SeedSequence] = None,
+        generator: Optional[np.random.Generator] = None,
+        buffer_size: int = 1024,
+    ):
+        """
+        :param seed_sequence: Optional. The seed sequence of this stream. If not
+            provided, fresh entropy is used.
+        :param generator: Optional. An existing NumPy generator to draw from,
+            instead of creating one from ``seed_sequence``.
+        :param buffer_size: Number of values drawn at once for scalar draws.
+        """
+        if generator is None:
+            if seed_sequence is None:
+                seed_sequence = np.random.SeedSequence()
+            generator = np.random.Generator(np.random.PCG64(seed_sequence))
+        self.seed_sequence: Optional[np.random.SeedSequence] = seed_sequence
+        self.generator: np.random.Generator = generator
+        self._buffer_size = buffer_size
+        self._buffer: List[float] = []
+        self._position = 0
+
+    def random(self, size: Union[int, Sequence[int], None] = None):
+        """
+        Draw uniform floats in ``[0, 1)``.
+
+        :param size: Optional. If omitted, a python float is returned. Otherwise, a
+            NumPy array of this shape.
+        """
+        if size is not None:
+            return self.generator.random(size)
+        position = self._position
+        if position == len(self._buffer):
+            self._buffer = self.generator.random(self._buffer_size).tolist()
+            position = 0
+        self._position = position + 1
+        return self._buffer[position]
+
+    def integers(self, low: int, high: Optional[int] = None, size=None):
+        """
+        Draw integers in ``[low, high)``, or in ``[0, low)`` if ``high`` is omitted.
+
+        :param size: Optional. If omitted, a python int is returned. Otherwise, a
+            NumPy array of this shape.
+        """
+        if high is None:
+            low, high = 0, low
+        if size is not None:
+            return self.generator.integers(low, high, size)
+        return low + int(self.random() * (high - low))
+
+    def choice(self, seq: Sequence):
+        """
+        Choose one element of a non-empty sequence.
+        """
+        return seq[int(self.random() * len(seq))]
+
+    def sample(self, population: Sequence, k: int) -> List:
+        """
+        Choose ``k`` distinct elements of ``population``, like ``random.sample``.
+
+        Small samples from large populations cost O(k).
+        """
+        n = len(population)
+        if not 0 <= k <= n:
+            raise ValueError("Sample larger than population or is negative")
+        if k * 4 > n:
+            return [population[i] for i in self.generator.permutation(n)[:k].tolist()]
+        selected = set()
+        result = []
+        while len(result) < k:
+            i = int(self.random() * n)
+            if i not in selected:
+                selected.add(i)
+                result.append(population[i])
+        return result
+
+    def shuffle(self, seq: MutableSequence):
+        """
+        Shuffle a mutable sequence in place.
+        """
+        self.generator.shuffle(seq)
+
+    def permutation(self, n: int) -> np.ndarray:
+        """
+        Get a random permutation of ``range(n)``.
+        """
+        return self.generator.permutation(n)
+
+    def spawn(self, n: int) -> List["RandomStream"]:
+        """
+        Create ``n`` independent child streams.
+        """
+        if self.seed_sequence is None:
+            return [RandomStream(generator=child) for child in self.generator.spawn(n)]
+        return [RandomStream(child) for child in self.seed_sequence.spawn(n)]
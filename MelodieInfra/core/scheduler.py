@@ -0,0 +1,178 @@
+from operator import methodcaller
+from typing import TYPE_CHECKING, Dict, Iterable, List, Sequence
+
+from .agent import Agent
+from .api import default_random_stream
+
+if TYPE_CHECKING:
+    from .agent_list import AgentList
+    from .rng import RandomStream
+
+
+class Scheduler:
+    """
+    Base class of activation schedulers, which call a method of the agents in an
+    ``AgentList`` once per period.
+
+    Instead of writing ``for agent in agents: agent.step()`` in the environment,
+    create a scheduler with ``Model.create_scheduler()`` and call its :meth:`step`
+    once per period of ``Model.iterator()``:
+
+    .. code-block:: python
+
+        self.scheduler = self.create_scheduler(RandomActivation, self.agents)
+        for t in self.iterator(self.scenario.period_num):
+            self.scheduler.step()
+
+    Agents added during a step are activated from the next step on. Agents removed
+    during a step are not activated anymore.
+    """
+
+    def __init__(self, agent_list: "AgentList", method: str = "step"):
+        """
+        :param agent_list: The agents to activate.
+        :param method: Name of the agent method called on activation.
+        """
+        self.agent_list = agent_list
+        self.method = method
+        # Number of steps done.
+        self.steps = 0
+
+    @property
+    def rng(self) -> "RandomStream":
+        """
+        The random stream of the model owning the agent list.
+        """
+        return getattr(self.agent_list.model, "rng", None) or default_random_stream()
+
+    def step(self):
+        """
+        Activate the agents of the current period.
+
+        :return: None
+        """
+        self._activate(methodcaller(self.method))
+        self.steps += 1
+
+    def _activate(self, call: methodcaller):
+        raise NotImplementedError
+
+    def _call_in_order(self, call: methodcaller, order: Iterable[int]):
+        """
+        Call ``call`` on the agents at positions ``order`` of the agent list,
+        skipping agents removed meanwhile.
+        """
+        for agent in self.agent_list._iter_positions(order):
+            call(agent)
+
+
+class SequentialActivation(Scheduler):
+    """
+    Activate all agents in the order of the agent list.
+    """
+
+    def _activate(self, call: methodcaller):
+        self._call_in_order(call, range(len(self.agent_list)))
+
+
+class RandomActivation(Scheduler):
+    """
+    Activate all agents in a new random order every step.
+
+    The order is a permutation of positions drawn from the model's random stream,
+    so the agent list is neither copied nor shuffled.
+    """
+
+    def _activate(self, call: methodcaller):
+        order = self.rng.permutation(len(self.agent_list)).tolist()
+        self._call_in_order(call, order)
+
+
+class StagedActivation(Scheduler):
+    """
+    Activate all agents in several stages per step, e.g. every agent moves, and
+    then every agent interacts. Each stage calls another agent method.
+    """
+
+    def __init__(
+        self,
+        agent_list: "AgentList",
+        stages: Sequence[str] = ("step",),
+        shuffle: bool = False,
+        shuffle_between_stages: bool = False,
+    ):
+        """
+        :param agent_list: The agents to activate.
+        :param stages: Names of the agent methods called in each stage, in order.
+        :param shuffle: If True, agents are activated in a random order, drawn once
+            per step.
+        :param shuffle_between_stages: If True, a new random order is drawn for
+            each stage.
+        """
+        super().__init__(agent_list, method=stages[0])
+        self.stages: List[str] = list(stages)
+        self.shuffle = shuffle
+        self.shuffle_between_stages = shuffle_between_stages
+
+    def step(self):
+        order = None
+        for stage in self.stages:
+            call = methodcaller(stage)
+            if self.shuffle_between_stages or (self.shuffle and order is None):
+                order = self.rng.permutation(len(self.agent_list)).tolist()
+            self._call_in_order(call, order or range(len(self.agent_list)))
+        self.steps += 1
+
+
+class SparseActivation(Scheduler):
+    """
+    Activate only the agents flagged as active, so a step costs O(number of active
+    agents) instead of O(number of agents).
+
+    Agents stay active until they are deactivated, and are activated in the order
+    they were flagged, or in a random order if ``shuffle`` is True. Agents flagged
+    during a step are activated from the next step on.
+
+    .. code-block:: python
+
+        scheduler = self.create_scheduler(SparseActivation, self.agents, method="recover")
+        scheduler.activate(agent)  # e.g. when the agent gets infected
+        scheduler.deactivate(agent)  # e.g. in ``agent.recover()``, once recovered
+    """
+
+    def __init__(self, agent_list: "AgentList", method: str = "step", shuffle=False):
+        super().__init__(agent_list, method)
+        self.shuffle = shuffle
+        self._active: Dict[int, Agent] = {}
+
+    def __len__(self):
+        return len(self._active)
+
+    def activate(self, agent: Agent):
+        """
+        Flag an agent as active.
+        """
+        self._active[agent.id] = agent
+
+    def deactivate(self, agent: Agent):
+        """
+        Flag an agent as inactive. Inactive agents are ignored.
+        """
+        self._active.pop(agent.id, None)
+
+    def is_active(self, agent: Agent) -> bool:
+        return self._active.get(agent.id) is agent
+
+    def _activate(self, call: methodcaller):
+        active = list(self._active.values())
+        if self.shuffle:
+            active = [active[i] for i in self.rng.permutation(len(active)).tolist()]
+        indices = self.agent_list.indices
+        flags = self._active
+        for agent in active:
+            agent_id = agent.id
+            if agent_id not in indices:
+                # Removed from the agent list.
+                flags.pop(agent_id, None)
+            elif flags.get(agent_id) is agent:
+                call(agent)
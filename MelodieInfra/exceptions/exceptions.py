@@ -318,6 +318,20 @@ class MelodieExceptions:
                 f"Agent container `{agent_container_name}` has duplicated agent IDs: {duplicated_ids}.",
             )
 
+        @staticmethod
+        def AgentPropertyNotColumnar(property_name: str, agent_container):
+            """
+            Only properties declared in ``columns`` of a columnar ``AgentList`` can
+            be accessed as an array.
+
+            * code: 1304
+            """
+            return MelodieException(
+                1304,
+                f"Property '{property_name}' is not a column of agent container {agent_container}. "
+                f"Please declare it in the `columns` argument when creating the AgentList.",
+            )
+
     class Environment:
         ID = 1400
 
@@ -4,9 +4,11 @@
 # @Email: 1295752786@qq.com
 # @File: model_static_inspector.py
 import ast
+import inspect
 import os
 import sys
-from typing import TYPE_CHECKING, Dict, List, Optional, Type, Union
+import textwrap
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Type, Union
 
 import astunparse
 import pprintast
@@ -140,6 +142,53 @@ def scan_attributes(cls_ast: ast.ClassDef) -> ClassStructure:
     return ClassStructure.from_cls_ast(cls_ast)
 
 
+def scan_assigned_attributes(
+    cls: Type, method_names: Tuple[str, ...] = ("__init__", "setup")
+) -> Optional[List[str]]:
+    """
+    Scan the names of attributes assigned as ``self.<name> = ...`` in the methods
+    ``method_names`` of ``cls`` and of its base classes.
+
+    :param cls: The class to scan.
+    :param method_names: Names of the methods to scan.
+    :return: A list of attribute names in the order of first assignment, or
+        ``None`` if the source code of some class is not available.
+    """
+    names: Dict[str, None] = {}
+    for klass in reversed(cls.__mro__):
+        if klass is object:
+            continue
+        try:
+            source = textwrap.dedent(inspect.getsource(klass))
+        except (OSError, TypeError):
+            return None
+        cls_ast = ast.parse(source).body[0]
+        for method_ast in cls_ast.body:
+            if (
+                isinstance(method_ast, ast.FunctionDef)
+                and method_ast.name in method_names
+            ):
+                for node in ast.walk(method_ast):
+                    if isinstance(node, ast.Assign):
+                        targets = node.targets
+                    elif isinstance(node, (ast.AnnAssign, ast.AugAssign)):
+                        targets = [node.target]
+                    else:
+                        continue
+                    for target in targets:
+                        elements = (
+                            target.elts if isinstance(target, ast.Tuple) else [target]
+                        )
+                        for element in elements:
+                            if (
+                                isinstance(element, ast.Attribute)
+                                and isinstance(element.value, ast.Name)
+                                and element.value.id == "self"
+                            ):
+                                names[element.attr] = None
+    return list(names.keys())
+
+
 def find_class_in_files(cls_name: str, files_dir: str):
     print(files_dir)
     for root, dirs, files in os.walk(files_dir):
@@ -114,7 +114,7 @@ def sub_routine_trainer(
 
     import logging
 
-    from Melodie import Agent, AgentList, Config, Environment, Trainer
+    from Melodie import Agent, AgentList, AgentPool, Config, Environment, Trainer
 
     logging.basicConfig(
         stream=sys.stderr,
@@ -137,6 +137,8 @@ def sub_routine_trainer(
         worker.put_result(base64.b64encode(dumped))
         return
 
+    # Agents are reused by the models run in this worker, one after another.
+    agent_pool = AgentPool()
     while 1:
         try:
             t0 = time.time()
@@ -150,6 +152,7 @@ def sub_routine_trainer(
             scenario._setup(d)
             # scenario.set_params(d)
             model = model_cls(config, scenario)
+            model._use_agent_pool(agent_pool)
 
             model.create()
             model._setup()
@@ -172,6 +175,7 @@ def sub_routine_trainer(
                     row["agent_id"] = row.pop("id")
             env: Environment = model.environment
             env_data = env.to_dict(trainer.environment_properties)
+            model._release_agents()
             dumped = cloudpickle.dumps((chrom, agent_data, env_data))
 
             worker.put_result(base64.b64encode(dumped))
@@ -203,7 +207,7 @@ def sub_routine_calibrator(
     """
     import logging
 
-    from Melodie import Config, Environment
+    from Melodie import AgentPool, Config, Environment
 
     logging.basicConfig(stream=sys.stderr, level=logging.DEBUG)
     logger = logging.getLogger(f"Calibrator-processor-{proc_id}")
@@ -217,6 +221,8 @@ def sub_routine_calibrator(
 
         traceback.print_exc()
         return
+    # Agents are reused by the models run in this worker, one after another.
+    agent_pool = AgentPool()
     while 1:
         try:
             ret = worker.get_task()
@@ -230,6 +236,7 @@ def sub_routine_calibrator(
             scenario.set_params(env_params, asserts_key_exist=False)
 
             model = model_cls(config, scenario)
+            model._use_agent_pool(agent_pool)
             model.create()
             model._setup()
             model.run()
@@ -248,6 +255,7 @@ def sub_routine_calibrator(
             env_data["target_function_value"] = env_data[
                 "distance"
             ] = calibrator.distance(model)
+            model._release_agents()
             dumped = cloudpickle.dumps((chrom, agent_data, env_data))
             t1 = time.time()
             logger.info(
@@ -1,7 +1,7 @@
 """
 Compatibility layer for internal table types and pandas data frame.
 """
-from typing import TYPE_CHECKING, Callable, Iterator, List, Union
+from typing import TYPE_CHECKING, Any, Callable, Iterator, List, Union
 
 import pandas as pd
 
@@ -32,6 +32,31 @@ class TableInterface:
                 raise TypeError(self.df)
             return TableInterface(self.df[self.df.apply(condition, axis=1)])
 
+    def filter_equal(self, column: str, value: Any) -> "TableInterface":
+        """
+        Filter records whose value in ``column`` equals ``value``.
+
+        Unlike ``filter``, pandas data frames are filtered with a vectorized
+        boolean mask instead of a python call per row.
+        """
+        if isinstance(self.df, TableBase):
+            return self.filter(lambda row: row[column] == value)
+        else:
+            if not isinstance(self.df, pd.DataFrame):
+                raise TypeError(self.df)
+            return TableInterface(self.df[self.df[column] == value])
+
+    def column_values(self, column: str) -> List[Any]:
+        """
+        Get all values in ``column`` as a list of python objects.
+        """
+        if isinstance(self.df, TableBase):
+            return [row[column] for row in self.df.data]
+        else:
+            if not isinstance(self.df, pd.DataFrame):
+                raise TypeError(self.df)
+            return self.df[column].tolist()
+
     def iter_dicts(self) -> Iterator[dict]:
         """
         Row iteration interface for both internal table types or pandas table types
@@ -1,8 +1,10 @@
-import random
 from Melodie import Agent
 
 
 class CovidAgent(Agent):
+    # Agent lists keep running counts of `health_state`, see `CovidEnvironment.update_population_stats`.
+    _tracked_props_ = ("health_state",)
+
     def setup(self) -> None:
         """
         Initializes the agent's state.
@@ -14,6 +16,6 @@ class CovidAgent(Agent):
         """
         Agent-level logic for transitioning from infected to recovered.
         """
-        if self.health_state == 1 and random.random() < recovery_prob:
+        if self.health_state == 1 and self.model.rng.random() < recovery_prob:
             self.health_state = 2
 
@@ -1,4 +1,3 @@
-import random
 from typing import TYPE_CHECKING
 
 from Melodie import Environment
@@ -21,11 +20,10 @@ class CovidEnvironment(Environment):
 
     def setup_infection(self, agents: "AgentList[CovidAgent]") -> None:
         # Sets the initial percentage of infected agents based on scenario parameters.
-        for agent in agents:
-            if (
-                agent.health_state == 0
-                and random.random() < self.scenario.initial_infected_percentage
-            ):
+        # The probability checks of all agents are drawn at once from the model's random stream.
+        infected = self.model.rng.random(len(agents)) < self.scenario.initial_infected_percentage
+        for agent, is_infected in zip(agents, infected):
+            if agent.health_state == 0 and is_infected:
                 agent.health_state = 1
 
     def agents_interaction(self, agents: "AgentList[CovidAgent]") -> None:
@@ -36,7 +34,7 @@ class CovidEnvironment(Environment):
                 # Note: Melodie's AgentList.random_sample returns a list
                 other_agent = agents.random_sample(1)[0]
                 if other_agent.health_state == 0:
-                    if random.random() < self.scenario.infection_prob:
+                    if self.model.rng.random() < self.scenario.infection_prob:
                         other_agent.health_state = 1
     
     def agents_recover(self, agents: "AgentList[CovidAgent]") -> None:
@@ -45,15 +43,9 @@ class CovidEnvironment(Environment):
             agent.health_state_update(self.scenario.recovery_prob)
 
     def update_population_stats(self, agents: "AgentList[CovidAgent]") -> None:
-        # Aggregates agent states into environment-level population counts.
-        self.num_susceptible = 0
-        self.num_infected = 0
-        self.num_recovered = 0
-
-        for agent in agents:
-            if agent.health_state == 0:
-                self.num_susceptible += 1
-            elif agent.health_state == 1:
-                self.num_infected += 1
-            elif agent.health_state == 2:
-                self.num_recovered += 1
+        # Reads environment-level population counts from the running counts kept
+        # by the agent list, as `health_state` is tracked by `CovidAgent`.
+        counts = agents.stats("health_state").counts
+        self.num_susceptible = counts.get(0, 0)
+        self.num_infected = counts.get(1, 0)
+        self.num_recovered = counts.get(2, 0)
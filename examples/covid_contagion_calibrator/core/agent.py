@@ -1,4 +1,3 @@
-import random
 from Melodie import Agent
 
 
@@ -14,6 +13,6 @@ class CovidAgent(Agent):
         """
         Agent-level logic for transitioning from infected to recovered.
         """
-        if self.health_state == 1 and random.random() < recovery_prob:
+        if self.health_state == 1 and self.model.rng.random() < recovery_prob:
             self.health_state = 2
 
@@ -1,4 +1,3 @@
-import random
 from typing import TYPE_CHECKING
 
 from Melodie import Environment
@@ -24,7 +23,7 @@ class CovidEnvironment(Environment):
         for agent in agents:
             if (
                 agent.health_state == 0
-                and random.random() < self.scenario.initial_infected_percentage
+                and self.model.rng.random() < self.scenario.initial_infected_percentage
             ):
                 agent.health_state = 1
 
@@ -36,7 +35,7 @@ class CovidEnvironment(Environment):
                 # Note: Melodie's AgentList.random_sample returns a list
                 other_agent = agents.random_sample(1)[0]
                 if other_agent.health_state == 0:
-                    if random.random() < self.scenario.infection_prob:
+                    if self.model.rng.random() < self.scenario.infection_prob:
                         other_agent.health_state = 1
     
     def agents_recover(self, agents: "AgentList[CovidAgent]") -> None:
@@ -1,4 +1,3 @@
-import random
 from typing import TYPE_CHECKING
 
 from Melodie import GridAgent
@@ -6,7 +5,6 @@ from Melodie import GridAgent
 if TYPE_CHECKING:
     from .grid import CovidGrid, CovidSpot
     from .scenario import CovidScenario
-    from Melodie import AgentList
 
 
 class CovidAgent(GridAgent):
@@ -41,34 +39,28 @@ class CovidAgent(GridAgent):
         The agent has a probability (1 - stay_prob) to move to a random neighboring cell.
         """
         current_spot = self.grid.get_spot(self.x, self.y)
-        if random.random() > current_spot.stay_prob:
+        if self.model.rng.random() > current_spot.stay_prob:
             # Move randomly within a radius of 1 cell (Moore neighborhood)
             self.rand_move_agent(x_range=1, y_range=1)
 
-    def infect_neighbors(self, agents: "AgentList[CovidAgent]") -> None:
+    def infect_neighbors(self) -> None:
         """
         If infected, try to infect susceptible neighbors.
         """
         if self.health_state != 1:
             return
 
-        # Get neighbors within a radius of 1
-        neighbors = self.grid.get_neighbors(self, radius=1)
-        
-        for neighbor_id in neighbors:
-            # In Melodie, get_neighbors returns a list of agent IDs (or objects depending on config).
-            # Here we assume it returns IDs or we access the agent list directly.
-            # Actually, standard Grid.get_neighbors returns list of (agent_category, agent_id).
-            category, agent_id = neighbor_id
-            neighbor: "CovidAgent" = agents.get_agent(agent_id)
-            
+        # Get the neighbor agents within a radius of 1. Unlike get_neighbors, which
+        # returns the (category, id) of agents of all categories, neighbors_of only
+        # returns agents of the category of this agent, which is the only one here.
+        for neighbor in self.grid.neighbors_of(self, radius=1):
             if neighbor.health_state == 0:
-                if random.random() < self.scenario.infection_prob:
+                if self.model.rng.random() < self.scenario.infection_prob:
                     neighbor.health_state = 1
 
     def recover(self) -> None:
         """
         If infected, there is a chance to recover.
         """
-        if self.health_state == 1 and random.random() < self.scenario.recovery_prob:
+        if self.health_state == 1 and self.model.rng.random() < self.scenario.recovery_prob:
             self.health_state = 2
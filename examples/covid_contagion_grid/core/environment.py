@@ -1,4 +1,3 @@
-import random
 from typing import TYPE_CHECKING
 
 from Melodie import Environment
@@ -36,7 +35,7 @@ class CovidEnvironment(Environment):
         2. Infected agents spread the virus.
         """
         for agent in agents:
-            agent.infect_neighbors(agents)
+            agent.infect_neighbors()
 
     def agents_recover(self, agents: "AgentList[CovidAgent]") -> None:
         """
@@ -50,7 +49,7 @@ class CovidEnvironment(Environment):
         Infect a percentage of agents at the start of the simulation.
         """
         for agent in agents:
-            if random.random() < self.scenario.initial_infected_percentage:
+            if self.model.rng.random() < self.scenario.initial_infected_percentage:
                 agent.health_state = 1
 
     def update_population_stats(self, agents: "AgentList[CovidAgent]") -> None:
@@ -1,6 +1,5 @@
 from Melodie import NetworkAgent
 from typing import TYPE_CHECKING
-import random
 
 if TYPE_CHECKING:
     from Melodie import AgentList
@@ -33,5 +32,5 @@ class CovidAgent(NetworkAgent):
         """
         Randomly infect the agent based on the initial percentage.
         """
-        if random.random() < initial_infected_percentage:
+        if self.model.rng.random() < initial_infected_percentage:
             self.health_state = 1
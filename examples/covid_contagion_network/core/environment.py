@@ -1,6 +1,5 @@
 from Melodie import Environment
 from typing import TYPE_CHECKING
-import random
 
 if TYPE_CHECKING:
     from Melodie import AgentList
@@ -52,7 +51,7 @@ class CovidEnvironment(Environment):
                 
                 # Infect susceptible neighbors
                 if neighbor.health_state == 0:
-                    if random.random() < self.scenario.infection_prob:
+                    if self.model.rng.random() < self.scenario.infection_prob:
                         newly_infected.append(neighbor)
         
         # Update states after iterating to avoid chain reactions in a single step
@@ -64,7 +63,7 @@ class CovidEnvironment(Environment):
         Infected agents recover with a certain probability.
         """
         for agent in agents:
-            if agent.health_state == 1 and random.random() < self.scenario.recovery_prob:
+            if agent.health_state == 1 and self.model.rng.random() < self.scenario.recovery_prob:
                 agent.health_state = 2
 
     def update_population_stats(self, agents: "AgentList[CovidAgent]"):
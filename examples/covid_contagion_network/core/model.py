@@ -41,7 +41,7 @@ class CovidModel(Model):
         self.agents.setup_agents(self.scenario.agent_num)
 
         # 2. Build network connections based on scenario parameters
-        # This uses NetworkX generators under the hood.
+        # Common network types are generated with NumPy from the model random stream.
         self.network.setup_agent_connections(
             agent_lists=[self.agents],
             network_type=self.scenario.network_type,
@@ -1,4 +1,3 @@
-import random
 from typing import Dict, Tuple, TYPE_CHECKING
 
 from Melodie import Agent
@@ -88,7 +87,7 @@ class RPSAgent(Agent):
         Selects an action (rock, paper, or scissors) based on the current
         strategy probabilities and updates the action counter.
         """
-        rand = random.random()
+        rand = self.model.rng.random()
         if rand <= self.action_prob["rock"]:
             self.action = "rock"
             self.n_rock += 1
@@ -1,4 +1,3 @@
-import random
 from typing import TYPE_CHECKING
 
 from Melodie import AgentList, Environment
@@ -39,7 +38,7 @@ class RPSEnvironment(Environment):
         """
         assert self.scenario.agent_num % 2 == 0, "scenario.agent_num must be even."
         agent_ids = list(range(self.scenario.agent_num))
-        random.shuffle(agent_ids)
+        self.model.rng.shuffle(agent_ids)
         for idx in range(0, len(agent_ids), 2):
             opponent_idx = idx + 1
             if opponent_idx >= len(agent_ids):
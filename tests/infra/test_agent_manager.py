@@ -1,10 +1,11 @@
 import random
 
+import numpy as np
 import pandas as pd
 from sqlalchemy import Integer
 
 from Melodie import Agent, AgentList, GridAgent, set_seed
-from MelodieInfra import GeneralTable
+from MelodieInfra import GeneralTable, MelodieException
 from tests.infra.config import model
 
 
@@ -185,3 +186,336 @@ def test_random_sample_seed():
     al.setup_agents(10)
     a1, a2 = al.random_sample(2)
     print(a1.id, a2.id)
+
+
+class ColumnarAgent(Agent):
+    def setup(self):
+        self.health_state = 0
+        self.wealth = 1.5
+        self.name = "agent"
+
+
+def test_columnar_agent_list():
+    al = AgentList(ColumnarAgent, model, columns={"health_state": int, "wealth": float})
+    al.setup_agents(100)
+    assert "health_state" not in al[0].__dict__
+    assert al[0].health_state == 0 and al[0].wealth == 1.5 and al[0].name == "agent"
+    assert isinstance(al[0].health_state, int)
+
+    health_state = al.column("health_state")
+    health_state[:10] = 1
+    assert al[5].health_state == 1 and al[50].health_state == 0
+    al[60].health_state = 2
+    assert health_state[60] == 2
+    assert al.vectorize("health_state").sum() == 12
+    assert al.vectorize("name").tolist() == ["agent"] * 100
+
+    assert al[5].to_dict(["id", "health_state"]) == {"id": 5, "health_state": 1}
+    assert al[5].to_json()["wealth"] == 1.5
+    assert "health_state" in repr(al[5])
+    al[5].set_params({"wealth": 3.0})
+    assert al.column("wealth")[5] == 3.0
+    assert al.to_dataframe(["health_state"])["health_state"].sum() == 12
+
+    removed = al[3]
+    al.remove(removed)
+    assert len(al) == 99 and len(al.column("health_state")) == 99
+    assert removed.health_state == 1
+    assert al.get_agent(4).health_state == 1 and al.get_agent(10).health_state == 0
+
+    for i in range(200):
+        al.add(params={"health_state": 1})
+    assert al.column("health_state").sum() == 211
+    assert al[-1].wealth == 1.5
+
+    foreign = ColumnarAgent(0)
+    foreign.setup()
+    al.add(foreign, {"wealth": 9.0})
+    assert al.get_agent(foreign.id) is foreign and foreign.wealth == 9.0
+    assert al.column("wealth")[-1] == 9.0
+
+
+class InitColumnAgent(Agent):
+    def __init__(self, agent_id: int):
+        super().__init__(agent_id)
+        self.level = 3
+
+    def setup(self):
+        self.wealth = 1.0
+
+
+def test_columnar_add_with_init_columns():
+    al = AgentList(InitColumnAgent, model, columns={"level": int})
+    al.setup_agents(3)
+    agent = al.add()
+    assert "level" not in agent.__dict__ and agent.level == 3
+    agent.level = 5
+    assert al.column("level").tolist() == [3, 3, 3, 5]
+    assert al.get_agent(agent.id) is agent and agent.wealth == 1.0
+
+    new_agents = al.add_many(2)
+    assert [a.level for a in new_agents] == [3, 3] and new_agents[1].wealth == 1.0
+    assert "level" not in new_agents[0].__dict__
+    al.add_many(2, pd.DataFrame({"level": [7, 8]}))
+    assert al.column("level").tolist() == [3, 3, 3, 5, 3, 3, 7, 8]
+
+
+def test_columnar_properties_and_errors():
+    al = AgentList(ColumnarAgent, model, columns={"health_state": int})
+    ids = list(range(10))
+    random.shuffle(ids)
+    al.set_properties(pd.DataFrame([{"id": i, "health_state": i} for i in ids]))
+    assert [al.get_agent(i).health_state for i in range(10)] == list(range(10))
+    assert al.column("health_state").tolist() == list(range(10))
+
+    try:
+        al.column("wealth")
+        assert False
+    except MelodieException as e:
+        assert e.id == 1304
+
+
+def test_remove_with_deferred_compaction():
+    al = AgentList(TestAgent, model)
+    al.setup_agents(100)
+    for agent_id in range(0, 100, 3):
+        al.remove(al.get_agent(agent_id))
+    assert al._tombstones == 34
+    assert len(al) == 66
+    assert al.get_agent(3) is None and al.get_agent(4).id == 4
+
+    ids = [agent.id for agent in al]
+    assert ids == [i for i in range(100) if i % 3 != 0]
+    assert al._tombstones == 0
+    assert [al[i].id for i in range(len(al))] == ids
+    assert [d["id"] for d in al.to_list(["a"])] == ids
+    for agent in al:
+        assert al.get_agent(agent.id) is agent
+
+    # A loop visits the agents that were in the list when it started.
+    visited = []
+    for agent in al:
+        visited.append(agent.id)
+        if agent.id == 1:
+            al.remove(al.get_agent(2))
+            al.remove(al.get_agent(50))
+            al.add()
+    assert 2 in visited and 50 in visited and 100 not in visited
+    assert len(visited) == 66 and len(al) == 65 and al.get_agent(2) is None
+
+    # Reading by position inside a loop compacts the list once, without changing
+    # the running loop, and a partly consumed iterator does not hold it back.
+    iterator = iter(al)
+    assert next(iterator).id == 1
+    for agent in al:
+        al.remove(agent)
+        assert al._tombstones == 1
+        assert len(al.random_sample(64)) == 64 and al[0].id == 4
+        assert al[-1].id == 100 and al._tombstones == 0
+        break
+    al.remove(al.get_agent(5))
+    assert al[1].id == 7 and next(iterator).id == 4 and next(iterator).id == 5
+
+    al_columnar = AgentList(ColumnarAgent, model, columns={"health_state": int})
+    al_columnar.setup_agents(5)
+    for agent in al_columnar:
+        agent.health_state = agent.id
+    for agent in al_columnar:
+        al_columnar.remove(agent)
+        assert al_columnar.column("health_state").tolist() == list(
+            range(agent.id + 1, 5)
+        )
+        assert agent.health_state == agent.id
+    assert len(al_columnar) == 0
+
+
+def test_columnar_remove_compaction():
+    al = AgentList(ColumnarAgent, model, columns={"health_state": int})
+    al.setup_agents(10)
+    for agent in al:
+        agent.health_state = agent.id
+    al.remove(al.get_agent(2))
+    al.remove(al.get_agent(7))
+    assert al.get_agent(8).health_state == 8
+    assert al.column("health_state").tolist() == [0, 1, 3, 4, 5, 6, 8, 9]
+    assert al.get_agent(9).health_state == 9
+
+
+def test_set_properties_by_columns():
+    n = 50
+    df = pd.DataFrame(
+        [
+            {"id_scenario": id_scenario, "id": i, "a": i * 10 + id_scenario, "c": 1}
+            for id_scenario in (0, model.scenario.id)
+            for i in range(n)
+        ]
+    )
+    al = AgentList(TestAgent, model)
+    al.setup_agents(n, df)
+    assert [agent.a for agent in al] == [i * 10 + model.scenario.id for i in range(n)]
+    assert not hasattr(al[0], "c")
+
+    al_columnar = AgentList(TestAgent, model, columns={"a": int})
+    al_columnar.setup_agents(n)
+    al_columnar.set_properties(
+        GeneralTable.from_dicts(
+            {"a": Integer()}, [{"a": n - i} for i in range(n)]
+        )
+    )
+    assert al_columnar.column("a").tolist() == [n - i for i in range(n)]
+
+
+def test_add_many_remove_many():
+    al = AgentList(TestAgentToFilter, model)
+    al.setup_agents(10)
+    new_agents = al.add_many(5, pd.DataFrame({"a": [1, 2, 3, 4, 5], "id": [0] * 5}))
+    assert [agent.id for agent in new_agents] == [10, 11, 12, 13, 14]
+    assert [agent.a for agent in new_agents] == [1, 2, 3, 4, 5]
+    assert new_agents[0].b == 0.001 and new_agents[0].model is model
+    assert al.get_agent(12) is new_agents[2] and len(al) == 15
+    assert al.add().id == 15
+
+    al.remove_many([al.get_agent(1), 3, np.int64(12)])
+    assert len(al) == 13 and al._tombstones == 0
+    assert al.get_agent(3) is None and al.get_agent(12) is None
+    assert [agent.id for agent in al] == [0, 2] + list(range(4, 12)) + [13, 14, 15]
+    for agent in al:
+        assert al[al.indices[agent.id]] is agent
+
+    al_columnar = AgentList(ColumnarAgent, model, columns={"health_state": int})
+    al_columnar.add_many(3)
+    al_columnar.add_many(2, pd.DataFrame({"health_state": [7, 8]}))
+    assert al_columnar.column("health_state").tolist() == [0, 0, 0, 7, 8]
+
+
+class CompactAgent(Agent):
+    def setup(self):
+        self.health_state = 0
+        self.wealth: float = 1.0
+        self.x, self.y = 0, 0
+
+
+def test_compact_agent_list():
+    al = AgentList(CompactAgent, model, compact=True)
+    al.setup_agents(10)
+    agent = al[0]
+    assert isinstance(agent, CompactAgent) and type(agent) is not CompactAgent
+    assert type(agent).__name__ == "CompactAgent"
+    assert {"id", "health_state", "wealth", "x", "y"} <= set(type(agent).__slots__)
+    assert not hasattr(agent, "__dict__") or len(agent.__dict__) == 0
+
+    agent.set_params({"health_state": 2, "wealth": 3.0})
+    assert agent.to_dict(["id", "health_state", "wealth"]) == {
+        "id": 0,
+        "health_state": 2,
+        "wealth": 3.0,
+    }
+    assert agent.to_json()["health_state"] == 2
+    assert "'wealth': 3.0" in repr(agent)
+    agent.undeclared = 1
+    assert agent.to_dict()["undeclared"] == 1
+
+    al.set_properties(pd.DataFrame({"id": list(range(10)), "wealth": [5.0] * 10}))
+    assert al.vectorize("wealth").tolist() == [5.0] * 10
+    foreign = CompactAgent(100)
+    al.add(foreign, {"health_state": 1})
+    assert type(al[-1]) is type(agent) and al[-1].health_state == 1
+
+    al_columnar = AgentList(
+        CompactAgent, model, columns={"health_state": int}, compact=True
+    )
+    al_columnar.setup_agents(5)
+    al_columnar.column("health_state")[:] = 1
+    removed = al_columnar[1]
+    al_columnar.remove(removed)
+    assert removed.health_state == 1 and removed.wealth == 1.0
+    al_columnar.add(CompactAgent(0))
+    assert al_columnar.column("health_state").tolist() == [1, 1, 1, 1, 0]
+
+
+def test_property_indexes():
+    for options in [{}, {"columns": {"health_state": int}}, {"compact": True}]:
+        al = AgentList(CompactAgent, model, **options)
+        al.setup_agents(10)
+        al.create_index("health_state")
+        assert al.count_by("health_state") == {0: 10}
+        for agent in al[2:6]:
+            agent.health_state = 1
+        al[3].wealth = 2.0
+        assert [agent.id for agent in al.where(health_state=1)] == [2, 3, 4, 5]
+        assert [agent.id for agent in al.where(health_state=1, wealth=2.0)] == [3]
+        assert al.where(health_state=5) == []
+
+        al.remove(al.get_agent(4))
+        al.add(params={"health_state": 1})
+        al.set_properties(pd.DataFrame({"id": [0, 12], "health_state": [1, 2]}))
+        assert al.count_by("health_state") == {0: 5, 1: 5, 2: 1}
+        assert [agent.id for agent in al.where(health_state=1)] == [0, 2, 3, 5, 10]
+        assert al.count_by("wealth") == {1.0: 10, 2.0: 1}
+
+        removed = al.get_agent(2)
+        al.remove_many([removed])
+        removed.health_state = 3
+        assert type(removed) is al._object_class and removed.health_state == 3
+        assert al.count_by("health_state") == {0: 5, 1: 4, 2: 1}
+
+        al.setup_agents(3)
+        assert al.count_by("health_state") == {0: 3}
+
+
+class TrackedAgent(Agent):
+    _tracked_props_ = ("health_state",)
+
+    def setup(self):
+        self.health_state = 0
+        self.wealth = 1.0
+
+
+def test_tracked_properties():
+    for options in [{}, {"columns": {"health_state": int}}, {"compact": True}]:
+        al = AgentList(TrackedAgent, model, **options)
+        al.setup_agents(10)
+        al.track("wealth")
+        health_state = al.stats("health_state")
+        for agent in al[:4]:
+            agent.health_state = 1
+        al[0].health_state = 2
+        al[9].wealth = 10.0
+        assert health_state.counts == {0: 6, 1: 3, 2: 1} and health_state.sum == 5
+        assert (health_state.min, health_state.max) == (0, 2)
+
+        al.remove(al[9])
+        wealth = al.stats("wealth")
+        assert (wealth.count, wealth.sum, wealth.mean, wealth.max) == (9, 9.0, 1.0, 1.0)
+        for agent in al:
+            if agent.health_state == 0:
+                agent.health_state = 1
+        assert health_state.min == 1 and health_state.counts == {1: 8, 2: 1}
+        al.add_many(2, pd.DataFrame({"health_state": [3, 0]}))
+        assert (health_state.min, health_state.max, health_state.count) == (0, 3, 11)
+
+        untracked = al.stats("id")
+        assert untracked.count == 11 and untracked.min == 0
+
+
+class InitTrackedAgent(Agent):
+    _tracked_props_ = ("v",)
+
+    def __init__(self, agent_id: int):
+        super().__init__(agent_id)
+        self.v = 1
+
+
+def test_tracked_properties_assigned_in_init():
+    for options in [{}, {"columns": {"v": int}}, {"compact": True}]:
+        al = AgentList(InitTrackedAgent, model, **options)
+        al.setup_agents(5)
+        stats = al.stats("v")
+        assert stats.counts == {1: 5}
+        al.add()
+        assert stats.counts == {1: 6}
+        al.add_many(2)
+        assert stats.counts == {1: 8} and stats.count == 8
+        al.remove(al[0])
+        al[0].v = 2
+        assert stats.counts == {1: 6, 2: 1} and stats.sum == 8
@@ -0,0 +1,120 @@
+# -*- coding:utf-8 -*-
+import math
+
+import numpy as np
+
+from Melodie import ContinuousAgent, ContinuousSpace, Model, Scenario
+from tests.infra.config import cfg
+
+
+class Bird(ContinuousAgent):
+    def set_category(self):
+        self.category = 0
+
+
+class Hawk(ContinuousAgent):
+    def set_category(self):
+        self.category = 1
+
+
+def brute_force(xs, ys, x, y, radius, width, height, torus):
+    dx = np.abs(xs - x)
+    dy = np.abs(ys - y)
+    if torus:
+        dx = np.minimum(dx, width - dx)
+        dy = np.minimum(dy, height - dy)
+    return np.flatnonzero(dx * dx + dy * dy <= radius * radius).tolist()
+
+
+def test_radius_queries():
+    rng = np.random.default_rng(0)
+    for torus in [True, False]:
+        for index in ["hash", "kdtree"]:
+            space = ContinuousSpace()
+            space.setup_params(20.0, 10.0, torus=torus, cell_size=3.0, index=index)
+            xs = rng.uniform(0, 20, 300)
+            ys = rng.uniform(0, 10, 300)
+            for i in range(300):
+                space.add_agent(Bird(i, xs[i], ys[i]))
+            for x, y, radius in [(0.5, 0.5, 2.5), (10, 5, 4), (19.9, 9.9, 1), (3, 3, 30)]:
+                expected = brute_force(xs, ys, x, y, radius, 20, 10, torus)
+                assert space.get_agent_ids_in_radius(0, x, y, radius).tolist() == expected
+
+            # Move some agents one by one, and others at once.
+            for i in range(0, 300, 7):
+                xs[i], ys[i] = (xs[i] + 4.5) % 20, (ys[i] + 7.3) % 10
+                agent = Bird(i)
+                space.move_agent(agent, xs[i], ys[i])
+                assert space.get_agent_pos(i, 0) == (agent.x, agent.y) == (xs[i], ys[i])
+            moved = np.arange(1, 300, 3)
+            xs[moved] = rng.uniform(0, 20, len(moved))
+            ys[moved] = rng.uniform(0, 10, len(moved))
+            space.move_agents(0, moved, xs[moved], ys[moved])
+            space.remove_agent(Bird(5))
+            expected = [i for i in brute_force(xs, ys, 10, 5, 6, 20, 10, torus) if i != 5]
+            assert space.get_agent_ids_in_radius(0, 10, 5, 6).tolist() == expected
+
+
+def test_edges():
+    space = ContinuousSpace()
+    space.setup_params(10.0, 10.0, torus=True, cell_size=2.0)
+    agent = Bird(0, -1.0, 12.5)
+    space.add_agent(agent)
+    assert (agent.x, agent.y) == (9.0, 2.5) and space.agent_categories == {0}
+    assert math.isclose(space.distance(9.0, 2.5, 1.0, 9.5), math.hypot(2, 3))
+
+    bounded = ContinuousSpace()
+    bounded.setup_params(10.0, 10.0, torus=False)
+    bounded.add_agent(Bird(0, 9.5, 0.0))
+    for x, y in [(-1.0, 12.5), (10.0, 0.0), (0.0, 10.0)]:
+        try:
+            bounded.add_agent(Bird(1, x, y))
+            assert False
+        except IndexError:
+            pass
+    try:
+        bounded.add_agent(Bird(0, 1.0, 1.0))
+        assert False
+    except ValueError:
+        pass
+    assert bounded.distance(9.0, 2.5, 1.0, 9.5) == math.hypot(8, 7)
+
+
+def test_neighbors_with_model():
+    model = Model(cfg, Scenario(id_scenario=0))
+    space = model.create_continuous_space()
+    space.setup_params(50.0, 50.0, cell_size=5.0)
+    birds = model.create_agent_list(Bird, columns={"x": float, "y": float})
+    birds.setup_agents(100)
+    hawks = model.create_agent_list(Hawk)
+    hawks.setup_agents(10)
+    for agent_list in [birds, hawks]:
+        for agent in agent_list:
+            agent.x, agent.y = agent.id * 0.5, 25.0
+        space.setup_agent_locations(agent_list)
+
+    bird = birds.get_agent(10)
+    neighbors = space.get_neighbors(bird, radius=1.0)
+    assert neighbors == [(0, 8), (0, 9), (0, 11), (0, 12), (1, 8), (1, 9)]
+    assert space.neighbors_of(bird, radius=1.0, as_objects=False).tolist() == [8, 9, 11, 12]
+    assert space.neighbors_of(bird, 1, radius=1.0) == [hawks.get_agent(8), hawks.get_agent(9)]
+    assert 10 in space.neighbors_of(bird, radius=1.0, except_self=False, as_objects=False)
+
+    # Bulk moves update the columns of the registered agent list.
+    space.move_agents(0, np.arange(100), birds.column("x") + 60.0, birds.column("y"))
+    assert birds.column("x")[10] == 15.0 and bird.x == 15.0
+    agent_ids, xs, ys = space.agent_positions(0)
+    assert agent_ids.tolist() == list(range(100)) and xs[99] == 59.5 - 50.0
+    assert space.neighbors_of(bird, radius=1.0, as_objects=False).tolist() == [8, 9, 11, 12]
+
+    # Agents removed during a loop leave empty slots, which the queries step over.
+    for agent in birds:
+        if agent.id == 2:
+            removed = birds.get_agent(8)
+            space.remove_agent(removed)
+            birds.remove(removed)
+            assert space.neighbors_of(bird, radius=1.0) == [
+                birds.get_agent(9),
+                birds.get_agent(11),
+                birds.get_agent(12),
+            ]
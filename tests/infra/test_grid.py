@@ -3,9 +3,10 @@ import logging
 from typing import Union
 
 import numpy as np
+import pandas as pd
 
-from Melodie import Agent, AgentList, Grid, GridAgent, Spot
-from tests.infra.config import model
+from Melodie import Agent, AgentList, Grid, GridAgent, Model, Scenario, Spot
+from tests.infra.config import cfg, model
 
 logger = logging.getLogger(__name__)
 
@@ -300,3 +301,473 @@ def test_roles_2():
         assert False
     except AssertionError as e:
         assert "2-dimensional" in str(e)
+
+
+def test_occupancy_representations():
+    rng = np.random.default_rng(0)
+    grids = []
+    for occupancy in ["sets", "arrays"]:
+        grid = Grid(Spot)
+        grid.setup_params(6, 4, occupancy=occupancy)
+        grids.append(grid)
+    wolves = [[Wolf(i) for i in range(20)] for _ in grids]
+    sheep = [[Sheep(i) for i in range(20)] for _ in grids]
+    for grid, grid_wolves, grid_sheep in zip(grids, wolves, sheep):
+        for agent in grid_wolves + grid_sheep:
+            agent.x, agent.y = int(agent.id % 6), int(agent.id % 4)
+            grid.add_agent(agent)
+    moves = rng.integers(0, 40, size=(200, 3)).tolist()
+    for agent_index, x, y in moves:
+        for grid, grid_wolves, grid_sheep in zip(grids, wolves, sheep):
+            agent = (grid_wolves + grid_sheep)[agent_index]
+            grid.move_agent(agent, x % 6, y % 4)
+    grids[0].remove_agent(wolves[0][3])
+    grids[1].remove_agent(wolves[1][3])
+
+    sets, arrays = grids
+    for x in range(6):
+        for y in range(4):
+            spot_agents = sorted(sets.get_spot_agents(sets.get_spot(x, y)))
+            assert spot_agents == sorted(arrays.get_spot_agents(arrays.get_spot(x, y)))
+            assert sets.get_agent_ids(1, x, y) == arrays.get_agent_ids(1, x, y)
+            assert isinstance(arrays.get_agent_ids(1, x, y), set)
+    assert sorted(sets.get_empty_spots()) == sorted(arrays.get_empty_spots())
+    for agent in wolves[1]:
+        if agent.id != 3:
+            assert arrays.get_agent_pos(agent.id, 0) == (agent.x, agent.y)
+            assert sorted(arrays.get_neighbors(agent)) == sorted(
+                sets.get_neighbors(wolves[0][agent.id])
+            )
+    for category in [0, 1]:
+        offsets, agent_ids = arrays._occupancies[category].spot_index()
+        expected_offsets, expected_ids = sets._occupancies[category].spot_index()
+        assert offsets.tolist() == expected_offsets.tolist()
+        assert agent_ids.tolist() == expected_ids.tolist()
+        x, y = 2, 3
+        pos_1d = arrays._convert_to_1d(x, y)
+        assert (
+            set(agent_ids[offsets[pos_1d] : offsets[pos_1d + 1]].tolist())
+            == arrays.get_agent_ids(category, x, y)
+        )
+
+    try:
+        arrays.add_agent(wolves[1][0])
+        assert False
+    except ValueError:
+        pass
+    try:
+        arrays.remove_agent(wolves[1][3])
+        assert False
+    except KeyError:
+        pass
+
+
+def test_neighbor_index():
+    def expected_positions(grid, x, y, radius, moore, except_self, wrap):
+        positions = []
+        for dx in range(-radius, radius + 1):
+            for dy in range(-radius, radius + 1):
+                if not moore and abs(dx) + abs(dy) > radius:
+                    continue
+                if dx == 0 and dy == 0 and except_self:
+                    continue
+                nx, ny = x + dx, y + dy
+                if wrap:
+                    positions.append((nx % grid.width(), ny % grid.height()))
+                elif 0 <= nx < grid.width() and 0 <= ny < grid.height():
+                    positions.append((nx, ny))
+        return positions
+
+    for wrap in [True, False]:
+        for caching, neighbor_cache_bytes in [(True, 2**20), (True, 10), (False, 2**20)]:
+            grid = Grid(Spot)
+            grid.neighbor_cache_bytes = neighbor_cache_bytes
+            grid.setup_params(7, 5, wrap=wrap, caching=caching)
+            for radius, moore, except_self in [(1, True, True), (2, False, False)]:
+                for x, y in [(0, 0), (3, 2), (6, 4)]:
+                    assert grid._get_neighbor_positions(
+                        x, y, radius, moore, except_self
+                    ) == expected_positions(grid, x, y, radius, moore, except_self, wrap)
+            indexed = grid._neighbor_indexes[(1, True, True)] is not None
+            assert indexed == (caching and neighbor_cache_bytes > 10)
+
+    grid = Grid(Spot)
+    grid.setup_params(7, 5, wrap=False)
+    agent = Wolf(0, 6, 4)
+    grid.add_agent(agent)
+    grid.add_agent(Sheep(1, 5, 4))
+    grid.add_agent(Wolf(2, 5, 3))
+    assert sorted(grid.get_neighbors(agent)) == [(0, 2), (1, 1)]
+    assert len(grid.get_agent_neighborhood(agent)) == 3
+
+
+def test_bulk_moves():
+    for occupancy in ["sets", "arrays"]:
+        model = Model(cfg, Scenario(id_scenario=0))
+        grid = model.create_grid(Grid, Spot)
+        grid.setup_params(8, 6, occupancy=occupancy)
+        for columns in [None, {"x": int, "y": int}]:
+            agents = model.create_agent_list(
+                Wolf if columns is None else Sheep, columns=columns
+            )
+            agents.setup_agents(40)
+            grid.setup_agent_locations(agents)
+        wolves = grid.get_agent_container(0)
+        sheep = grid.get_agent_container(1)
+
+        # Few moves are patched one by one, many moves rebuild the spot lists.
+        for agent_ids in [[3, 5], list(range(40))]:
+            targets_x = [agent_id + 7 for agent_id in agent_ids]
+            grid.move_agents(0, agent_ids, targets_x, [-1] * len(agent_ids))
+            for agent_id in agent_ids:
+                wolf = wolves.get_agent(agent_id)
+                assert (wolf.x, wolf.y) == ((agent_id + 7) % 8, 5)
+                assert grid.get_agent_pos(agent_id, 0) == (wolf.x, wolf.y)
+                assert (0, agent_id) in grid.get_spot_agents(grid.get_spot(wolf.x, 5))
+
+        for _ in range(3):
+            old_ids, old_xs, old_ys = grid.agent_positions(1)
+            grid.rand_move_agents(1, 1, 2)
+            agent_ids, xs, ys = grid.agent_positions(1)
+            assert agent_ids.tolist() == old_ids.tolist() == list(range(40))
+            assert (np.abs((xs - old_xs + 1) % 8 - 1) <= 1).all()
+            assert (np.abs((ys - old_ys + 2) % 6 - 2) <= 2).all()
+            assert sheep.column("x").tolist() == xs.tolist()
+            assert [agent.y for agent in sheep] == ys.tolist()
+
+        positions = [
+            (x, y)
+            for _, xs, ys in [grid.agent_positions(0), grid.agent_positions(1)]
+            for x, y in zip(xs.tolist(), ys.tolist())
+        ]
+        all_spots = {(x, y) for x in range(8) for y in range(6)}
+        assert set(grid.get_empty_spots()) == all_spots - set(positions)
+        for x, y in all_spots:
+            spot_agents = grid.get_spot_agents(grid.get_spot(x, y))
+            assert len(spot_agents) == positions.count((x, y))
+
+    grid = Grid(Spot)
+    grid.setup_params(4, 4, wrap=False)
+    grid.add_agent(Wolf(0, 0, 0))
+    for _ in range(10):
+        grid.rand_move_agents(0, 3, 3)
+        x, y = grid.get_agent_pos(0, 0)
+        assert 0 <= x < 4 and 0 <= y < 4
+    try:
+        grid.move_agents(0, [0], [4], [0])
+        assert False
+    except IndexError:
+        pass
+
+
+def test_random_placement():
+    for occupancy in ["sets", "arrays"]:
+        model = Model(cfg, Scenario(id_scenario=0))
+        grid = model.create_grid(Grid, Spot)
+        grid.setup_params(10, 7, occupancy=occupancy)
+        wolves = model.create_agent_list(Wolf)
+        wolves.setup_agents(40)
+        grid.setup_agent_locations(wolves, "random_single")
+        positions = {(wolf.x, wolf.y) for wolf in wolves}
+        assert len(positions) == 40
+        for wolf in wolves:
+            assert grid.get_agent_pos(wolf.id, 0) == (wolf.x, wolf.y)
+            assert wolf.grid is grid
+        empty_spots = set(grid.get_empty_spots())
+        assert len(empty_spots) == 30 and not empty_spots & positions
+
+        sheep = model.create_agent_list(Sheep, columns={"x": int, "y": int})
+        sheep.setup_agents(30)
+        grid.setup_agent_locations(sheep, "random_single")
+        assert len({(agent.x, agent.y) for agent in sheep} | positions) == 70
+        assert grid.get_empty_spots() == [] and grid.find_empty_spot() is None
+
+        grid.remove_agent(wolves.get_agent(0))
+        assert grid.find_empty_spot() == (wolves.get_agent(0).x, wolves.get_agent(0).y)
+        try:
+            grid.find_empty_spots(2)
+            assert False
+        except ValueError:
+            pass
+        try:
+            grid.add_agent(sheep.get_agent(1))
+            assert False
+        except ValueError:
+            pass
+
+
+def test_columnar_grid_agents_added_at_runtime():
+    model = Model(cfg, Scenario(id_scenario=0))
+    grid = model.create_grid(Grid, Spot)
+    grid.setup_params(10, 10)
+    sheep = model.create_agent_list(Sheep, columns={"x": int, "y": int})
+    sheep.setup_agents(3)
+    grid.setup_agent_locations(sheep)
+
+    added = sheep.add()
+    assert "x" not in added.__dict__ and (added.x, added.y) == (0, 0)
+    added.x, added.y = 4, 5
+    grid.add_agent(added)
+    assert grid.get_agent_pos(added.id, 1) == (4, 5)
+    cohort = sheep.add_many(2, pd.DataFrame({"x": [1, 2], "y": [3, 3]}))
+    for agent in cohort:
+        grid.add_agent(agent)
+    assert sheep.column("x").tolist() == [0, 0, 0, 4, 1, 2]
+    assert [grid.get_agent_pos(agent.id, 1) for agent in cohort] == [(1, 3), (2, 3)]
+
+
+def test_layers():
+    class FieldSpot(Spot):
+        def setup(self):
+            self.pheromone = -1.0
+
+    for wrap in [True, False]:
+        grid = Grid(FieldSpot)
+        grid.setup_params(5, 4, wrap=wrap)
+        pheromone = grid.add_layer("pheromone")
+        assert pheromone.shape == (4, 5) and grid.get_spot(3, 2).pheromone == 0
+        assert isinstance(grid.get_spot(0, 0), FieldSpot)
+        assert type(grid.get_spot(0, 0)).__name__ == "FieldSpot"
+        grid.get_spot(3, 2).pheromone = 10
+        assert pheromone[2, 3] == 10
+        assert grid.get_spot(3, 2).to_dict(["pheromone"])["pheromone"] == 10
+
+        grid.diffuse("pheromone", 0.4)
+        assert np.isclose(pheromone.sum(), 10) and np.isclose(pheromone[2, 3], 6)
+        assert np.isclose(grid.get_spot(4, 3).pheromone, 0.5)
+        grid.decay("pheromone", 0.5)
+        assert np.isclose(pheromone.sum(), 5)
+
+        pheromone[:] = 0
+        pheromone[0, 0] = 8
+        grid.diffuse("pheromone", 0.5, moore=False)
+        assert np.isclose(pheromone.sum(), 8)
+        if wrap:
+            assert np.isclose(pheromone[0, 4], 1) and np.isclose(pheromone[3, 0], 1)
+            assert np.isclose(pheromone[0, 0], 4)
+        else:
+            # The shares of the 2 neighbors beyond the borders stay on the spot.
+            assert np.isclose(pheromone[0, 0], 6) and np.isclose(pheromone[0, 1], 1)
+
+        ones = grid.add_layer("ones", 1, dtype=int)
+        sums = grid.convolve("ones", np.ones((3, 3)))
+        assert sums[2, 2] == 9 and sums[0, 0] == (9 if wrap else 4)
+        assert ones.dtype == np.int64 and grid.get_spot(1, 1).ones == 1
+
+    grid.set_spot_property("ones", np.full((4, 5), 3))
+    assert grid.get_spot(4, 3).ones == 3 and grid.layer("ones") is ones
+
+
+def test_lazy_spots():
+    class FieldSpot(Spot):
+        def setup(self):
+            self.pheromone = -1.0
+            self.visits = 0
+
+    eager = Grid(FieldSpot)
+    eager.setup_params(6, 5, lazy_spots=False)
+    lazy = Grid(FieldSpot)
+    lazy.setup_params(6, 5, lazy_spots=True)
+    assert len(lazy._spots) == 0
+
+    for grid in [eager, lazy]:
+        pheromone = grid.add_layer("pheromone", np.arange(30).reshape(5, 6))
+        spot = grid.get_spot(4, 3)
+        assert isinstance(spot, FieldSpot) and spot.id == grid._convert_to_1d(4, 3)
+        # ``setup()`` does not overwrite the layer, and the spot is created once.
+        assert spot.pheromone == 22 and spot.visits == 0
+        spot.visits += 1
+        assert grid.get_spot(-2, -2) is spot and spot.visits == 1
+        spot.colormap = 7
+
+        agent = TestGridAgent(0, 1, 1)
+        grid.add_agent(agent)
+        neighborhood = grid.get_spot_neighborhood(spot)
+        assert len(neighborhood) == 8 and {s.pheromone for s in neighborhood} == {
+            pheromone[y, x] for x in range(3, 6) for y in range(2, 5) if (x, y) != (4, 3)
+        }
+        assert len(grid.get_empty_spots()) == 29
+        grid.remove_agent(agent)
+        assert len(grid.get_empty_spots()) == 30
+
+    assert len(lazy._spots) == 9
+    assert eager.get_colormap() == lazy.get_colormap()
+    roles, _ = lazy.get_colormap()
+    assert roles[lazy._convert_to_1d(4, 3)] == [4, 3, 0, 7]
+    assert eager.spots_to_json() == lazy.spots_to_json()
+    assert len(lazy._spots) == 30
+
+
+def test_neighbors_of():
+    for occupancy in ["sets", "arrays"]:
+        model = Model(cfg, Scenario(id_scenario=0))
+        grid = model.create_grid(Grid, Spot)
+        grid.setup_params(8, 6, occupancy=occupancy)
+        wolves = model.create_agent_list(Wolf)
+        wolves.setup_agents(30)
+        sheep = model.create_agent_list(Sheep)
+        sheep.setup_agents(30)
+        for agent_list in [wolves, sheep]:
+            for agent in agent_list:
+                agent.x, agent.y = agent.id % 8, agent.id // 8
+            grid.setup_agent_locations(agent_list)
+
+        wolf = wolves.get_agent(9)
+        for radius, except_self in [(1, True), (2, False)]:
+            expected = grid.get_neighbors(wolf, radius, except_self=except_self)
+            for category, agent_list in [(None, wolves), (1, sheep)]:
+                ids = [
+                    agent_id
+                    for agent_category, agent_id in expected
+                    if agent_category == (0 if category is None else category)
+                ]
+                neighbor_ids = grid.neighbors_of(
+                    wolf, category, radius, except_self=except_self, as_objects=False
+                )
+                assert neighbor_ids.tolist() == ids
+                neighbors = grid.neighbors_of(
+                    wolf, category, radius, except_self=except_self
+                )
+                assert neighbors == [agent_list.get_agent(i) for i in ids]
+        assert sorted(grid.neighbors_of(wolf, as_objects=False).tolist()) == [
+            0, 1, 2, 8, 10, 16, 17, 18
+        ]
+
+        removed = wolves.get_agent(1)
+        grid.remove_agent(removed)
+        wolves.remove(removed)
+        assert 1 not in [agent.id for agent in grid.neighbors_of(wolf)]
+
+        # Inside a loop over the agents, after a removal.
+        for agent in wolves:
+            if agent.id == 2:
+                grid.remove_agent(agent)
+                wolves.remove(agent)
+            elif agent.id == 16:
+                neighbors = grid.neighbors_of(agent, radius=2)
+                assert 2 not in [neighbor.id for neighbor in neighbors]
+                assert all(neighbor is not None for neighbor in neighbors)
+
+
+def test_incremental_colormap():
+    for lazy_spots in [False, True]:
+        grid = Grid(Spot)
+        grid.setup_params(5, 4, lazy_spots=lazy_spots)
+        wolves = [Wolf(i, i, 0) for i in range(3)]
+        for wolf in wolves:
+            grid.add_agent(wolf)
+        roles, series = grid.get_colormap(incremental=True)
+        assert len(roles) == 20 and len(series[0]) == 3
+
+        # Nothing changed.
+        assert grid.get_colormap(incremental=True) == ([], {})
+
+        grid.get_spot(2, 3).colormap = 5
+        grid.move_agent(wolves[0], 4, 2)
+        grid.remove_agent(wolves[1])
+        grid.add_agent(Sheep(7, 1, 1))
+        roles, series = grid.get_colormap(incremental=True)
+        assert roles == [[2, 3, 0, 5]]
+        assert series == {
+            0: [
+                {"value": [4, 2], "id": 0, "category": 0},
+                {"value": None, "id": 1, "category": 0},
+            ],
+            1: [{"value": [1, 1], "category": 1, "id": 7}],
+        }
+
+        # The full frame is still available, and a colormap layer is compared
+        # with the previous frame.
+        roles, series = grid.get_colormap()
+        assert roles[grid._convert_to_1d(2, 3)] == [2, 3, 0, 5]
+        assert len(series[0]) == 2 and len(series[1]) == 1
+        colormap = grid.add_layer("colormap", 0, dtype=int)
+        colormap[1, 4] = 3
+        roles, series = grid.get_colormap(incremental=True)
+        assert roles == [[2, 3, 0, 0], [4, 1, 0, 3]] and series == {}
+
+
+def test_count_queries():
+    rng = np.random.default_rng(1)
+    for wrap in [True, False]:
+        for occupancy in ["sets", "arrays"]:
+            grid = Grid(Spot)
+            grid.setup_params(9, 7, wrap=wrap, occupancy=occupancy)
+            wolves = [Wolf(i, *rng.integers(0, [9, 7]).tolist()) for i in range(60)]
+            for wolf in wolves:
+                grid.add_agent(wolf)
+            grid.add_agent(Sheep(0, 4, 4))
+            for wolf in wolves[:10]:
+                grid.move_agent(wolf, wolf.x + 1, wolf.y)
+            grid.remove_agent(wolves[-1])
+
+            raster = grid.count_raster(0)
+            assert raster.shape == (7, 9) and raster.sum() == 59
+            assert raster[wolves[0].y, wolves[0].x] >= 1
+            assert grid.count_raster(0, block=4).tolist() == [
+                [raster[:4, :4].sum(), raster[:4, 4:8].sum(), raster[:4, 8:].sum()],
+                [raster[4:, :4].sum(), raster[4:, 4:8].sum(), raster[4:, 8:].sum()],
+            ]
+            assert grid.count_agents(0, 2, 1, 5, 3) == raster[1:4, 2:6].sum()
+            assert grid.count_agents(0, -1, 0, 0, 6) == (
+                raster[:, [8, 0]].sum() if wrap else raster[:, 0].sum()
+            )
+
+            xs, ys = np.meshgrid(np.arange(9), np.arange(7))
+            xs, ys = xs.ravel(), ys.ravel()
+            queries = [(1, True, True), (2, False, False), (3, True, False)]
+            for radius, moore, except_self in queries:
+                counts = grid.count_neighbors(0, xs, ys, radius, moore, except_self)
+                expected = [
+                    sum(
+                        category == 0
+                        for category, _ in grid.get_neighbors(
+                            Wolf(999, x, y), radius, moore, except_self
+                        )
+                    )
+                    for x, y in zip(xs.tolist(), ys.tolist())
+                ]
+                assert counts.tolist() == expected
+            assert grid.count_neighbors(1, 5, 5) == 1 and grid.count_neighbors(1, 4, 4) == 0
+
+
+def test_distance_fields():
+    grid = Grid(Spot)
+    grid.setup_params(7, 5, wrap=False)
+    # A wall at x = 3, with a door at y = 4.
+    floor = grid.add_layer("floor", 1, dtype=int)
+    floor[:4, 3] = 0
+    field = grid.distance_field([(6, 0)], passable="floor", moore=False)
+    assert field.distances.shape == (5, 7)
+    assert field.distance(6, 0) == 0 and field.distance(4, 0) == 2
+    assert field.distance(2, 0) == 4 + 2 + 6 and field.distance(3, 0) == np.inf
+    assert field.next_step(2, 4) == (3, 4) and field.next_step(6, 0) == (6, 0)
+    assert field.next_step(3, 0) == (3, 0)
+    xs, ys = field.next_steps(np.array([0, 4]), np.array([4, 0]))
+    assert xs.tolist() == [1, 5] and ys.tolist() == [4, 0]
+
+    # Following the next steps reaches the target along a shortest path.
+    agent = TestGridAgent(0, 0, 0)
+    grid.add_agent(agent)
+    for _ in range(int(field.distance(0, 0))):
+        grid.move_agent(agent, *field.next_step(agent.x, agent.y))
+    assert (agent.x, agent.y) == (6, 0)
+
+    # The field is cached until the layer changes.
+    assert grid.distance_field([(6, 0)], passable="floor", moore=False) is field
+    floor[0, 3] = 1
+    field = grid.distance_field([(6, 0)], passable="floor", moore=False)
+    assert field.distance(0, 0) == 6
+
+    # Moving onto a spot costs the value of the cost layer.
+    cost = grid.add_layer("cost", 1.0)
+    cost[:, 4] = 10.0
+    field = grid.distance_field([(6, 2)], cost="cost", moore=False)
+    assert field.distance(5, 2) == 1 and field.distance(3, 2) == 12
+    assert grid.distance_field([(6, 2), (0, 2)], cost="cost").distance(3, 2) == 3
+    cost[0, 0] = 0
+    try:
+        grid.distance_field([(6, 2)], cost="cost")
+        assert False
+    except ValueError:
+        pass
@@ -1,7 +1,7 @@
 # -*- coding:utf-8 -*-
 import pandas as pd
 
-from Melodie import Agent, Model, Scenario
+from Melodie import Agent, AgentPool, Model, Scenario
 from MelodieInfra import MelodieException
 from tests.infra.config import cfg
 
@@ -37,6 +37,142 @@ def test_agent_container_id_check():
         assert e.id == 1303
 
 
+class StagedModel(Model):
+    def setup(self):
+        self.agent_list1 = self.create_agent_list(TestAgent)
+        self.agent_list1.setup_agents(10)
+
+    def run(self):
+        self.sizes = []
+        for t in self.iterator(3):
+            for agent in self.agent_list1:
+                if agent.id % 2 == 0:
+                    self.agent_list1.defer_remove(agent)
+                    self.agent_list1.defer_remove(agent)
+                    self.agent_list1.defer_add(params={"a": t})
+            self.sizes.append(len(self.agent_list1))
+
+
+def test_staged_agents_committed_at_step_boundary():
+    tm = StagedModel(config=cfg, scenario=Scenario(id_scenario=0))
+    tm.setup()
+    tm.run()
+    agent_list = tm.agent_list1
+    assert tm.sizes == [10, 10, 10]
+    assert len(agent_list._staged_removals) == 0 and len(tm._staged_agent_lists) == 0
+    assert len(agent_list) == 10
+    assert [agent.id for agent in agent_list] == [1, 3, 5, 7, 9, 11, 13, 15, 17, 18]
+    assert agent_list.get_agent(18).a == 2
+
+    agent_list.defer_remove(agent_list[0])
+    agent_list.defer_add()
+    assert len(agent_list) == 10
+    added = agent_list.commit()
+    assert len(added) == 1 and agent_list.get_agent(added[0].id) is added[0]
+    assert len(agent_list) == 10
+
+
+class PooledAgent(Agent):
+    _tracked_props_ = ("b",)
+
+    def setup(self):
+        self.a = 0
+        self.b = 1.0
+
+
+class PooledModel(Model):
+    agent_pooling = True
+
+    def create(self):
+        self.agent_list1 = self.create_agent_list(PooledAgent)
+        self.agent_list2 = self.create_agent_list(PooledAgent, columns={"b": float})
+
+    def setup(self):
+        self.agent_list1.setup_agents(5)
+        self.agent_list2.setup_agents(3)
+
+    def run(self):
+        for agent in self.agent_list2:
+            agent.a, agent.b = 1, 2.0
+            agent.undeclared = 1
+
+
+def run_pooled(agent_pool, model_cls=PooledModel):
+    model = model_cls(config=cfg, scenario=Scenario(id_scenario=0))
+    model._use_agent_pool(agent_pool)
+    model._setup()
+    model.run()
+    agents = list(model.agent_list1) + list(model.agent_list2)
+    model._release_agents()
+    return model, agents
+
+
+def test_agent_pooling():
+    agent_pool = AgentPool()
+    _, agents = run_pooled(agent_pool)
+    assert len(agent_pool) == 8 and len(agents) == 8
+
+    model, reused = run_pooled(agent_pool)
+    assert len(agent_pool) == 8 and {id(a) for a in reused} == {id(a) for a in agents}
+    assert len(model.agent_list1) == 0 and model.agent_list1.get_agent(0) is None
+
+    model = PooledModel(config=cfg, scenario=Scenario(id_scenario=0))
+    model._use_agent_pool(agent_pool)
+    model._setup()
+    assert len(agent_pool) == 0
+    for agent_list in [model.agent_list1, model.agent_list2]:
+        assert [agent.id for agent in agent_list] == list(range(len(agent_list)))
+        assert all(agent.model is model for agent in agent_list)
+        assert agent_list.stats("b").counts == {1.0: len(agent_list)}
+    agent = model.agent_list2[0]
+    assert (agent.a, agent.b) == (0, 1.0) and not hasattr(agent, "undeclared")
+    agent.b = 3.0
+    assert model.agent_list2.column("b").tolist() == [3.0, 1.0, 1.0]
+
+    class UnpooledModel(PooledModel):
+        agent_pooling = False
+
+    run_pooled(agent_pool, UnpooledModel)
+    assert len(agent_pool) == 0
+
+    # Pooling is opt-in.
+    assert not Model.agent_pooling
+
+
+class PairedAgent(Agent):
+    def setup(self):
+        self.a = 0
+        if self.id % 2 == 0:
+            self.partner = None
+
+
+class CompactPooledModel(PooledModel):
+    def create(self):
+        self.agent_list1 = self.create_agent_list(PairedAgent, compact=True)
+        self.agent_list2 = self.create_agent_list(PairedAgent, compact=True)
+
+    def run(self):
+        for agent in self.agent_list1:
+            agent.a = 1
+            agent.partner = self.agent_list2[0]
+
+
+def test_compact_agent_pooling():
+    agent_pool = AgentPool()
+    _, agents = run_pooled(agent_pool, CompactPooledModel)
+    assert "partner" in type(agents[0]).__slots__
+    model, reused = run_pooled(agent_pool, CompactPooledModel)
+    assert {id(a) for a in reused} == {id(a) for a in agents}
+
+    # Slot attributes are dropped too, so ``setup()`` starts from a blank agent.
+    model = CompactPooledModel(config=cfg, scenario=Scenario(id_scenario=0))
+    model._use_agent_pool(agent_pool)
+    model._setup()
+    for agent in model.agent_list1:
+        assert agent.a == 0
+        assert agent.partner is None if agent.id % 2 == 0 else not hasattr(agent, "partner")
+
+
 # what --> function
 # when --> params
 # then --> assert the results equal to sth
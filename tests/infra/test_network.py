@@ -1,5 +1,17 @@
-from Melodie import AgentList, Edge, Model, Network, Scenario
+import random
+
+import numpy as np
+import pytest
+
+from Melodie import AgentList, Edge, Model, Network, Scenario, SparseNetwork
 from Melodie.network import NetworkAgent
+from Melodie.network_generators import (
+    GENERATORS,
+    barabasi_albert_graph,
+    configuration_model,
+    stochastic_block_model,
+    watts_strogatz_graph,
+)
 from tests.infra.config import cfg
 
 
@@ -14,6 +26,11 @@ class DemoNetwork(Network):
         self.edge_cls = RelationshipEdge
 
 
+class DemoSparseNetwork(SparseNetwork):
+    def setup(self):
+        self.edge_cls = RelationshipEdge
+
+
 class DemoAgent(NetworkAgent):
     def set_category(self):
         return 0
@@ -134,3 +151,208 @@ def test_create_ba():
         print("edges", n.get_node_edges(agent_list2.get_agent(i)))
     # for node in neighbors:
     #     print(n.all_agent_on_node(node))
+
+
+def test_sparse_network_matches_network():
+    model = DemoModel(cfg, Scenario(0))
+    model.setup()
+    rng = random.Random(0)
+    for directed in [False, True]:
+        dense = DemoNetwork(model=model, directed=directed)
+        sparse = DemoSparseNetwork(model=model, directed=directed)
+        for n in [dense, sparse]:
+            for i in range(30):
+                n._add_agent(i % 2, i)
+        # Enough changes to rebuild the CSR index of the sparse network.
+        for _ in range(3000):
+            a, b = rng.sample(range(30), 2)
+            source, target = (a % 2, a), (b % 2, b)
+            if (source in dense.edges and target in dense.edges[source]) and (
+                rng.random() < 0.5
+            ):
+                dense.remove_edge(source, target)
+                sparse.remove_edge(source, target)
+            else:
+                for n in [dense, sparse]:
+                    n.create_edge(a, a % 2, b, b % 2, weight=a + b)
+        for n in [dense, sparse]:
+            n._remove_agent(0, 0)
+        assert sparse.all_agents() == dense.all_agents()
+        for category, agent_id in dense.all_agents():
+            # Unlike Network, it also removes the edges to a removed directed node.
+            assert sorted(sparse._get_neighbor_positions(agent_id, category)) == sorted(
+                key for key in dense.edges.get((category, agent_id), {}) if key != (0, 0)
+            )
+        edges = sparse.edges
+        assert {s: set(t) for s, t in edges.items()} == {
+            s: set(t) - {(0, 0)}
+            for s, t in dense.edges.items()
+            if set(t) - {(0, 0)} and s != (0, 0)
+        }
+
+
+def test_sparse_generated_edges_repeated_pairs():
+    model = DemoModel(cfg, Scenario(0))
+    model.setup()
+    nodes = [(0, i) for i in range(4)]
+    sources = np.array([0, 1, 0, 2, 3])
+    targets = np.array([1, 0, 1, 3, 2])
+    for directed in [False, True]:
+        dense = DemoNetwork(model=model, directed=directed)
+        sparse = DemoSparseNetwork(model=model, directed=directed)
+        for n in [dense, sparse]:
+            for node in nodes:
+                n._add_agent(*node)
+            n._add_generated_edges(nodes, sources, targets)
+        for category, agent_id in nodes:
+            assert sorted(sparse._get_neighbor_positions(agent_id, category)) == sorted(
+                dense._get_neighbor_positions(agent_id, category)
+            )
+
+
+def test_sparse_network_edges():
+    model = DemoModel(cfg, Scenario(0))
+    model.setup()
+    agent_list = AgentList(DemoAgent, model)
+    agent_list.setup_agents(10)
+    n = DemoSparseNetwork(model=model)
+    for agent in agent_list:
+        n._add_agent(0, agent.id)
+    n.create_edge(0, 0, 1, 0, weight=2.5, kind="friend")
+    n.create_edge(1, 0, 2, 0, weight=1.0)
+
+    # Edge objects are created on demand, with the properties of their own edge,
+    # and kept.
+    assert n._edge_objects == {}
+    edge = n.get_edge((0, 1), (0, 0))
+    assert (edge.weight, edge.kind, edge.edge_b) == (2.5, "friend", 12.0)
+    assert n.get_edge((0, 0), (0, 1)) is edge
+    other = n.get_edge((0, 1), (0, 2))
+    assert other.weight == 1.0 and not hasattr(other, "kind")
+    assert n.get_node_edges(agent_list[1]) == [edge, other]
+
+    custom = RelationshipEdge(0, 2, 0, 3, {"weight": 4.0})
+    n.add_edge((0, 2), (0, 3), custom)
+    assert n.get_edge((0, 3), (0, 2)) is custom
+    n.remove_edge((0, 2), (0, 1))
+    assert n._get_neighbor_positions(2, 0) == [(0, 3)]
+    with pytest.raises(KeyError):
+        n.get_edge((0, 1), (0, 2))
+
+    n = DemoSparseNetwork(model=model)
+    n.setup_agent_connections([agent_list], "watts_strogatz_graph", {"k": 4, "p": 0})
+    for agent in agent_list:
+        neighbors = n.get_neighbors(agent)
+        assert len(neighbors) == 4
+        assert ((0, (agent.id + 1) % 10)) in neighbors
+
+
+def test_sparse_directed_removal_and_layout(tmp_path):
+    model = DemoModel(cfg, Scenario(0))
+    model.setup()
+    agent_list = AgentList(DemoAgent, model)
+    agent_list.setup_agents(10)
+    n = DemoSparseNetwork(model=model, directed=True)
+    n.setup_agent_connections([agent_list], "watts_strogatz_graph", {"k": 2, "p": 0})
+    # Incoming edges from the CSR index, and from edges added since.
+    n.create_edge(5, 0, 0, 0)
+    n.create_edge(0, 0, 0, 0)
+    assert n._incoming_rows(0).tolist() == [9, 10, 11]
+    n._remove_agent(0, 0)
+    assert n._get_neighbor_positions(9, 0) == []
+    assert n._get_neighbor_positions(5, 0) == [(0, 6)]
+    assert n._incoming_rows(1).tolist() == []
+
+    # The layout is built from the edge arrays, without the ``edges`` dict, and
+    # covers the nodes without edges.
+    class NoEdgesDict(DemoSparseNetwork):
+        @property
+        def edges(self):
+            raise AssertionError("edges should not be built")
+
+    n = NoEdgesDict(model=model, directed=True)
+    n.layout_file = str(tmp_path / "layout.gexf")
+    n.setup_layout_creator(
+        lambda g: {node: np.array([i, 0.0]) for i, node in enumerate(sorted(g.nodes))}
+    )
+    for agent in agent_list:
+        n._add_agent(0, agent.id)
+    n.create_edge(1, 0, 2, 0)
+    assert n.get_position(0, 9).tolist() == [9000.0, 0.0]
+    assert set(n.layout) == n.all_agents()
+    with pytest.raises(KeyError):
+        n.get_position(0, 10)
+
+
+def test_network_generators():
+    n = 2000
+    generated = {
+        "erdos_renyi_graph": {"p": 0.005},
+        "barabasi_albert_graph": {"m": 3},
+        "watts_strogatz_graph": {"k": 6, "p": 0.3},
+        "configuration_model": {"deg_sequence": [4] * n},
+        "stochastic_block_model": {"sizes": [500, 1500], "p": [[0.05, 0.001], [0.001, 0.01]]},
+    }
+    for network_type, params in generated.items():
+        generator = GENERATORS[network_type]
+        sources, targets = generator(n, rng=np.random.default_rng(0), **params)
+        again = generator(n, rng=np.random.default_rng(0), **params)
+        assert np.array_equal(sources, again[0]) and np.array_equal(targets, again[1])
+        # Simple graphs: no self-loops nor repeated edges.
+        assert (sources != targets).all()
+        keys = np.minimum(sources, targets) * n + np.maximum(sources, targets)
+        assert len(np.unique(keys)) == len(keys)
+        assert 0 <= sources.min() and max(sources.max(), targets.max()) < n
+
+    degrees = np.bincount(
+        np.concatenate(barabasi_albert_graph(n, 3, np.random.default_rng(0))),
+        minlength=n,
+    )
+    assert degrees.sum() == 2 * (3 + (n - 4) * 3) and degrees.min() == 3
+    sources, targets = watts_strogatz_graph(n, 6, 0, np.random.default_rng(0))
+    assert (np.bincount(np.concatenate((sources, targets))) == 6).all()
+    sources, targets = stochastic_block_model(
+        n, [1000, 1000], [[0.0, 1.0], [1.0, 0.0]], np.random.default_rng(0)
+    )
+    assert len(sources) == 1000 * 1000 and (sources < 1000).all() and (targets >= 1000).all()
+
+    with pytest.raises(ValueError, match="non-negative"):
+        configuration_model(4, [2, -1, 1, 2], np.random.default_rng(0))
+    with pytest.raises(ValueError, match="even"):
+        configuration_model(4, [2, 1, 1, 1], np.random.default_rng(0))
+
+
+def test_setup_generated_connections():
+    model = DemoModel(cfg, Scenario(0))
+    model.setup()
+    agent_list = AgentList(DemoAgent, model)
+    agent_list.setup_agents(100)
+    for network_cls in [DemoNetwork, DemoSparseNetwork]:
+        n = network_cls(model=model)
+        n.setup_agent_connections([agent_list], "barabasi_albert_graph", {"m": 2})
+        degrees = [len(n.get_neighbors(agent)) for agent in agent_list]
+        # The nodes of the initial star may keep a single edge.
+        assert sum(degrees) == 2 * (2 + 97 * 2) and min(degrees) >= 1
+        assert all(degree >= 2 for degree in degrees[3:])
+    # Parameters of NetworkX only, like the seed, make it use NetworkX as well.
+    edges = []
+    for _ in range(2):
+        n = DemoNetwork(model=model)
+        n.setup_agent_connections(
+            [agent_list], "barabasi_albert_graph", {"m": 2, "seed": 1}
+        )
+        edges.append({s: set(t) for s, t in n.edges.items()})
+    assert edges[0] == edges[1]
+    n = DemoSparseNetwork(model=model, directed=True)
+    n.setup_agent_connections(
+        [agent_list], "erdos_renyi_graph", {"p": 0.1, "directed": True}
+    )
+    assert n.edges and any(
+        source not in n.edges.get(target, {})
+        for source, targets in n.edges.items()
+        for target in targets
+    )
+    # Other network types still come from NetworkX.
+    n = DemoNetwork(model=model)
+    n.setup_agent_connections([agent_list], "cycle_graph", {})
+    assert all(len(n.get_neighbors(agent)) == 2 for agent in agent_list)
@@ -0,0 +1,72 @@
+# -*- coding:utf-8 -*-
+import numpy as np
+
+from Melodie import AgentList, Grid, GridAgent, Model, RandomStream, Scenario, Spot, set_seed
+from tests.infra.config import cfg
+
+
+class RandomWalker(GridAgent):
+    def set_category(self):
+        self.category = 0
+
+
+def create_model(id_scenario=0, id_run=0):
+    return Model(cfg, Scenario(id_scenario=id_scenario), run_id_in_scenario=id_run)
+
+
+def walk(model: Model):
+    grid = model.create_grid(Grid, Spot)
+    grid.setup_params(10, 10)
+    grid.init_grid()
+    agents = AgentList(RandomWalker, model)
+    agents.setup_agents(20)
+    grid.setup_agent_locations(agents, "random_single")
+    for agent in agents:
+        agent.rand_move_agent(1, 1)
+    return [(agent.x, agent.y) for agent in agents], [
+        agent.id for agent in agents.random_sample(5)
+    ]
+
+
+def test_run_streams():
+    set_seed(42)
+    assert create_model().rng.random(3).tolist() == create_model().rng.random(3).tolist()
+    draws = [
+        create_model(id_scenario, id_run).rng.random()
+        for id_scenario in [0, 1, "a"]
+        for id_run in [0, 1]
+    ]
+    assert len(set(draws)) == len(draws)
+
+    assert walk(create_model()) == walk(create_model())
+    model = create_model()
+    first = model.rng.random()
+    set_seed(42)
+    assert model.rng.random() == first
+    set_seed(43)
+    assert model.rng.random() != first
+
+    model.rng = np.random.default_rng(0)
+    assert model.rng.random() == np.random.default_rng(0).random()
+
+
+def test_random_stream():
+    rng = RandomStream(np.random.SeedSequence(1))
+    scalars = [rng.random() for _ in range(2000)]
+    assert all(0 <= value < 1 for value in scalars) and len(set(scalars)) == 2000
+    assert rng.random((2, 3)).shape == (2, 3)
+    assert all(0 <= rng.integers(5) < 5 for _ in range(100))
+    assert rng.integers(2, 4, size=10).min() >= 2
+
+    population = list(range(1000))
+    for k in [0, 1, 10, 500, 1000]:
+        sample = rng.sample(population, k)
+        assert len(sample) == len(set(sample)) == k
+    try:
+        rng.sample(population, 1001)
+        assert False
+    except ValueError:
+        pass
+
+    children = rng.spawn(2)
+    assert children[0].random() != children[1].random()
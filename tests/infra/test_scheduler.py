@@ -0,0 +1,161 @@
+# -*- coding:utf-8 -*-
+from Melodie import (
+    Agent,
+    Model,
+    RandomActivation,
+    Scenario,
+    SequentialActivation,
+    SparseActivation,
+    StagedActivation,
+    assert_exc_occurs,
+    set_seed,
+)
+from tests.infra.config import cfg
+
+
+class ScheduledAgent(Agent):
+    def step(self):
+        self.model.activations.append(self.id)
+
+    def move(self):
+        self.model.activations.append(("move", self.id))
+
+    def interact(self):
+        self.model.activations.append(("interact", self.id))
+
+
+def create_model(agents_num=10):
+    model = Model(cfg, Scenario(id_scenario=0))
+    model.activations = []
+    model.agents = model.create_agent_list(ScheduledAgent)
+    model.agents.setup_agents(agents_num)
+    return model
+
+
+def test_sequential_and_random_activation():
+    set_seed(0)
+    model = create_model()
+    model.create_scheduler(SequentialActivation, model.agents).step()
+    assert model.activations == list(range(10))
+
+    scheduler = model.create_scheduler(RandomActivation, model.agents)
+    model.activations = []
+    scheduler.step()
+    scheduler.step()
+    assert sorted(model.activations[:10]) == sorted(model.activations[10:]) == list(range(10))
+    assert model.activations[:10] != model.activations[10:] and scheduler.steps == 2
+
+    model.agents.remove(model.agents.get_agent(3))
+    model.activations = []
+    scheduler.step()
+    assert sorted(model.activations) == [i for i in range(10) if i != 3]
+
+
+class RemovingAgent(ScheduledAgent):
+    def step(self):
+        super().step()
+        if self.id == 1:
+            self.model.agents.remove(self.model.agents.get_agent(5))
+            self.model.agents.add()
+
+
+def test_changes_during_activation():
+    model = Model(cfg, Scenario(id_scenario=0))
+    model.activations = []
+    model.agents = model.create_agent_list(RemovingAgent)
+    model.agents.setup_agents(10)
+    # Agents removed during a step are skipped, and agents added are not activated.
+    model.create_scheduler(SequentialActivation, model.agents).step()
+    assert model.activations == [i for i in range(10) if i != 5]
+    assert [agent.id for agent in model.agents][-1] == 10
+
+
+def test_staged_activation():
+    model = create_model(3)
+    model.create_scheduler(
+        StagedActivation, model.agents, stages=["move", "interact"]
+    ).step()
+    assert model.activations == [("move", 0), ("move", 1), ("move", 2)] + [
+        ("interact", 0),
+        ("interact", 1),
+        ("interact", 2),
+    ]
+
+    model.activations = []
+    model.create_scheduler(
+        StagedActivation, model.agents, stages=["move", "interact"], shuffle=True
+    ).step()
+    moves = [agent_id for stage, agent_id in model.activations[:3]]
+    interactions = [agent_id for stage, agent_id in model.activations[3:]]
+    assert moves == interactions and sorted(moves) == [0, 1, 2]
+
+
+def test_sparse_activation():
+    model = create_model()
+    scheduler = model.create_scheduler(SparseActivation, model.agents)
+    scheduler.step()
+    assert model.activations == []
+    for agent_id in [5, 2, 7]:
+        scheduler.activate(model.agents.get_agent(agent_id))
+    scheduler.step()
+    assert model.activations == [5, 2, 7]
+
+    scheduler.deactivate(model.agents.get_agent(2))
+    model.agents.remove(model.agents.get_agent(7))
+    model.activations = []
+    scheduler.step()
+    assert model.activations == [5] and len(scheduler) == 1
+    assert scheduler.is_active(model.agents.get_agent(5))
+
+
+class EventAgent(Agent):
+    def setup(self):
+        self.infected = False
+        self.recovery = None
+
+    def infect(self, recovery_time):
+        self.infected = True
+        self.recovery = self.model.calendar.schedule_in(recovery_time, self.recover)
+
+    def recover(self):
+        self.infected = False
+        self.model.recoveries.append((self.model.calendar.now, self.id))
+
+
+class EventModel(Model):
+    def create(self):
+        self.recoveries = []
+        self.agents = self.create_agent_list(EventAgent)
+
+    def setup(self):
+        self.agents.setup_agents(5)
+
+    def run(self):
+        self.samples = []
+        self.infected = []
+        self.calendar.schedule(2.5, self.agents.get_agent(0).infect, 10)
+        self.calendar.schedule(0, self.agents.get_agent(1).infect, 3)
+        self.calendar.schedule(0, self.agents.get_agent(2).infect, 3)
+        self.agents.get_agent(3).infect(1)
+        self.agents.get_agent(3).recovery.cancel()
+        for t in self.event_iterator(10, sampling_interval=2):
+            self.samples.append(t)
+            self.infected.append(
+                sorted(agent.id for agent in self.agents if agent.infected)
+            )
+
+
+def test_event_iterator():
+    model = EventModel(cfg, Scenario(id_scenario=0))
+    model._setup()
+    model.run()
+    assert model.samples == [0, 2, 4, 6, 8]
+    assert model.infected == [[1, 2, 3], [1, 2, 3], [0, 3], [0, 3], [0, 3]]
+    # Events at the same time run in the order they were scheduled, and events
+    # after the last sampling instant are not run.
+    assert model.recoveries == [(3, 1), (3, 2)]
+    assert model.calendar.now == 8 and model.calendar.next_time() == 12.5
+
+    assert_exc_occurs(
+        1011, lambda: model.calendar.schedule(1, model.agents.get_agent(4).recover)
+    )
@@ -0,0 +1,27 @@
+# -*- coding:utf-8 -*-
+"""
+Benchmarks comparing the fast paths of Melodie with the code they replace.
+
+They are not collected by pytest. Run them all, or the modules given by name, and
+read the measurements in the log:
+
+.. code-block:: bash
+
+    python -m tests.procedures.benchmarks
+    python -m tests.procedures.benchmarks grid network
+
+The sizes are kept small so that they run in seconds. Increase the constants at
+the top of each module to reproduce the measurements for large populations.
+"""
+import time
+
+MODULES = ["agent_list", "continuous_space", "grid", "network", "scheduler"]
+
+
+def timed(func) -> float:
+    """
+    Call ``func`` once, and return the time it took, in seconds.
+    """
+    t0 = time.perf_counter()
+    func()
+    return time.perf_counter() - t0
@@ -0,0 +1,19 @@
+# -*- coding:utf-8 -*-
+import importlib
+import logging
+import sys
+
+from . import MODULES
+
+
+def main(module_names):
+    logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
+    for module_name in module_names or MODULES:
+        module = importlib.import_module(f"{__package__}.{module_name}")
+        for name, func in vars(module).items():
+            if name.startswith("bench_") and callable(func):
+                func()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
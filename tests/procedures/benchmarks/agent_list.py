@@ -0,0 +1,135 @@
+# -*- coding:utf-8 -*-
+"""
+Benchmarks of AgentList operations.
+"""
+import logging
+
+from Melodie import Agent, AgentList
+from tests.infra.config import model
+
+from . import timed
+
+logger = logging.getLogger(__name__)
+
+N = 100_000
+COHORT = 10_000
+
+
+class BenchAgent(Agent):
+    def setup(self):
+        self.health_state = 0
+        self.wealth = 0.0
+
+
+class SeqIter:
+    """
+    The python-level iterator AgentList used before, for comparison.
+    """
+
+    def __init__(self, seq):
+        self._seq = seq
+        self._i = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        seq = self._seq
+        while self._i < len(seq):
+            next_item = seq[self._i]
+            self._i += 1
+            if next_item is not None:
+                return next_item
+        raise StopIteration
+
+
+def bench_cohort_add_remove():
+    al = AgentList(BenchAgent, model)
+    al.setup_agents(N)
+
+    def add_one_by_one():
+        for _ in range(COHORT):
+            al.add(params={"health_state": 1})
+
+    def remove_one_by_one():
+        for agent_id in range(N, N + COHORT):
+            al.remove(al.get_agent(agent_id))
+        len(al[0:1])
+
+    t_add, t_remove = timed(add_one_by_one), timed(remove_one_by_one)
+
+    def add_many():
+        al.add_many(COHORT)
+
+    def remove_many():
+        al.remove_many(range(N + COHORT, N + 2 * COHORT))
+
+    t_add_many, t_remove_many = timed(add_many), timed(remove_many)
+    assert len(al) == N
+    logger.info(
+        f"N={N}, cohort={COHORT}: add {t_add:.4f}s vs add_many {t_add_many:.4f}s; "
+        f"remove {t_remove:.4f}s vs remove_many {t_remove_many:.4f}s"
+    )
+
+
+class TrackedBenchAgent(BenchAgent):
+    _tracked_props_ = ("health_state",)
+
+
+def bench_tracked_property_overhead():
+    """
+    Compare the cost of counting states by a scan every step with the write
+    overhead of a tracked property and an O(1) read.
+    """
+    changes = N // 100
+    al = AgentList(BenchAgent, model)
+    al.setup_agents(N)
+    al_tracked = AgentList(TrackedBenchAgent, model)
+    al_tracked.setup_agents(N)
+
+    def write(agent_list):
+        def func():
+            for agent in agent_list[:changes]:
+                agent.health_state = 1 - agent.health_state
+
+        return func
+
+    def scan():
+        counts = {}
+        for agent in al:
+            counts[agent.health_state] = counts.get(agent.health_state, 0) + 1
+        return counts
+
+    t_write, t_tracked_write = timed(write(al)), timed(write(al_tracked))
+    t_scan = timed(scan)
+    t_stats = timed(lambda: al_tracked.stats("health_state").counts.get(1, 0))
+    assert scan() == al_tracked.stats("health_state").counts == {0: N - changes, 1: changes}
+    logger.info(
+        f"N={N}, {changes} writes per step: plain writes {t_write:.4f}s, "
+        f"tracked writes {t_tracked_write:.4f}s; scan {t_scan:.4f}s vs stats {t_stats:.6f}s"
+    )
+
+
+def bench_iteration_speed():
+    """
+    Compare iterating an AgentList with iterating a plain list, and with the
+    python-level ``SeqIter`` iterator used before.
+    """
+    al = AgentList(BenchAgent, model)
+    al.setup_agents(N)
+    agents = list(al)
+
+    def loop(iterable_factory):
+        def func():
+            for _ in iterable_factory():
+                pass
+
+        return func
+
+    t_list = timed(loop(lambda: agents))
+    t_agent_list = timed(loop(lambda: al))
+    t_seq_iter = timed(loop(lambda: SeqIter(al.agents)))
+    logger.info(
+        f"N={N}, one loop: list {t_list:.4f}s, AgentList {t_agent_list:.4f}s, "
+        f"SeqIter {t_seq_iter:.4f}s"
+    )
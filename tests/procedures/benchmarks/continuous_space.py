@@ -0,0 +1,75 @@
+# -*- coding:utf-8 -*-
+"""
+Benchmarks of the continuous space.
+"""
+import logging
+
+import numpy as np
+
+from Melodie import ContinuousAgent, ContinuousSpace
+
+from . import timed
+
+logger = logging.getLogger(__name__)
+
+SIZE = 100.0
+AGENTS = 5_000
+RADIUS = 2.0
+
+
+class Walker(ContinuousAgent):
+    def set_category(self):
+        self.category = 0
+
+
+def bench_radius_query_cost():
+    rng = np.random.default_rng(0)
+    xs = rng.uniform(0, SIZE, AGENTS)
+    ys = rng.uniform(0, SIZE, AGENTS)
+    all_xs, all_ys = xs.tolist(), ys.tolist()
+
+    scanned = []
+
+    def wrapped(d):
+        # The space is a torus, so distances are measured across the edges too.
+        d = abs(d)
+        return min(d, SIZE - d)
+
+    def scan():
+        # Quadratic, so it runs for a tenth of the agents.
+        for x, y in zip(all_xs[: AGENTS // 10], all_ys[: AGENTS // 10]):
+            scanned.append(
+                [
+                    i
+                    for i, (x2, y2) in enumerate(zip(all_xs, all_ys))
+                    if wrapped(x - x2) ** 2 + wrapped(y - y2) ** 2 <= RADIUS**2
+                ]
+            )
+
+    t_scan = timed(scan) * 10
+    results = {}
+    for index in ["hash", "kdtree"]:
+        space = ContinuousSpace()
+        space.setup_params(SIZE, SIZE, cell_size=RADIUS, index=index)
+        agents = [Walker(i, x, y) for i, (x, y) in enumerate(zip(all_xs, all_ys))]
+        for agent in agents:
+            space.add_agent(agent)
+        t_query = timed(
+            lambda: [space.get_agent_ids_in_radius(0, a.x, a.y, RADIUS) for a in agents]
+        )
+        found = [
+            sorted(space.get_agent_ids_in_radius(0, a.x, a.y, RADIUS).tolist())
+            for a in agents[: AGENTS // 10]
+        ]
+        assert found == scanned
+        t_move = timed(
+            lambda: space.move_agents(
+                0, np.arange(AGENTS), xs + rng.normal(0, 1, AGENTS), ys
+            )
+        )
+        results[index] = f"queries {t_query:.4f}s, bulk move {t_move:.4f}s"
+    logger.info(
+        f"{AGENTS} radius-{RADIUS} queries in a {SIZE}x{SIZE} space: scan of all "
+        f"agents {t_scan:.4f}s (estimated from a tenth); spatial hash "
+        f"{results['hash']}; KD-tree {results['kdtree']}"
+    )
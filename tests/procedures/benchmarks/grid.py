@@ -0,0 +1,300 @@
+# -*- coding:utf-8 -*-
+"""
+Benchmarks of the grid.
+"""
+import logging
+import tracemalloc
+
+import numpy as np
+
+from Melodie import Grid, GridAgent, Model, Scenario, Spot
+from tests.infra.config import cfg
+
+from . import timed
+
+logger = logging.getLogger(__name__)
+
+WIDTH = 500
+HEIGHT = 500
+CATEGORIES = 3
+AGENTS = 20_000
+
+
+class Walker(GridAgent):
+    def set_category(self):
+        self.category = 0
+
+
+def bench_occupancy_cost():
+    rng = np.random.default_rng(0)
+    targets = rng.integers(0, [WIDTH, HEIGHT], size=(AGENTS, 2)).tolist()
+    results = {}
+    for occupancy in ["sets", "arrays"]:
+        grid = Grid(Spot)
+        grid.setup_params(WIDTH, HEIGHT, occupancy=occupancy)
+        tracemalloc.start()
+        for category in range(CATEGORIES):
+            grid.add_category(category)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        agents = [Walker(i) for i in range(AGENTS)]
+        for agent in agents:
+            grid.add_agent(agent)
+
+        def move():
+            for agent, (x, y) in zip(agents, targets):
+                grid.move_agent(agent, x, y)
+
+        def query():
+            for agent in agents:
+                grid.get_neighbors(agent)
+
+        results[occupancy] = (memory, timed(move), timed(query))
+    logger.info(
+        f"{WIDTH}x{HEIGHT} grid, {CATEGORIES} categories, {AGENTS} agents: "
+        + "; ".join(
+            f"{occupancy}: {memory / 2 ** 20:.1f} MiB, {AGENTS} moves {t_move:.4f}s, "
+            f"{AGENTS} neighbor queries {t_query:.4f}s"
+            for occupancy, (memory, t_move, t_query) in results.items()
+        )
+    )
+    assert results["arrays"][0] < results["sets"][0]
+
+
+def bench_neighbor_index_cost():
+    rng = np.random.default_rng(0)
+    positions = rng.integers(0, [WIDTH, HEIGHT], size=(AGENTS, 2)).tolist()
+    results = {}
+    for caching in [False, True]:
+        grid = Grid(Spot)
+        grid.setup_params(WIDTH, HEIGHT, caching=caching, occupancy="arrays")
+        t_build = timed(lambda: grid._get_neighbor_index(2, True, True))
+        t_query = timed(
+            lambda: [grid._get_neighbor_spot_ids(x, y, 2) for x, y in positions]
+        )
+        results[caching] = (t_build, t_query)
+    logger.info(
+        f"{WIDTH}x{HEIGHT} grid, {AGENTS} radius-2 neighborhood queries: without "
+        f"index {results[False][1]:.4f}s; with index {results[True][1]:.4f}s, "
+        f"built in {results[True][0]:.4f}s"
+    )
+
+
+def bench_bulk_move_cost():
+    model = Model(cfg, Scenario(id_scenario=0))
+    results = {}
+    for occupancy in ["sets", "arrays"]:
+        grid = model.create_grid(Grid, Spot)
+        grid.setup_params(WIDTH, HEIGHT, occupancy=occupancy)
+        agents = model.create_agent_list(Walker, columns={"x": int, "y": int})
+        agents.setup_agents(AGENTS * 5)
+        grid.setup_agent_locations(agents)
+
+        def rand_move_one_by_one():
+            for agent in agents:
+                agent.rand_move_agent(1, 1)
+
+        results[occupancy] = (
+            timed(rand_move_one_by_one),
+            timed(lambda: grid.rand_move_agents(0, 1, 1)),
+        )
+    logger.info(
+        f"Random walk of {AGENTS * 5} agents: "
+        + "; ".join(
+            f"{occupancy}: rand_move_agent {t_one:.4f}s vs rand_move_agents {t_bulk:.4f}s"
+            for occupancy, (t_one, t_bulk) in results.items()
+        )
+    )
+
+
+def bench_random_placement_cost():
+    num_agents = AGENTS // 4
+    # The previous algorithm is too slow to place all agents in the test suite.
+    num_agents_set_walk = num_agents // 50
+    model = Model(cfg, Scenario(id_scenario=0))
+
+    def set_walk_placement():
+        # The previous algorithm: walk the set of empty spots up to a random index.
+        empty_spots = set(range(WIDTH * HEIGHT))
+        for _ in range(num_agents_set_walk):
+            rand_value = model.rng.integers(len(empty_spots))
+            for i, spot in enumerate(empty_spots):
+                if i == rand_value:
+                    empty_spots.remove(spot)
+                    break
+
+    def create_grid_and_agents():
+        grid = model.create_grid(Grid, Spot)
+        grid.setup_params(WIDTH, HEIGHT, occupancy="arrays")
+        agents = model.create_agent_list(Walker, columns={"x": int, "y": int})
+        agents.setup_agents(num_agents)
+        return grid, agents
+
+    grid, agents = create_grid_and_agents()
+
+    def one_by_one_placement():
+        for agent in agents:
+            agent.x, agent.y = grid.find_empty_spot()
+            grid.add_agent(agent)
+
+    t_set_walk = timed(set_walk_placement)
+    t_one_by_one = timed(one_by_one_placement)
+    grid, agents = create_grid_and_agents()
+    t_bulk = timed(lambda: grid.setup_agent_locations(agents, "random_single"))
+    logger.info(
+        f"Random placement on {WIDTH}x{HEIGHT}: set walk {t_set_walk:.4f}s for "
+        f"{num_agents_set_walk} agents; for {num_agents} agents, O(1) sampling one "
+        f"by one {t_one_by_one:.4f}s, bulk {t_bulk:.4f}s"
+    )
+
+
+def bench_layer_cost():
+    grid = Grid(Spot)
+    grid.setup_params(WIDTH, HEIGHT)
+    for x in range(WIDTH):
+        for y in range(HEIGHT):
+            grid.get_spot(x, y).food = 1.0
+
+    def decay_spot_by_spot():
+        for x in range(WIDTH):
+            for y in range(HEIGHT):
+                spot = grid.get_spot(x, y)
+                spot.food *= 0.9
+
+    t_spot_by_spot = timed(decay_spot_by_spot)
+    grid.add_layer("pheromone", 1.0)
+    t_decay = timed(lambda: grid.decay("pheromone", 0.1))
+    t_diffuse = timed(lambda: grid.diffuse("pheromone", 0.1))
+    logger.info(
+        f"{WIDTH}x{HEIGHT} field: decay spot by spot {t_spot_by_spot:.4f}s; layer "
+        f"decay {t_decay:.4f}s, layer diffusion {t_diffuse:.4f}s"
+    )
+
+
+def bench_lazy_spots_cost():
+    results = {}
+    for lazy_spots in [False, True]:
+        grid = Grid(Spot)
+        tracemalloc.start()
+        t_setup = timed(
+            lambda: grid.setup_params(WIDTH, HEIGHT, lazy_spots=lazy_spots)
+        )
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        grid.add_layer("food", 1.0)
+        t_touch = timed(
+            lambda: [grid.get_spot(x, y).food for x in range(100) for y in range(100)]
+        )
+        results[lazy_spots] = f"setup {t_setup:.4f}s, {memory / 2**20:.1f} MiB, "
+        results[lazy_spots] += f"10000 spots read {t_touch:.4f}s"
+    logger.info(
+        f"Spots of a {WIDTH}x{HEIGHT} grid: eager {results[False]}; lazy {results[True]}"
+    )
+
+
+def bench_neighbors_of_cost():
+    model = Model(cfg, Scenario(id_scenario=0))
+    grid = model.create_grid(Grid, Spot)
+    grid.setup_params(100, 100, occupancy="arrays")
+    agents = model.create_agent_list(Walker)
+    agents.setup_agents(AGENTS)
+    rng = np.random.default_rng(0)
+    for agent in agents:
+        agent.x, agent.y = rng.integers(0, 100, 2).tolist()
+    grid.setup_agent_locations(agents)
+
+    def neighbors_from_tuples():
+        for agent in agents:
+            for _, agent_id in grid.get_neighbors(agent):
+                agents.get_agent(agent_id)
+
+    def neighbors_of():
+        for agent in agents:
+            grid.neighbors_of(agent)
+
+    t_tuples = timed(neighbors_from_tuples)
+    t_objects = timed(neighbors_of)
+    logger.info(
+        f"Neighbor agents of {AGENTS} agents on a 100x100 grid: get_neighbors and "
+        f"get_agent {t_tuples:.4f}s, neighbors_of {t_objects:.4f}s"
+    )
+
+
+def bench_incremental_colormap_cost():
+    grid = Grid(Spot)
+    grid.setup_params(WIDTH, HEIGHT, occupancy="arrays")
+    agents = [Walker(i) for i in range(AGENTS)]
+    for agent in agents:
+        grid.add_agent(agent)
+    t_full = timed(grid.get_colormap)
+    for agent in agents[:100]:
+        grid.move_agent(agent, agent.x + 1, agent.y)
+        grid.get_spot(agent.x, agent.y).colormap = 1
+    t_incremental = timed(lambda: grid.get_colormap(incremental=True))
+    logger.info(
+        f"Colormap of a {WIDTH}x{HEIGHT} grid with {AGENTS} agents: full frame "
+        f"{t_full:.4f}s, incremental frame after 100 moves {t_incremental:.4f}s"
+    )
+
+
+def bench_density_query_cost():
+    grid = Grid(Spot)
+    grid.setup_params(WIDTH, HEIGHT, occupancy="arrays")
+    agents = [Walker(i) for i in range(AGENTS)]
+    rng = np.random.default_rng(0)
+    for agent in agents:
+        agent.x, agent.y = rng.integers(0, [WIDTH, HEIGHT]).tolist()
+        grid.add_agent(agent)
+    queried = agents[:200]
+
+    def count_by_enumeration():
+        for agent in queried:
+            len(grid.get_neighbors(agent, radius=10))
+
+    t_enumeration = timed(count_by_enumeration)
+    _, xs, ys = grid.agent_positions(0)
+    t_table = timed(lambda: grid.count_neighbors(0, xs, ys, radius=10))
+    logger.info(
+        f"Radius-10 agent counts on {WIDTH}x{HEIGHT}: get_neighbors "
+        f"{t_enumeration:.4f}s for {len(queried)} agents; summed-area table "
+        f"{t_table:.4f}s for all {AGENTS} agents, in one call"
+    )
+
+
+def bench_distance_field_cost():
+    grid = Grid(Spot)
+    grid.setup_params(WIDTH, HEIGHT, wrap=False)
+    rng = np.random.default_rng(0)
+    floor = grid.add_layer("floor", rng.random((HEIGHT, WIDTH)) > 0.2)
+    targets = [(0, 0), (WIDTH - 1, HEIGHT - 1)]
+    for x, y in targets:
+        floor[y, x] = True
+    walkers = rng.integers(0, [WIDTH, HEIGHT], size=(100, 2)).tolist()
+
+    def bfs_per_agent(starts):
+        # Breadth-first search over spot neighborhoods, until a target is reached.
+        for start in starts:
+            seen = {tuple(start)}
+            frontier = [tuple(start)]
+            while frontier and not seen.intersection(targets):
+                next_frontier = []
+                for spot in frontier:
+                    for neighbor in grid.get_spot_neighborhood(grid.get_spot(*spot)):
+                        position = (neighbor.x, neighbor.y)
+                        if position not in seen and floor[neighbor.y, neighbor.x]:
+                            seen.add(position)
+                            next_frontier.append(position)
+                frontier = next_frontier
+
+    # The searches are slow, so they run for one agent.
+    t_bfs = timed(lambda: bfs_per_agent(walkers[:1])) * len(walkers)
+    t_field = timed(lambda: grid.distance_field(targets, passable="floor"))
+    t_cached = timed(lambda: grid.distance_field(targets, passable="floor"))
+    field = grid.distance_field(targets, passable="floor")
+    t_steps = timed(lambda: [field.next_step(x, y) for x, y in walkers])
+    logger.info(
+        f"Navigation of 100 agents to 2 targets on {WIDTH}x{HEIGHT}: BFS per agent "
+        f"{t_bfs:.4f}s (estimated from 1 agent); distance field {t_field:.4f}s, "
+        f"cached {t_cached:.4f}s, 100 next steps {t_steps:.5f}s"
+    )
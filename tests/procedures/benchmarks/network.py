@@ -0,0 +1,70 @@
+# -*- coding:utf-8 -*-
+"""
+Benchmarks of the network stores.
+"""
+import logging
+import tracemalloc
+
+import numpy as np
+
+from Melodie import Model, Network, Scenario, SparseNetwork
+from Melodie.network_generators import GENERATORS
+from tests.infra.config import cfg
+
+from . import timed
+
+logger = logging.getLogger(__name__)
+
+AGENTS = 50_000
+DEGREE = 10
+
+
+def bench_network_store_cost():
+    model = Model(cfg, Scenario(0))
+    rng = np.random.default_rng(0)
+    nodes = [(0, i) for i in range(AGENTS)]
+    sources = rng.integers(0, AGENTS, AGENTS * DEGREE // 2)
+    targets = (sources + rng.integers(1, AGENTS, len(sources))) % AGENTS
+    # Network raises a KeyError for the few nodes without edges.
+    connected = np.unique(np.concatenate((sources, targets))).tolist()
+    results, neighbors = {}, {}
+    for network_cls in [Network, SparseNetwork]:
+        network = network_cls(model=model)
+        for node in nodes:
+            network._add_agent(*node)
+        tracemalloc.start()
+        t_build = timed(lambda: network._add_generated_edges(nodes, sources, targets))
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        t_query = timed(
+            lambda: [network._get_neighbor_positions(i, 0) for i in connected]
+        )
+        neighbors[network_cls] = [
+            sorted(network._get_neighbor_positions(i, 0)) for i in connected
+        ]
+        results[network_cls.__name__] = (
+            f"build {t_build:.3f}s, {memory / 2**20:.1f} MiB, "
+            f"neighbors of all nodes {t_query:.3f}s"
+        )
+    assert neighbors[Network] == neighbors[SparseNetwork]
+    logger.info(f"{AGENTS} agents, {len(sources)} edges: {results}")
+
+
+def bench_network_generator_cost():
+    import networkx as nx
+
+    rng = np.random.default_rng(0)
+    results = {}
+    for network_type, params in [
+        ("barabasi_albert_graph", {"m": 3}),
+        ("watts_strogatz_graph", {"k": 6, "p": 0.1}),
+    ]:
+        t_nx = timed(lambda: list(getattr(nx, network_type)(AGENTS, **params).edges))
+        t_numpy = timed(lambda: GENERATORS[network_type](AGENTS, rng=rng, **params))
+        results[network_type] = f"networkx {t_nx:.3f}s, numpy {t_numpy:.3f}s"
+    # NetworkX draws each of the n * (n - 1) / 2 pairs of erdos_renyi_graph.
+    t_numpy = timed(
+        lambda: GENERATORS["erdos_renyi_graph"](AGENTS, p=DEGREE / AGENTS, rng=rng)
+    )
+    results["erdos_renyi_graph"] = f"numpy {t_numpy:.3f}s"
+    logger.info(f"Generating networks of {AGENTS} agents: {results}")
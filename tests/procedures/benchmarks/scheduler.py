@@ -0,0 +1,112 @@
+# -*- coding:utf-8 -*-
+"""
+Benchmarks of activation schedulers.
+"""
+import logging
+import random
+
+from Melodie import Agent, Model, RandomActivation, Scenario, SparseActivation
+from tests.infra.config import cfg
+
+from . import timed
+
+logger = logging.getLogger(__name__)
+
+N = 100_000
+ACTIVE = N // 100
+
+
+class IdleAgent(Agent):
+    def setup(self):
+        self.counter = 0
+
+    def step(self):
+        if self.counter > 0:
+            self.counter -= 1
+
+
+def bench_activation_cost():
+    model = Model(cfg, Scenario(id_scenario=0))
+    agents = model.create_agent_list(IdleAgent)
+    agents.setup_agents(N)
+
+    def shuffled_copy():
+        shuffled = list(agents)
+        random.shuffle(shuffled)
+        for agent in shuffled:
+            agent.step()
+
+    random_activation = model.create_scheduler(RandomActivation, agents)
+    sparse_activation = model.create_scheduler(SparseActivation, agents)
+    for agent in agents.random_sample(ACTIVE):
+        sparse_activation.activate(agent)
+
+    def poll_all():
+        for agent in agents:
+            agent.step()
+
+    t_shuffled_copy = timed(shuffled_copy)
+    t_random = timed(random_activation.step)
+    t_poll_all = timed(poll_all)
+    t_sparse = timed(sparse_activation.step)
+    assert len(sparse_activation) == ACTIVE
+    logger.info(
+        f"N={N}: shuffled copy {t_shuffled_copy:.4f}s vs RandomActivation "
+        f"{t_random:.4f}s; polling all {t_poll_all:.4f}s vs SparseActivation with "
+        f"{ACTIVE} active agents {t_sparse:.4f}s"
+    )
+
+
+PERIODS = 200
+
+
+class RecoveringAgent(Agent):
+    def setup(self):
+        self.infected = False
+        self.recovery_period = -1
+
+    def infect(self, recovery_period):
+        self.infected = True
+        self.recovery_period = recovery_period
+
+    def step(self, period):
+        if self.infected and period == self.recovery_period:
+            self.infected = False
+
+    def recover(self):
+        self.infected = False
+
+
+def bench_event_mode_cost():
+    def create_model():
+        model = Model(cfg, Scenario(id_scenario=0))
+        model.agents = model.create_agent_list(RecoveringAgent)
+        model.agents.setup_agents(N // 10)
+        return model
+
+    time_stepped = create_model()
+    event_mode = create_model()
+    recovery_periods = time_stepped.rng.integers(1, PERIODS, size=ACTIVE).tolist()
+    for agent_id, recovery_period in enumerate(recovery_periods):
+        time_stepped.agents.get_agent(agent_id).infect(recovery_period)
+        agent = event_mode.agents.get_agent(agent_id)
+        agent.infect(recovery_period)
+        event_mode.calendar.schedule(recovery_period, agent.recover)
+
+    def run_time_stepped():
+        for t in time_stepped.iterator(PERIODS):
+            for agent in time_stepped.agents:
+                agent.step(t)
+
+    def run_event_mode():
+        for t in event_mode.event_iterator(PERIODS):
+            pass
+
+    t_time_stepped = timed(run_time_stepped)
+    t_event_mode = timed(run_event_mode)
+    for model in [time_stepped, event_mode]:
+        assert not any(agent.infected for agent in model.agents)
+    logger.info(
+        f"{N // 10} agents, {ACTIVE} recoveries, {PERIODS} periods: time-stepped "
+        f"{t_time_stepped:.4f}s vs event mode {t_event_mode:.4f}s"
+    )